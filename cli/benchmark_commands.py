@@ -0,0 +1,106 @@
+"""
+Compares the cost of sending big Write and GetMany commands before and after the
+commands were encoded only once. Before, every access to Command.data encoded the
+command again: once for the debug message (which was always formatted, even with
+debug logging disabled) and once for the request itself. The write debug message
+formatted all write requests.
+
+    PYTHONPATH=. python cli/benchmark_commands.py [number_of_models]
+"""
+
+import sys
+import time
+from statistics import median
+from typing import Any, Callable, List
+
+from openslides_backend.services.datastore import commands
+from openslides_backend.shared.interfaces.event import EventType
+from openslides_backend.shared.interfaces.write_request import WriteRequest
+from openslides_backend.shared.patterns import Collection, FullQualifiedId
+
+REPETITIONS = 20
+
+
+def build_write(number: int) -> List[WriteRequest]:
+    collection = Collection("motion")
+    return [
+        WriteRequest(
+            events=[
+                {
+                    "type": EventType.Create,
+                    "fqid": FullQualifiedId(collection, id_),
+                    "fields": {
+                        "id": id_,
+                        "title": f"Motion {id_}",
+                        "text": "<p>" + "Lorem ipsum dolor sit amet. " * 20 + "</p>",
+                        "meeting_id": 1,
+                        "submitter_ids": list(range(id_, id_ + 5)),
+                    },
+                }
+                for id_ in range(1, number + 1)
+            ],
+            information={FullQualifiedId(collection, 1): ["Object created"]},
+            user_id=1,
+            locked_fields={f"motion/{id_}": 1 for id_ in range(1, number + 1)},
+        )
+    ]
+
+
+def build_get_many(number: int) -> List[commands.GetManyRequest]:
+    fields = [f"field_{index}" for index in range(20)]
+    return [
+        commands.GetManyRequest(
+            Collection(collection), list(range(1, number + 1)), fields
+        )
+        for collection in ("motion", "agenda_item", "list_of_speakers")
+    ]
+
+
+def measure(call: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def compare(name: str, before: Callable[[], Any], after: Callable[[], Any]) -> None:
+    before_ms = measure(before)
+    after_ms = measure(after)
+    print(
+        f"{name:<10} before {before_ms:8.2f} ms   after {after_ms:8.2f} ms"
+        f"   speedup {before_ms / after_ms:.2f}x"
+    )
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    write_requests = build_write(number)
+    get_many_requests = build_get_many(number)
+    print(f"Median of {REPETITIONS} runs with {number} models per command")
+
+    def write_before() -> None:
+        command = commands.Write(write_requests)
+        f"Write request: {write_requests}"  # eager debug message
+        command.encode()  # request
+
+    def write_after() -> None:
+        command = commands.Write(write_requests)
+        command.data  # request, the debug message is not formatted
+
+    def get_many_before() -> None:
+        command = commands.GetMany(get_many_requests)
+        f"{command.encode().decode()}"  # eager debug message
+        command.encode()  # request
+
+    def get_many_after() -> None:
+        command = commands.GetMany(get_many_requests)
+        command.data  # request, the debug message is not formatted
+
+    compare("Write", write_before, write_after)
+    compare("GetMany", get_many_before, get_many_after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares the CPU cost of gzip compressing and decompressing realistic datastore
+payloads with the bytes saved, i. e. the transfer time saved on networks of
+different bandwidths. The payloads are a write request like the one of
+meeting.delete and a get_all response of users.
+
+    PYTHONPATH=. python cli/benchmark_compression.py [number_of_models]
+"""
+
+import gzip
+import sys
+import time
+from typing import Any, Callable, List
+
+import simplejson as json
+
+from openslides_backend.services.datastore import commands
+from openslides_backend.shared.interfaces.event import Event, EventType
+from openslides_backend.shared.interfaces.write_request import (
+    LockedFields,
+    WriteRequest,
+)
+from openslides_backend.shared.patterns import Collection, FullQualifiedId
+
+LEVELS = [1, 6, 9]
+BANDWIDTHS = {"100 Mbit/s": 100e6 / 8, "1 Gbit/s": 1e9 / 8, "10 Gbit/s": 10e9 / 8}
+
+
+def build_write_request(number: int) -> bytes:
+    events: List[Event] = []
+    locked_fields: LockedFields = {}
+    for collection in ("motion", "agenda_item", "list_of_speakers", "speaker"):
+        for id_ in range(1, number // 4 + 1):
+            fqid = FullQualifiedId(Collection(collection), id_)
+            events.append(Event(type=EventType.Delete, fqid=fqid))
+            locked_fields[str(fqid)] = id_
+            locked_fields[f"{fqid}/meeting_id"] = id_
+    write_request = WriteRequest(
+        events=events, information={}, user_id=1, locked_fields=locked_fields
+    )
+    return commands.Write(write_requests=[write_request]).data or b""
+
+
+def build_get_all_response(number: int) -> bytes:
+    return json.dumps(
+        {
+            str(id_): {
+                "id": id_,
+                "username": f"user{id_}",
+                "first_name": f"First name {id_}",
+                "last_name": f"Last name {id_}",
+                "email": f"user{id_}@example.com",
+                "group_$_ids": ["1"],
+                "group_$1_ids": [2, 3],
+                "is_active": True,
+                "meta_deleted": False,
+                "meta_position": id_,
+            }
+            for id_ in range(1, number + 1)
+        }
+    ).encode()
+
+
+def measure(call: Callable[[], Any], number: int = 5) -> float:
+    call()  # warm up
+    start = time.perf_counter()
+    for _ in range(number):
+        call()
+    return (time.perf_counter() - start) / number * 1000
+
+
+def benchmark(name: str, payload: bytes) -> None:
+    print(f"{name}: {len(payload) / 1e6:.2f} MB")
+    for level in LEVELS:
+        compressed = gzip.compress(payload, compresslevel=level)
+        compress_time = measure(lambda: gzip.compress(payload, compresslevel=level))
+        decompress_time = measure(lambda: gzip.decompress(compressed))
+        saved = len(payload) - len(compressed)
+        transfer = "   ".join(
+            f"{bandwidth} {saved / bytes_per_second * 1000:.1f} ms"
+            for bandwidth, bytes_per_second in BANDWIDTHS.items()
+        )
+        print(
+            f"  level {level}: {len(compressed) / 1e6:.2f} MB"
+            f" ({len(compressed) / len(payload):.1%})"
+            f"   compress {compress_time:.1f} ms   decompress {decompress_time:.1f} ms"
+            f"   transfer saved: {transfer}"
+        )
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    benchmark(f"write request deleting {number} models", build_write_request(number))
+    benchmark(f"get_all response with {number} users", build_get_all_response(number))
+
+
+if __name__ == "__main__":
+    main()
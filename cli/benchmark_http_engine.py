@@ -0,0 +1,83 @@
+"""
+Compares the per-call latency of the pooled HTTPEngine with plain requests.post
+calls (one new TCP connection per call) against a local stand-in reader.
+
+    PYTHONPATH=. python cli/benchmark_http_engine.py [number_of_calls]
+"""
+
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import mean, median
+from typing import Any, Callable, List
+
+import requests
+
+from openslides_backend.services.datastore import commands
+from openslides_backend.services.datastore.http_engine import HTTPEngine
+from openslides_backend.shared.patterns import Collection, FullQualifiedId
+
+RESPONSE = b'{"id": 1, "name": "meeting", "meta_position": 1, "meta_deleted": false}'
+
+
+class StandInReaderHandler(BaseHTTPRequestHandler):
+    """
+    Answers every POST request like the reader answers a get request.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def measure(name: str, call: Callable[[], Any], number: int) -> List[float]:
+    call()  # warm up
+    latencies = []
+    for _ in range(number):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<24} mean {mean(latencies):.3f} ms   median {median(latencies):.3f} ms"
+        f"   total {sum(latencies):.1f} ms"
+    )
+    return latencies
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInReaderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/internal/datastore/reader"
+
+    command = commands.Get(FullQualifiedId(Collection("meeting"), 1), {"id", "name"})
+    data = command.data
+    headers = {"Content-Type": "application/json"}
+    engine = HTTPEngine(url, url, logging)  # type: ignore
+
+    print(f"{number} get calls against {url}")
+    before = measure(
+        "requests.post",
+        lambda: requests.post(url=f"{url}/get", data=data, headers=headers),
+        number,
+    )
+    after = measure("HTTPEngine (pooled)", lambda: engine.retrieve("get", data), number)
+    print(f"Speedup: {mean(before) / mean(after):.2f}x")
+    engine.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
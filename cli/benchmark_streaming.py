@@ -0,0 +1,78 @@
+"""
+Compares the peak memory of decoding a big get_all response for the get_users
+presenter at once and incrementally with DatastoreAdapter.get_all_stream. The
+response body is prepared in advance and excluded from the measurement, although
+the streaming variant does not have to hold it completely either.
+
+    PYTHONPATH=. python cli/benchmark_streaming.py [number_of_users]
+"""
+
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List
+
+import simplejson as json
+
+from openslides_backend.services.datastore.json_stream import iter_json_items
+
+CHUNK_SIZE = 65536
+
+
+def build_response(number: int) -> bytes:
+    return json.dumps(
+        {
+            str(id_): {
+                "id": id_,
+                "username": f"user{id_}",
+                "first_name": f"First name {id_}",
+                "last_name": f"Last name {id_}",
+                "meeting_id": None if id_ % 10 else 1,
+            }
+            for id_ in range(1, number + 1)
+        }
+    ).encode()
+
+
+def split(content: bytes) -> Iterator[bytes]:
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start : start + CHUNK_SIZE]
+
+
+def measure(name: str, call: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    call()
+    duration = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} peak {peak / 2**20:8.1f} MiB   time {duration:8.1f} ms")
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    content = build_response(number)
+    print(f"get_all response with {number} users, {len(content) / 2**20:.1f} MiB")
+
+    for keyword in ("", "user1"):
+        print(f"Users with keyword {repr(keyword)}:")
+
+        def before() -> List[Dict[str, Any]]:
+            response = json.loads(content)
+            users = list({int(key): value for key, value in response.items()}.values())
+            return [user for user in users if keyword in user["username"]]
+
+        def after() -> List[Dict[str, Any]]:
+            return [
+                user
+                for _, user in iter_json_items(split(content))
+                if keyword in user["username"]
+            ]
+
+        measure("Before", before)
+        measure("Streaming", after)
+
+
+if __name__ == "__main__":
+    main()
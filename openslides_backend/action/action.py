@@ -1,5 +1,16 @@
 from collections import defaultdict
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    cast,
+)
 
 import fastjsonschema
 
@@ -11,7 +22,7 @@ from ..models.fields import (
     BaseTemplateRelationField,
 )
 from ..services.auth.interface import AuthenticationService
-from ..services.datastore.interface import DatastoreService
+from ..services.datastore.interface import DatastoreService, GetManyRequest
 from ..services.media.interface import MediaService
 from ..services.permission.interface import PermissionService
 from ..shared.exceptions import (
@@ -22,8 +33,8 @@ from ..shared.exceptions import (
 from ..shared.interfaces.event import Event, EventType, ListFields
 from ..shared.interfaces.logging import LoggingModule
 from ..shared.interfaces.services import Services
-from ..shared.interfaces.write_request import WriteRequest
-from ..shared.patterns import FullQualifiedField, FullQualifiedId
+from ..shared.interfaces.write_request import LockedFields, WriteRequest
+from ..shared.patterns import KEYSEPARATOR, FullQualifiedField, FullQualifiedId
 from ..shared.typing import ModelMap
 from .relations.relation_manager import RelationManager
 from .relations.typing import FieldUpdateElement, ListUpdateElement
@@ -62,6 +73,13 @@ class BaseAction:  # pragma: no cover
     model: Model
     user_id: int
 
+    def get_prefetch_requests(self, payload: ActionData) -> List[GetManyRequest]:
+        """
+        Returns the models and fields which are read while processing the given
+        payload. Override in subclasses and mixins and extend the result of super().
+        """
+        return []
+
 
 class Action(BaseAction, metaclass=SchemaProvider):
     """
@@ -115,6 +133,7 @@ class Action(BaseAction, metaclass=SchemaProvider):
         if not internal:
             self.check_permissions(payload)
 
+        self.prefetch(payload)
         instances = self.get_updated_instances(payload)
         results: ActionResults = []
         for instance in instances:
@@ -127,10 +146,10 @@ class Action(BaseAction, metaclass=SchemaProvider):
             instance = self.base_update_instance(instance)
 
             relation_updates = self.handle_relation_updates(instance)
-            self.write_requests.extend(relation_updates)
+            self.add_write_requests(relation_updates)
 
             write_request = self.create_write_requests(instance)
-            self.write_requests.extend(write_request)
+            self.add_write_requests(write_request)
 
             result = self.create_action_result_element(instance)
             results.append(result)
@@ -147,6 +166,22 @@ class Action(BaseAction, metaclass=SchemaProvider):
                 f"You are not allowed to perform action {self.name}."
             )
 
+    def prefetch(self, payload: ActionData) -> None:
+        """
+        Loads all models from get_prefetch_requests with one get_many request into
+        the datastore cache, so the single reads during the action are served from
+        memory. Does nothing if the datastore has no cache.
+        """
+        if not self.datastore.use_cache:
+            return
+        get_many_requests = [
+            get_many_request
+            for get_many_request in self.get_prefetch_requests(payload)
+            if get_many_request.ids
+        ]
+        if get_many_requests:
+            self.datastore.get_many(get_many_requests)
+
     @native
     def get_updated_instances(self, payload: ActionData) -> ActionData:
         """
@@ -251,6 +286,16 @@ class Action(BaseAction, metaclass=SchemaProvider):
         """
         raise NotImplementedError
 
+    def add_write_requests(self, write_requests: Iterable[WriteRequest]) -> None:
+        """
+        Appends the given write requests to the ones of this action and applies
+        their events to the pending changes of the datastore, so that all following
+        reads of this request see them.
+        """
+        for write_request in write_requests:
+            self.write_requests.append(write_request)
+            self.datastore.apply_changes(write_request.events)
+
     def create_action_result_element(
         self, instance: Dict[str, Any]
     ) -> Optional[ActionResultElement]:
@@ -270,6 +315,8 @@ class Action(BaseAction, metaclass=SchemaProvider):
         # merge all actual write requests
         write_request = merge_write_requests(self.write_requests)
         if write_request:
+            write_request.events = compact_events(write_request.events)
+
             # sort events: create - update - delete
             events_by_type: Dict[EventType, List[Event]] = defaultdict(list)
             for event in write_request.events:
@@ -279,8 +326,14 @@ class Action(BaseAction, metaclass=SchemaProvider):
                 write_request.events.extend(events_by_type[type])
 
             # Get locked_fields and reset them in datastore
-            write_request.locked_fields = self.datastore.locked_fields
+            locked_fields = self.datastore.locked_fields
+            write_request.locked_fields = compact_locked_fields(locked_fields)
             self.datastore.locked_fields = {}
+            if len(write_request.locked_fields) < len(locked_fields):
+                self.logger.debug(
+                    f"Compacted locked_fields from {len(locked_fields)} to "
+                    f"{len(write_request.locked_fields)} entries."
+                )
         return write_request
 
     def validate_required_fields(self, write_request: WriteRequest) -> None:
@@ -374,8 +427,10 @@ class Action(BaseAction, metaclass=SchemaProvider):
         """
         fqids = self.get_field_value_as_fqid_list(field, instance[instance_field])
         equal_fields = field.equal_fields + additional_equal_fields
-        for fqid in fqids:
-            related_model = self.fetch_model(fqid, equal_fields)
+        related_models = [
+            (fqid, self.fetch_model_deferred(fqid, equal_fields)) for fqid in fqids
+        ]
+        for fqid, related_model in related_models:
             for equal_field_name in equal_fields:
                 if instance.get(equal_field_name) != related_model.get(
                     equal_field_name
@@ -435,6 +490,17 @@ class Action(BaseAction, metaclass=SchemaProvider):
         else:
             return self.datastore.get(fqid, mapped_fields, lock_result=True)
 
+    def fetch_model_deferred(
+        self, fqid: FullQualifiedId, mapped_fields: List[str] = []
+    ) -> Mapping[str, Any]:
+        """
+        Like fetch_model, but instances from the datastore are returned as LazyModel
+        which is fetched together with all other pending instances on first access.
+        """
+        if fqid in self.additional_relation_models:
+            return self.fetch_model(fqid, mapped_fields)
+        return self.datastore.get_deferred(fqid, mapped_fields, lock_result=True)
+
     def execute_other_action(
         self,
         ActionClass: Type["Action"],
@@ -498,3 +564,129 @@ def merge_write_requests(
         )
     else:
         return None
+
+
+def compact_locked_fields(locked_fields: LockedFields) -> LockedFields:
+    """
+    Removes all FQField locks which are subsumed by a lock of their FQId or their
+    CollectionField at the same or a lower position, since the writer rejects every
+    change which conflicts with the FQField lock because of the coarser lock anyway.
+    CollectionField locks with a filter do not subsume other locks. The given dict
+    is not changed.
+    """
+    result: LockedFields = {}
+    for key, lock in locked_fields.items():
+        parts = key.split(KEYSEPARATOR)
+        if len(parts) == 3:
+            fqid = KEYSEPARATOR.join(parts[:2])
+            collection_field = KEYSEPARATOR.join((parts[0], parts[2]))
+            if any(
+                isinstance(locked_fields.get(coarser), int)
+                and isinstance(lock, int)
+                and cast(int, locked_fields[coarser]) <= lock
+                for coarser in (fqid, collection_field)
+            ):
+                continue
+        result[key] = lock
+    return result
+
+
+def compact_events(events: Iterable[Event]) -> List[Event]:
+    """
+    Folds all update events of one model into its create event or into one single
+    update event and drops updates of models which are deleted afterwards. The
+    resulting events lead to the same models in the datastore. The given events are
+    not changed.
+    """
+    result: List[Optional[Event]] = []
+    indices: Dict[FullQualifiedId, List[int]] = defaultdict(list)
+    for event in events:
+        fqid = event["fqid"]
+        target = result[indices[fqid][-1]] if indices[fqid] else None
+        if event["type"] == EventType.Delete:
+            for index in indices.pop(fqid, []):
+                previous = result[index]
+                if previous is not None and previous["type"] == EventType.Update:
+                    result[index] = None
+            result.append(event)
+        elif (
+            event["type"] == EventType.Update
+            and target is not None
+            and can_merge_events(target, event)
+        ):
+            merge_update_event(target, event)
+        else:
+            copy = Event(type=event["type"], fqid=fqid)
+            merge_update_event(copy, event)
+            indices[fqid].append(len(result))
+            result.append(copy)
+    return [event for event in result if event is not None]
+
+
+def can_merge_events(target: Event, event: Event) -> bool:
+    """
+    Checks if the given update event can be merged into the target event. This is
+    not possible if the event adds a value to a list field which is removed by the
+    target or vice versa, since this would change the order of the list. List
+    fields of create events are applied directly, so they can always be merged.
+    """
+    list_fields = get_list_fields(target)
+    event_list_fields = get_list_fields(event)
+    for key, other_key in (("add", "remove"), ("remove", "add")):
+        for field, values in event_list_fields.get(key, {}).items():
+            pending = list_fields.get(other_key, {}).get(field, [])
+            if any(value in pending for value in values):
+                return False
+    return True
+
+
+def merge_update_event(target: Event, event: Event) -> None:
+    """
+    Applies the fields and list_fields of the given update event to the target
+    event. For create events and fields which are set in the target, list_fields
+    are applied to the field values directly.
+    """
+    fields = target.get("fields") or {}
+    list_fields = get_list_fields(target)
+    is_create = target["type"] == EventType.Create
+    for field, value in (event.get("fields") or {}).items():
+        for field_values in list_fields.values():
+            field_values.pop(field, None)
+        if value is None and is_create:
+            fields.pop(field, None)
+        else:
+            fields[field] = value
+    event_list_fields = get_list_fields(event)
+    for field, values in event_list_fields.get("add", {}).items():
+        current = fields.get(field) or []
+        if field in fields or is_create:
+            fields[field] = current + [
+                value for value in values if value not in current
+            ]
+        else:
+            added = list_fields.setdefault("add", {}).setdefault(field, [])
+            added.extend(value for value in values if value not in added)
+    for field, values in event_list_fields.get("remove", {}).items():
+        current = fields.get(field) or []
+        if field in fields or is_create:
+            fields[field] = [value for value in current if value not in values]
+        else:
+            removed = list_fields.setdefault("remove", {}).setdefault(field, [])
+            removed.extend(value for value in values if value not in removed)
+    for key in [key for key, field_values in list_fields.items() if not field_values]:
+        del list_fields[key]
+    if fields or is_create:
+        target["fields"] = fields
+    else:
+        target.pop("fields", None)
+    if list_fields:
+        target["list_fields"] = cast(ListFields, list_fields)
+    else:
+        target.pop("list_fields", None)
+
+
+def get_list_fields(event: Event) -> Dict[str, Dict[str, List[Any]]]:
+    """
+    Returns the list_fields of the event. The keys add and remove may be missing.
+    """
+    return cast(Dict[str, Dict[str, List[Any]]], event.get("list_fields") or {})
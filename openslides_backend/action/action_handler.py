@@ -1,9 +1,10 @@
+import time
 from copy import deepcopy
 from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, cast
 
 import fastjsonschema
 
-from ..shared.env import is_dev_mode
+from ..shared.env import get_retry_budgets, get_retry_delays, get_retry_max, is_dev_mode
 from ..shared.exceptions import (
     ActionException,
     DatastoreLockedException,
@@ -15,6 +16,7 @@ from ..shared.schema import schema_version
 from . import actions  # noqa
 from .relations.relation_manager import RelationManager
 from .util.actions_map import actions_map
+from .util.retry import get_backoff_delay, retry_metrics
 from .util.typing import (
     ActionError,
     ActionResults,
@@ -61,12 +63,10 @@ class ActionHandler(BaseHandler):
     Action handler. It is the concrete implementation of Action interface.
     """
 
-    MAX_RETRY = 3
-
     @classmethod
     def get_health_info(cls) -> Iterable[Tuple[str, Dict[str, Any]]]:
         """
-        Returns name and development status of all actions.
+        Returns name, schema and retry metrics of all actions.
         """
         for name in sorted(actions_map):
             action = actions_map[name]
@@ -76,6 +76,7 @@ class ActionHandler(BaseHandler):
                 schema["maxItems"] = 1
             info = dict(
                 schema=schema,
+                retries=retry_metrics.get(name),
             )
             yield name, info
 
@@ -93,9 +94,24 @@ class ActionHandler(BaseHandler):
         except fastjsonschema.JsonSchemaException as exception:
             raise ActionException(exception.message)
 
+        results: ActionsResponseResults = []
+        try:
+            results = self.execute_actions(payload, atomic)
+        finally:
+            self.log_trace()
+
+        # Return action result
+        self.logger.debug("Request was successful. Send response now.")
+        return ActionsResponse(
+            success=True, message="Actions handled successfully", results=results
+        )
+
+    def execute_actions(self, payload: Payload, atomic: bool) -> ActionsResponseResults:
         results: ActionsResponseResults = []
         if atomic:
-            results = self.execute_write_requests(self.parse_actions, payload)
+            results = self.execute_write_requests(
+                [element["action"] for element in payload], self.parse_actions, payload
+            )
         else:
 
             def transform_to_list(
@@ -106,35 +122,72 @@ class ActionHandler(BaseHandler):
             for element in payload:
                 try:
                     result = self.execute_write_requests(
-                        lambda e: transform_to_list(self.perform_action(e)), element
+                        [element["action"]],
+                        lambda e: transform_to_list(self.perform_action(e)),
+                        element,
                     )
                     results.append(result)
                 except ActionException as exception:
                     error = cast(ActionError, exception.get_json())
                     results.append(error)
-
-        # Return action result
-        self.logger.debug("Request was successful. Send response now.")
-        return ActionsResponse(
-            success=True, message="Actions handled successfully", results=results
-        )
+        return results
 
     def execute_write_requests(
         self,
+        action_names: List[str],
         get_write_requests: Callable[..., Tuple[List[WriteRequest], T]],
         *args: Any,
     ) -> T:
+        """
+        Executes the given actions and writes their write requests. If the datastore
+        rejects them because of locked fields, the actions are executed again after
+        a jittered exponential backoff until the retry budget of the actions is
+        used up. Only the models affected by the locked key are read again.
+        """
+        max_retry = self.get_max_retry(action_names)
+        base_delay, max_delay = get_retry_delays()
         retried = 0
         while True:
             try:
                 write_requests, data = get_write_requests(*args)
+                # Has to be checked before writing, since the client must not get
+                # an error for a write which was committed.
+                self.check_repeated_reads()
                 if write_requests:
                     self.datastore.write(write_requests)
+                if retried:
+                    retry_metrics.add(action_names, "retried_successes")
                 return data
             except DatastoreLockedException as exception:
                 retried += 1
-                if retried > self.MAX_RETRY:
+                if retried > max_retry:
+                    retry_metrics.add(action_names, "exhausted")
+                    self.logger.warning(
+                        f"Giving up after {max_retry} retries of {', '.join(action_names)}: {exception.message}"
+                    )
                     raise ActionException(exception.message)
+                retry_metrics.add(action_names, "retries")
+                delay = get_backoff_delay(retried, base_delay, max_delay)
+                self.logger.debug(
+                    f"Retry {retried} of {max_retry} in {delay:.3f} seconds: {exception.message}"
+                )
+                time.sleep(delay)
+            except Exception:
+                # The pending changes of the failed actions must not be seen by the
+                # following ones.
+                self.datastore.reset_cache()
+                raise
+
+    def get_max_retry(self, action_names: List[str]) -> int:
+        """
+        Returns the highest retry budget of the given actions. Actions without an
+        own budget use the default one.
+        """
+        default = get_retry_max()
+        budgets = get_retry_budgets()
+        return max(
+            (budgets.get(name, default) for name in action_names), default=default
+        )
 
     def parse_actions(
         self, payload: Payload
@@ -177,6 +230,7 @@ class ActionHandler(BaseHandler):
             relation_manager = RelationManager(self.datastore)
 
         self.logger.debug(f"Perform action {action_name}.")
+        self.set_trace_label(action_name)
         action = ActionClass(
             self.services, self.datastore, relation_manager, self.logging
         )
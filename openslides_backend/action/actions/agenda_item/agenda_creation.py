@@ -1,9 +1,11 @@
 from typing import Any, Dict, List, Type
 
 from ....models.models import AgendaItem
+from ....services.datastore.commands import GetManyRequest
 from ....shared.patterns import KEYSEPARATOR, Collection, FullQualifiedId
 from ....shared.schema import optional_id_schema
 from ...action import Action
+from ...util.typing import ActionData
 
 AGENDA_PREFIX = "agenda_"
 
@@ -47,6 +49,16 @@ class CreateActionWithAgendaItemMixin(Action):
     Just call the functions in the corresponding base functions.
     """
 
+    def get_prefetch_requests(self, payload: ActionData) -> List[GetManyRequest]:
+        meeting_ids = {
+            instance["meeting_id"] for instance in payload if "meeting_id" in instance
+        }
+        return super().get_prefetch_requests(payload) + [
+            GetManyRequest(
+                Collection("meeting"), list(meeting_ids), ["agenda_item_creation"]
+            )
+        ]
+
     def check_dependant_action_execution_agenda_item(
         self, instance: Dict[str, Any], CreateActionClass: Type[Action]
     ) -> bool:
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Mapping, Optional
 
 from ....models.models import AgendaItem
 from ....services.datastore.commands import GetManyRequest
@@ -49,7 +49,7 @@ class AgendaItemUpdate(UpdateAction):
             get_many_request = GetManyRequest(
                 self.model.collection,
                 agenda_item["child_ids"],
-                ["type", "is_hidden", "is_internal"],
+                ["type", "is_hidden", "is_internal", "child_ids"],
             )
             gm_result = self.datastore.get_many([get_many_request])
             children = gm_result.get(self.model.collection, {})
@@ -82,20 +82,26 @@ class AgendaItemUpdate(UpdateAction):
         new_instances = []
         agenda_item_ids = [instance["id"] for instance in payload]
         get_many_request = GetManyRequest(
-            self.model.collection, agenda_item_ids, ["parent_id"]
+            self.model.collection, agenda_item_ids, ["parent_id", "child_ids"]
         )
         gm_result = self.datastore.get_many([get_many_request])
         agenda_items = gm_result.get(self.model.collection, {})
+        # request all parents first, so they are fetched together on first access
+        parents: Dict[int, Mapping[str, Any]] = {}
+        for instance in payload:
+            agenda_item = agenda_items[instance["id"]]
+            if instance.get("type") is not None and agenda_item.get("parent_id"):
+                parents[agenda_item["parent_id"]] = self.datastore.get_deferred(
+                    FullQualifiedId(self.model.collection, agenda_item["parent_id"]),
+                    ["is_hidden", "is_internal"],
+                )
         for instance in payload:
             if instance.get("type") is None:
                 new_instances.append(instance)
                 continue
             agenda_item = agenda_items[instance["id"]]
             if agenda_item.get("parent_id"):
-                parent_ai = self.datastore.get(
-                    FullQualifiedId(self.model.collection, agenda_item["parent_id"]),
-                    ["is_hidden", "is_internal"],
-                )
+                parent_ai = parents[agenda_item["parent_id"]]
             else:
                 parent_ai = {"is_hidden": False, "is_internal": False}
             instance["is_hidden"] = self.calc_is_hidden(
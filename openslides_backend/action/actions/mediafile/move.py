@@ -1,7 +1,6 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 from ....models.models import Mediafile
-from ....services.datastore.commands import GetManyRequest
 from ....shared.exceptions import ActionException
 from ....shared.patterns import FullQualifiedId
 from ....shared.schema import id_list_schema
@@ -34,10 +33,7 @@ class MediafileMoveAction(
         },
     )
 
-    def check_is_directory(self, id_: int) -> None:
-        item = self.datastore.get(
-            FullQualifiedId(self.model.collection, id_), ["is_directory"]
-        )
+    def check_is_directory(self, item: Mapping[str, Any]) -> None:
         if not item.get("is_directory"):
             raise ActionException("New parent is not a directory.")
 
@@ -54,20 +50,29 @@ class MediafileMoveAction(
     def prepare_move_data(
         self, parent_id: Optional[int], ids: List[int], meeting_id: int
     ) -> ActionData:
-        get_many_request = GetManyRequest(
-            self.model.collection, ids, ["meeting_id", "access_group_ids"]
-        )
-        gm_result = self.datastore.get_many([get_many_request])
-        db_instances = gm_result.get(self.model.collection, {})
-
+        # The instances and the new parent are fetched together on first access.
+        db_instances = {
+            id_: self.datastore.get_deferred(
+                FullQualifiedId(self.model.collection, id_),
+                ["meeting_id", "access_group_ids", "child_ids"],
+            )
+            for id_ in ids
+        }
         if parent_id is not None:
-            self.check_is_directory(parent_id)
+            parent = self.datastore.get_deferred(
+                FullQualifiedId(self.model.collection, parent_id),
+                [
+                    "is_directory",
+                    "parent_id",
+                    "is_public",
+                    "inherited_access_group_ids",
+                ],
+            )
+            self.check_is_directory(parent)
 
             # Calculate the ancesters of parent
             ancesters = [parent_id]
-            grandparent = self.datastore.get(
-                FullQualifiedId(self.model.collection, parent_id), ["parent_id"]
-            )
+            grandparent: Mapping[str, Any] = parent
             while grandparent.get("parent_id") is not None:
                 gp_parent_id = grandparent["parent_id"]
                 ancesters.append(gp_parent_id)
@@ -81,7 +86,7 @@ class MediafileMoveAction(
                     )
         for id_ in ids:
             if (
-                id_ not in db_instances
+                not db_instances[id_].exists
                 or db_instances[id_].get("meeting_id") != meeting_id
             ):
                 raise ActionException(f"Id {id_} not in db_instances.")
@@ -89,11 +94,6 @@ class MediafileMoveAction(
             instance: Dict[str, Any] = {"id": id_, "parent_id": parent_id}
             access_group_ids = list(db_instances[id_].get("access_group_ids", []))
             if parent_id:
-                parent = self.datastore.get(
-                    FullQualifiedId(self.model.collection, parent_id),
-                    ["is_public", "inherited_access_group_ids"],
-                )
-
                 (
                     instance["is_public"],
                     instance["inherited_access_group_ids"],
@@ -34,12 +34,11 @@ class DeleteAllSpeakersOfAllListsAction(DeleteAction):
         los_ids = []
         for meeting in meetings.values():
             los_ids.extend(meeting.get("list_of_speakers_ids", []))
+        # Huge meetings have many lists of speakers, so they are streamed in chunks.
         get_many_request = GetManyRequest(
             Collection("list_of_speakers"), los_ids, ["speaker_ids"]
         )
-        gm_result = self.datastore.get_many([get_many_request])
-        lists_of_speakers = gm_result.get(Collection("list_of_speakers"), {})
-        for los in lists_of_speakers.values():
+        for _, _, los in self.datastore.get_many_stream([get_many_request]):
             for speaker in los.get("speaker_ids", []):
                 new_payload.append({"id": speaker})
         return new_payload
@@ -1,13 +1,15 @@
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from ....models.models import Motion
+from ....services.datastore.commands import GetManyRequest
 from ....shared.exceptions import ActionException
 from ....shared.patterns import POSITIVE_NUMBER_REGEX, Collection, FullQualifiedId
 from ....shared.schema import id_list_schema, optional_id_schema
 from ...mixins.create_action_with_dependencies import CreateActionWithDependencies
 from ...util.default_schema import DefaultSchema
 from ...util.register import register_action
+from ...util.typing import ActionData
 from ..agenda_item.agenda_creation import (
     CreateActionWithAgendaItemMixin,
     agenda_creation_properties,
@@ -63,6 +65,38 @@ class MotionCreate(
     )
     dependencies = [AgendaItemCreate, ListOfSpeakersCreate]
 
+    def get_prefetch_requests(self, payload: ActionData) -> List[GetManyRequest]:
+        """
+        The default workflow and the forwarding committee depend on other models
+        and are therefore not included.
+        """
+        meeting_ids = set()
+        workflow_ids = set()
+        origin_ids = set()
+        for instance in payload:
+            meeting_ids.add(instance["meeting_id"])
+            if instance.get("workflow_id"):
+                workflow_ids.add(instance["workflow_id"])
+            if instance.get("origin_id"):
+                origin_ids.add(instance["origin_id"])
+        return super().get_prefetch_requests(payload) + [
+            GetManyRequest(
+                Collection("meeting"),
+                list(meeting_ids),
+                [
+                    "motions_default_workflow_id",
+                    "motions_default_amendment_workflow_id",
+                    "motions_default_statute_amendment_workflow_id",
+                    "motions_reason_required",
+                    "committee_id",
+                ],
+            ),
+            GetManyRequest(
+                Collection("motion_workflow"), list(workflow_ids), ["first_state_id"]
+            ),
+            GetManyRequest(Collection("motion"), list(origin_ids), ["meeting_id"]),
+        ]
+
     def update_instance(self, instance: Dict[str, Any]) -> Dict[str, Any]:
         # special check logic
         if instance.get("lead_motion_id"):
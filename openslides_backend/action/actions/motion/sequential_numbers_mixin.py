@@ -6,10 +6,17 @@ from ...generics.create import CreateAction
 class SequentialNumbersMixin(CreateAction):
     def get_sequential_number(self, meeting_id: int) -> int:
         """
-        Creates a sequential number, unique per meeting and returns it
+        Creates a sequential number, unique per meeting and returns it. The numbers
+        of all motions of the meeting are loaded once, so that the numbers of the
+        other new motions of this request are taken into account.
         """
         filter = FilterOperator("meeting_id", "=", meeting_id)
-
+        self.datastore.load_slice(
+            self.model.collection,
+            filter,
+            ["sequential_number"],
+            get_deleted_models=DeletedModelsBehaviour.ALL_MODELS,
+        )
         number = self.datastore.max(
             collection=self.model.collection,
             filter=filter,
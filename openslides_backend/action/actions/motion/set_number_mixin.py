@@ -1,12 +1,43 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
+from ....services.datastore.commands import GetManyRequest
 from ....shared.exceptions import ActionException
 from ....shared.filters import And, FilterOperator
 from ....shared.patterns import Collection, FullQualifiedId
 from ...action import BaseAction
+from ...util.typing import ActionData
 
 
 class SetNumberMixin(BaseAction):
+    def get_prefetch_requests(self, payload: ActionData) -> List[GetManyRequest]:
+        meeting_ids = set()
+        lead_motion_ids = set()
+        category_ids = set()
+        for instance in payload:
+            if instance.get("number") or not instance.get("meeting_id"):
+                continue
+            meeting_ids.add(instance["meeting_id"])
+            if instance.get("lead_motion_id"):
+                lead_motion_ids.add(instance["lead_motion_id"])
+            elif instance.get("category_id"):
+                category_ids.add(instance["category_id"])
+        return super().get_prefetch_requests(payload) + [
+            GetManyRequest(
+                Collection("meeting"),
+                list(meeting_ids),
+                [
+                    "motions_number_type",
+                    "motions_number_min_digits",
+                    "motions_number_with_blank",
+                    "motions_amendments_prefix",
+                ],
+            ),
+            GetManyRequest(Collection("motion"), list(lead_motion_ids), ["number"]),
+            GetManyRequest(
+                Collection("motion_category"), list(category_ids), ["prefix"]
+            ),
+        ]
+
     def set_number(
         self,
         instance: Dict[str, Any],
@@ -22,20 +53,28 @@ class SetNumberMixin(BaseAction):
         """
         # Conditions to stop generate an automatic number.
         if instance.get("number"):
-            if not self._check_if_unique(instance["number"], meeting_id):
+            if not self._check_if_unique(
+                instance["number"], meeting_id, instance["id"]
+            ):
                 raise ActionException("Number is not unique.")
             return
         if existing_number:
             return
-        meeting = self.datastore.get(
+        # The meeting and the state are fetched at once. The motions of the meeting
+        # are only loaded if a number is generated.
+        batch = self.datastore.batch()
+        meeting_request = batch.get(
             FullQualifiedId(Collection("meeting"), meeting_id),
             ["motions_number_type", "motions_number_min_digits"],
         )
-        if meeting.get("motions_number_type") == "manually":
-            return
-        state = self.datastore.get(
+        state_request = batch.get(
             FullQualifiedId(Collection("motion_state"), state_id), ["set_number"]
         )
+        batch.execute()
+        meeting = meeting_request.result
+        if meeting.get("motions_number_type") == "manually":
+            return
+        state = state_request.result
         if not state.get("set_number"):
             return
 
@@ -50,7 +89,7 @@ class SetNumberMixin(BaseAction):
             meeting.get("motions_number_min_digits", 0), "0"
         )
         number = f"{prefix}{number_value_str}"
-        while not self._check_if_unique(number, meeting_id):
+        while not self._check_if_unique(number, meeting_id, instance["id"]):
             number_value += 1
             number_value_str = str(number_value).rjust(
                 meeting.get("motions_number_min_digits", 0), "0"
@@ -98,9 +137,11 @@ class SetNumberMixin(BaseAction):
         meeting = self.datastore.get(
             FullQualifiedId(Collection("meeting"), meeting_id), ["motions_number_type"]
         )
+        self._load_motions(meeting_id)
         if lead_motion_id:
-            filter: Union[And, FilterOperator] = FilterOperator(
-                "lead_motion_id", "=", lead_motion_id
+            filter: Union[And, FilterOperator] = And(
+                FilterOperator("meeting_id", "=", meeting_id),
+                FilterOperator("lead_motion_id", "=", lead_motion_id),
             )
         elif meeting.get("motions_number_type") == "per_category":
             filter = And(
@@ -116,10 +157,23 @@ class SetNumberMixin(BaseAction):
         max_result = 1 if max_result is None else max_result + 1
         return max_result
 
-    def _check_if_unique(self, number: str, meeting_id: int) -> bool:
+    def _check_if_unique(self, number: str, meeting_id: int, motion_id: int) -> bool:
+        self._load_motions(meeting_id)
         filter = And(
             FilterOperator("meeting_id", "=", meeting_id),
             FilterOperator("number", "=", number),
+            FilterOperator("id", "!=", motion_id),
         )
         exists = self.datastore.exists(collection=Collection("motion"), filter=filter)
         return not exists
+
+    def _load_motions(self, meeting_id: int) -> None:
+        """
+        Loads the numbers of all motions of the meeting once, so that the following
+        checks are done locally and include the other new motions of this request.
+        """
+        self.datastore.load_slice(
+            Collection("motion"),
+            FilterOperator("meeting_id", "=", meeting_id),
+            ["number", "number_value", "lead_motion_id", "category_id"],
+        )
@@ -220,12 +220,15 @@ class PollVote(UpdateAction):
     def update_option(
         self, option_id: int, extra_value: str, extra_weight: str
     ) -> None:
-        option = self.datastore.get(
-            FullQualifiedId(Collection("option"), option_id), ["vote_ids"]
-        )
-        vote_ids = option.get("vote_ids", [])
-        gmr = GetManyRequest(Collection("vote"), vote_ids, ["weight", "value"])
-        result = self.datastore.get_many([gmr])
+        # The new vote is added below, so it must not be read from the pending
+        # changes of this request.
+        with self.datastore.without_pending_changes():
+            option = self.datastore.get(
+                FullQualifiedId(Collection("option"), option_id), ["vote_ids"]
+            )
+            vote_ids = option.get("vote_ids", [])
+            gmr = GetManyRequest(Collection("vote"), vote_ids, ["weight", "value"])
+            result = self.datastore.get_many([gmr])
         votes = result.get(Collection("vote"), {})
 
         yes = Decimal("0.000000")
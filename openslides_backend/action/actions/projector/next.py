@@ -33,16 +33,43 @@ class ProjectorNext(UpdateAction):
             )
             if not projector.get("preview_projection_ids"):
                 continue
-            current_projections = []
+            # The projections and the maximum weight are fetched in one request.
+            batch = self.datastore.batch()
+            current_request = None
             if projector.get("current_projection_ids"):
-                gmr = GetManyRequest(
-                    Collection("projection"),
-                    projector["current_projection_ids"],
-                    ["id", "stable"],
+                current_request = batch.get_many(
+                    [
+                        GetManyRequest(
+                            Collection("projection"),
+                            projector["current_projection_ids"],
+                            ["id", "stable"],
+                        )
+                    ]
                 )
-                result = self.datastore.get_many([gmr])
+            max_weight_request = batch.max(
+                Collection("projection"),
+                And(
+                    FilterOperator("meeting_id", "=", projector["meeting_id"]),
+                    FilterOperator("history_projector_id", "=", instance["id"]),
+                ),
+                "weight",
+                "int",
+            )
+            preview_request = batch.get_many(
+                [
+                    GetManyRequest(
+                        Collection("projection"),
+                        projector["preview_projection_ids"],
+                        ["id", "weight"],
+                    )
+                ]
+            )
+            batch.execute()
+
+            current_projections = []
+            if current_request is not None:
                 current_projections = list(
-                    result.get(Collection("projection"), {}).values()
+                    current_request.result.get(Collection("projection"), {}).values()
                 )
             new_current_projection_ids = [
                 projection["id"]
@@ -58,12 +85,14 @@ class ProjectorNext(UpdateAction):
                 projector.get("history_projection_ids", [])
                 + transfer_to_history_projection_ids
             )
+            max_weight = max_weight_request.result
             self.set_weight_to_projection(
                 transfer_to_history_projection_ids,
-                projector["meeting_id"],
-                instance["id"],
+                1 if max_weight is None else max_weight,
+            )
+            new_current_projection_id = self.get_min_preview_projection(
+                list(preview_request.result.get(Collection("projection"), {}).values())
             )
-            new_current_projection_id = self.get_min_preview_projection(projector)
             new_current_projection_ids += [new_current_projection_id]
             new_preview_projection_ids = [
                 id_
@@ -78,20 +107,9 @@ class ProjectorNext(UpdateAction):
     def is_stable(self, value: Dict[str, Any]) -> bool:
         return bool(value.get("stable"))
 
-    def get_max_projection_weight(self, meeting_id: int, projector_id: int) -> int:
-        filter_ = And(
-            FilterOperator("meeting_id", "=", meeting_id),
-            FilterOperator("history_projector_id", "=", projector_id),
-        )
-        maximum = self.datastore.max(Collection("projection"), filter_, "weight", "int")
-        if maximum is None:
-            maximum = 1
-        return maximum
-
     def set_weight_to_projection(
-        self, projection_ids: List[int], meeting_id: int, projector_id: int
+        self, projection_ids: List[int], max_weight: int
     ) -> None:
-        max_weight = self.get_max_projection_weight(meeting_id, projector_id)
         increment = 1
         payload_set_weight = []
         for projection_id in projection_ids:
@@ -101,14 +119,9 @@ class ProjectorNext(UpdateAction):
             increment += 1
         self.execute_other_action(ProjectionSetWeight, payload_set_weight)
 
-    def get_min_preview_projection(self, projector: Dict[str, Any]) -> int:
-        gmr2 = GetManyRequest(
-            Collection("projection"),
-            projector["preview_projection_ids"],
-            ["id", "weight"],
-        )
-        result = self.datastore.get_many([gmr2])
-        preview_projections = list(result.get(Collection("projection"), {}).values())
+    def get_min_preview_projection(
+        self, preview_projections: List[Dict[str, Any]]
+    ) -> int:
         pivot = preview_projections[0]
         for projection in preview_projections:
             if pivot.get("weight", 10000) > projection.get("weight", 10000):
@@ -39,7 +39,9 @@ class SpeakerCreateAction(CreateActionWithInferredMeeting):
 
     def update_instance(self, instance: Dict[str, Any]) -> Dict[str, Any]:
         instance = super().update_instance(instance)
-        weight_max = self._get_max_weight(instance["list_of_speakers_id"])
+        weight_max = self._get_max_weight(
+            instance["list_of_speakers_id"], instance["id"]
+        )
         if weight_max is None:
             instance["weight"] = 1
             return instance
@@ -49,7 +51,7 @@ class SpeakerCreateAction(CreateActionWithInferredMeeting):
             return instance
 
         list_of_speakers_id = instance["list_of_speakers_id"]
-        weight_no_poos_min = self._get_no_poo_min(list_of_speakers_id)
+        weight_no_poos_min = self._get_no_poo_min(list_of_speakers_id, instance["id"])
         if weight_no_poos_min is None:
             instance["weight"] = weight_max + 1
             return instance
@@ -95,18 +97,23 @@ class SpeakerCreateAction(CreateActionWithInferredMeeting):
             list_to_sort.append(speaker["id"])
         return list_to_sort
 
-    def _get_max_weight(self, list_of_speakers_id: int) -> Optional[int]:
+    def _get_max_weight(
+        self, list_of_speakers_id: int, speaker_id: int
+    ) -> Optional[int]:
         return self.datastore.max(
             collection=Collection("speaker"),
             filter=And(
                 FilterOperator("list_of_speakers_id", "=", list_of_speakers_id),
                 FilterOperator("begin_time", "=", None),
+                FilterOperator("id", "!=", speaker_id),
             ),
             field="weight",
             lock_result=True,
         )
 
-    def _get_no_poo_min(self, list_of_speakers_id: int) -> Optional[int]:
+    def _get_no_poo_min(
+        self, list_of_speakers_id: int, speaker_id: int
+    ) -> Optional[int]:
         return self.datastore.min(
             collection=Collection("speaker"),
             filter=And(
@@ -116,6 +123,7 @@ class SpeakerCreateAction(CreateActionWithInferredMeeting):
                     FilterOperator("point_of_order", "=", None),
                 ),
                 FilterOperator("begin_time", "=", None),
+                FilterOperator("id", "!=", speaker_id),
             ),
             field="weight",
             lock_result=True,
@@ -161,15 +169,16 @@ class SpeakerCreateAction(CreateActionWithInferredMeeting):
                     "Only present users can be on the lists of speakers."
                 )
 
-        # Results are necessary, because of getting a lock_result
+        # Results are necessary, because of getting a lock_result. The weights are
+        # loaded too, so that the minimum and maximum weight are calculated locally.
         filter_obj = And(
             FilterOperator("list_of_speakers_id", "=", instance["list_of_speakers_id"]),
             FilterOperator("begin_time", "=", None),
         )
-        speakers = self.datastore.filter(
+        speakers = self.datastore.load_slice(
             collection=Collection("speaker"),
             filter=filter_obj,
-            mapped_fields=["user_id", "point_of_order"],
+            mapped_fields=["user_id", "point_of_order", "weight"],
             lock_result=True,
         )
         for speaker in speakers.values():
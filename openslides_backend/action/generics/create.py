@@ -1,25 +1,43 @@
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from ...shared.interfaces.event import EventType
 from ...shared.interfaces.write_request import WriteRequest
 from ...shared.patterns import FullQualifiedId
 from ..action import Action
-from ..util.typing import ActionResultElement
+from ..util.typing import ActionData, ActionResultElement, ActionResults
 
 
 class CreateAction(Action):
     """
     Generic create action.
+
+    If get_updated_instances is not overridden, there is one instance per payload
+    element, so the ids of all instances are reserved with one request when the
+    first instance is created. Otherwise the number of instances is not known in
+    advance and the ids are reserved one by one, so no reserved id is left unused.
     """
 
+    reserved_ids: List[int]
+    ids_to_reserve: int
+
+    def perform(
+        self, payload: ActionData, user_id: int, internal: bool = False
+    ) -> Tuple[Optional[WriteRequest], ActionResults]:
+        payload = list(payload)
+        self.reserved_ids = []
+        if hasattr(self.get_updated_instances, "_native"):
+            self.ids_to_reserve = len(payload)
+        else:
+            self.ids_to_reserve = 1
+        return super().perform(payload, user_id, internal)
+
     def base_update_instance(self, instance: Dict[str, Any]) -> Dict[str, Any]:
         # Primary instance manipulation for defaults and extra fields.
         instance = self.set_defaults(instance)
         instance = self.validate_fields(instance)
 
         # Fetch new id to have it available in update_instance method
-        new_id = self.datastore.reserve_id(collection=self.model.collection)
-        instance["id"] = new_id
+        instance["id"] = self.get_new_id()
         self.datastore.additional_relation_models[
             FullQualifiedId(self.model.collection, instance["id"])
         ] = instance
@@ -29,6 +47,21 @@ class CreateAction(Action):
 
         return instance
 
+    def get_new_id(self) -> int:
+        """
+        Returns the next reserved id. The first call reserves the ids for all
+        expected instances, the remaining ids are reserved one by one.
+        """
+        if not self.reserved_ids:
+            self.reserved_ids = list(
+                self.datastore.reserve_ids(
+                    collection=self.model.collection,
+                    amount=max(self.ids_to_reserve, 1),
+                )
+            )
+            self.ids_to_reserve = 0
+        return self.reserved_ids.pop(0)
+
     def set_defaults(self, instance: Dict[str, Any]) -> Dict[str, Any]:
         for field in self.model.get_fields():
             if (
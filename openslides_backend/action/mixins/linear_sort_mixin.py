@@ -26,11 +26,13 @@ class LinearSortMixin(BaseAction):
             filter = FilterOperator(filter_str, "=", filter_id)
         db_instances = {
             **add_to_db_instances,
-            **self.datastore.filter(
-                collection=self.model.collection,
-                filter=filter,
-                mapped_fields=["id"],
-                lock_result=True,
+            **dict(
+                self.datastore.filter_stream(
+                    collection=self.model.collection,
+                    filter=filter,
+                    mapped_fields=["id"],
+                    lock_result=True,
+                )
             ),
         }
         valid_instance_ids = []
@@ -36,13 +36,15 @@ class TreeSortMixin(BaseAction):
 
         # Get all item ids to verify, that the user send all ids.
         filter = FilterOperator("meeting_id", "=", meeting_id)
-        db_instances = self.datastore.filter(
-            collection=self.model.collection,
-            filter=filter,
-            mapped_fields=["id"],
-            lock_result=True,
-        )
-        all_model_ids = set(db_instances.keys())
+        all_model_ids = {
+            id_
+            for id_, _ in self.datastore.filter_stream(
+                collection=self.model.collection,
+                filter=filter,
+                mapped_fields=["id"],
+                lock_result=True,
+            )
+        }
 
         # Setup initial node using a fake root node.
         fake_root: Dict[str, Any] = {"id": None, "children": []}
@@ -39,6 +39,21 @@ class RelationManager:
         # id has to be provided to be able to correctly update relations
         assert "id" in instance
 
+        # The relation updates of previous actions of this request are kept in
+        # relation_field_updates and merged with the new ones, so the related models
+        # have to be read without the pending changes.
+        with self.datastore.without_pending_changes():
+            return self.get_relation_updates_without_pending_changes(
+                model, instance, action, additional_relation_models
+            )
+
+    def get_relation_updates_without_pending_changes(
+        self,
+        model: Model,
+        instance: Dict[str, Any],
+        action: str,
+        additional_relation_models: ModelMap,
+    ) -> RelationUpdates:
         self.process_template_fields(model, instance)
 
         relations: RelationUpdates = {}
@@ -4,6 +4,7 @@ from typing import (
     Dict,
     Iterable,
     List,
+    Mapping,
     Optional,
     Sequence,
     Set,
@@ -29,6 +30,7 @@ from ...services.datastore.interface import (
     GetManyRequest,
     PartialModel,
 )
+from ...services.datastore.lazy_model import LazyModel
 from ...shared.exceptions import ActionException, DatastoreException
 from ...shared.patterns import (
     Collection,
@@ -146,6 +148,16 @@ class SingleRelationHandler:
         remove_per_collection = self.partition_by_collection(remove)
         changed_fqids_per_collection = self.partition_by_collection(changed_fqids)
 
+        # request all related models first, so they are fetched together on first access
+        related_models: Dict[FullQualifiedId, Mapping[str, Any]] = {}
+        for collection, fqids in changed_fqids_per_collection.items():
+            if collection in self.field.to:
+                related_name = self.get_related_name(collection)
+                for fqid in fqids:
+                    related_models[fqid] = self.fetch_model_deferred(
+                        fqid, [related_name]
+                    )
+
         final = {}
         for collection in list(add_per_collection.keys()) + list(
             remove_per_collection.keys()
@@ -161,10 +173,9 @@ class SingleRelationHandler:
             # acquire all related models with the related fields
             rels = defaultdict(dict)
             for fqid in changed_fqids_per_collection[collection]:
-                related_model = self.fetch_model(
-                    fqid,
-                    [related_name],
-                )
+                related_model = related_models[fqid]
+                if isinstance(related_model, LazyModel) and not related_model.exists:
+                    related_model = {}
                 # again, we transform everything to lists of fqids
                 rels[fqid][related_name] = self.transform_to_fqids(
                     related_model.get(related_name), self.model.collection
@@ -315,6 +326,21 @@ class SingleRelationHandler:
             except DatastoreException:
                 return {}
 
+    def fetch_model_deferred(
+        self, fqid: FullQualifiedId, mapped_fields: List[str]
+    ) -> Mapping[str, Any]:
+        """
+        Like fetch_model, but models from the datastore are returned as LazyModel
+        which is fetched together with all other pending models on first access.
+        """
+        if fqid in self.additional_relation_models and not isinstance(
+            self.additional_relation_models[fqid], DeletedModel
+        ):
+            return self.fetch_model(fqid, mapped_fields)
+        return self.datastore.get_deferred(
+            fqid, mapped_fields=mapped_fields, lock_result=True
+        )
+
     def relation_diffs(
         self, rel_fqids: List[FullQualifiedId]
     ) -> Tuple[Set[FullQualifiedId], Set[FullQualifiedId]]:
@@ -0,0 +1,41 @@
+import random
+from collections import defaultdict
+from typing import Dict, Iterable
+
+COUNTERS = ("retries", "retried_successes", "exhausted")
+
+
+class RetryMetrics:
+    """
+    Counts per action how often writes were retried because of locked fields, how
+    many requests succeeded after retrying and how many ran out of retries. The
+    counters are kept for the lifetime of the process and are part of the health
+    info.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(COUNTERS, 0)
+        )
+
+    def add(self, action_names: Iterable[str], counter: str) -> None:
+        for name in set(action_names):
+            self.counters[name][counter] += 1
+
+    def get(self, action_name: str) -> Dict[str, int]:
+        return dict(self.counters.get(action_name) or dict.fromkeys(COUNTERS, 0))
+
+    def clear(self) -> None:
+        self.counters.clear()
+
+
+retry_metrics = RetryMetrics()
+
+
+def get_backoff_delay(retried: int, base_delay: float, max_delay: float) -> float:
+    """
+    Returns the delay before the given retry with exponential backoff and full
+    jitter, so that concurrent requests retrying the same locked models do not
+    collide again.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (retried - 1)))
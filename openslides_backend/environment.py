@@ -1,7 +1,10 @@
 import os
+from typing import Dict, List
 
 from mypy_extensions import TypedDict
 
+from .shared.env import is_truthy
+
 Environment = TypedDict(
     "Environment",
     {
@@ -9,6 +12,20 @@ Environment = TypedDict(
         "media_url": str,
         "datastore_reader_url": str,
         "datastore_writer_url": str,
+        "datastore_reader_pool_size": int,
+        "datastore_writer_pool_size": int,
+        "datastore_connect_timeout": float,
+        "datastore_read_timeout": float,
+        "datastore_reader_balancing": str,
+        "datastore_reader_ejection_time": float,
+        "datastore_compression_threshold": int,
+        "datastore_get_many_chunk_size": int,
+        "datastore_get_many_parallelism": int,
+        "datastore_shared_cache_size": int,
+        "datastore_shared_cache_max_staleness": float,
+        "datastore_shared_cache_collections": List[str],
+        "datastore_id_pool_block_sizes": Dict[str, int],
+        "datastore_filter_locks": bool,
     },
 )
 
@@ -29,6 +46,21 @@ DEFAULTS = {
     "DATASTORE_WRITER_HOST": "localhost",
     "DATASTORE_WRITER_PORT": "9011",
     "DATASTORE_WRITER_PATH": "/internal/datastore/writer",
+    "DATASTORE_READER_POOL_SIZE": "10",
+    "DATASTORE_WRITER_POOL_SIZE": "2",
+    "DATASTORE_CONNECT_TIMEOUT": "10",
+    "DATASTORE_READ_TIMEOUT": "60",
+    "DATASTORE_READER_URLS": "",
+    "DATASTORE_READER_BALANCING": "least_outstanding",
+    "DATASTORE_READER_EJECTION_TIME": "30",
+    "DATASTORE_COMPRESSION_THRESHOLD": "0",
+    "DATASTORE_GET_MANY_CHUNK_SIZE": "0",
+    "DATASTORE_GET_MANY_PARALLELISM": "4",
+    "DATASTORE_SHARED_CACHE_SIZE": "10000",
+    "DATASTORE_SHARED_CACHE_MAX_STALENESS": "0",
+    "DATASTORE_SHARED_CACHE_COLLECTIONS": "organisation,meeting,motion_state,motion_workflow,group",
+    "DATASTORE_ID_POOL_BLOCK_SIZES": "",
+    "DATASTORE_FILTER_LOCKS": "off",
 }
 
 
@@ -39,8 +71,35 @@ def get_environment() -> Environment:
     return Environment(
         permission_url=get_endpoint("PERMISSION"),
         media_url=get_endpoint("MEDIA"),
-        datastore_reader_url=get_endpoint("DATASTORE_READER"),
+        datastore_reader_url=get_value("DATASTORE_READER_URLS")
+        or get_endpoint("DATASTORE_READER"),
         datastore_writer_url=get_endpoint("DATASTORE_WRITER"),
+        datastore_reader_pool_size=int(get_value("DATASTORE_READER_POOL_SIZE")),
+        datastore_writer_pool_size=int(get_value("DATASTORE_WRITER_POOL_SIZE")),
+        datastore_connect_timeout=float(get_value("DATASTORE_CONNECT_TIMEOUT")),
+        datastore_read_timeout=float(get_value("DATASTORE_READ_TIMEOUT")),
+        datastore_reader_balancing=get_value("DATASTORE_READER_BALANCING"),
+        datastore_reader_ejection_time=float(
+            get_value("DATASTORE_READER_EJECTION_TIME")
+        ),
+        datastore_compression_threshold=int(
+            get_value("DATASTORE_COMPRESSION_THRESHOLD")
+        ),
+        datastore_get_many_chunk_size=int(get_value("DATASTORE_GET_MANY_CHUNK_SIZE")),
+        datastore_get_many_parallelism=int(get_value("DATASTORE_GET_MANY_PARALLELISM")),
+        datastore_shared_cache_size=int(get_value("DATASTORE_SHARED_CACHE_SIZE")),
+        datastore_shared_cache_max_staleness=float(
+            get_value("DATASTORE_SHARED_CACHE_MAX_STALENESS")
+        ),
+        datastore_shared_cache_collections=[
+            collection.strip()
+            for collection in get_value("DATASTORE_SHARED_CACHE_COLLECTIONS").split(",")
+            if collection.strip()
+        ],
+        datastore_id_pool_block_sizes=get_block_sizes(
+            get_value("DATASTORE_ID_POOL_BLOCK_SIZES")
+        ),
+        datastore_filter_locks=is_truthy(get_value("DATASTORE_FILTER_LOCKS")),
     )
 
 
@@ -48,12 +107,31 @@ def get_endpoint(service: str) -> str:
     parts = {}
     for suffix in ("PROTOCOL", "HOST", "PORT", "PATH"):
         variable = "_".join((service, suffix))
-        value = os.environ.get(variable)
-        if value is None:
-            default = DEFAULTS.get(variable)
-            if default is None:
-                raise ValueError(f"Environment variable {variable} does not exist.")
-            parts[suffix] = default
-        else:
-            parts[suffix] = value
+        parts[suffix] = get_value(variable)
     return f"{parts['PROTOCOL']}://{parts['HOST']}:{parts['PORT']}{parts['PATH']}"
+
+
+def get_block_sizes(value: str) -> Dict[str, int]:
+    """
+    Parses a comma separated list of collection:block_size pairs.
+    """
+    block_sizes = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        collection, _, size = item.partition(":")
+        try:
+            block_sizes[collection.strip()] = int(size)
+        except ValueError:
+            raise ValueError(f"Invalid id pool block size: {item.strip()}")
+    return block_sizes
+
+
+def get_value(variable: str) -> str:
+    value = os.environ.get(variable)
+    if value is None:
+        default = DEFAULTS.get(variable)
+        if default is None:
+            raise ValueError(f"Environment variable {variable} does not exist.")
+        return default
+    return value
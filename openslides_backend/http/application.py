@@ -85,6 +85,7 @@ class OpenSlidesBackendWSGIApplication:
             f"All done. Application sends HTTP 200 with body {response_body}."
         )
         response = Response(json.dumps(response_body), content_type="application/json")
+        response.headers.extend(view_instance.response_headers)
         if access_token is not None:
             response.headers[HEADER_NAME] = access_token
         return response
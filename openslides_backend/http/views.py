@@ -3,6 +3,8 @@ from typing import Any, Dict, Optional, Tuple
 from ..action.action_handler import ActionHandler
 from ..presenter import Payload as PresenterPayload
 from ..presenter.presenter import PresenterHandler
+from ..services.datastore.trace import TRACE_HEADER
+from ..shared.handlers.base_handler import BaseHandler
 from ..shared.interfaces.logging import LoggingModule
 from ..shared.interfaces.services import Services
 from ..shared.interfaces.wsgi import Headers, ResponseBody, View
@@ -20,6 +22,16 @@ class BaseView(View):
         self.services = services
         self.logging = logging
         self.logger = logging.getLogger(__name__)
+        self.response_headers: Dict[str, str] = {}
+
+    def add_trace_header(self, handler: BaseHandler) -> None:
+        """
+        Adds the summary of the datastore commands of the request to the response
+        headers if they were recorded.
+        """
+        trace = handler.datastore.trace
+        if trace is not None:
+            self.response_headers[TRACE_HEADER] = trace.format_summary()
 
     def get_user_id_from_headers(
         self, headers: Headers, cookies: Dict
@@ -60,6 +72,7 @@ class ActionView(BaseView):
         handler = ActionHandler(logging=self.logging, services=self.services)
         is_atomic = not request.environ["RAW_URI"].endswith("handle_separately")
         response = handler.handle_request(request.json, user_id, is_atomic)
+        self.add_trace_header(handler)
 
         self.logger.debug("Action request finished successfully.")
         return response, access_token
@@ -68,7 +81,13 @@ class ActionView(BaseView):
         """
         Returns some status information. HTTP method is ignored.
         """
-        return dict(actions=dict(ActionHandler.get_health_info()))
+        health_info: Dict[str, Any] = dict(
+            actions=dict(ActionHandler.get_health_info())
+        )
+        shared_cache_metrics = self.services.datastore().get_shared_cache_metrics()
+        if shared_cache_metrics is not None:
+            health_info["shared_cache"] = shared_cache_metrics
+        return health_info
 
 
 class PresenterView(BaseView):
@@ -99,6 +118,7 @@ class PresenterView(BaseView):
             services=self.services,
         )
         presenter_response = handler.handle_request(payload, user_id)
+        self.add_trace_header(handler)
 
         # Finish request.
         self.logger.debug("Presenter request finished successfully. Send response now.")
@@ -1,10 +1,11 @@
-from operator import itemgetter
-from typing import Any, Dict, List
+from typing import Any, List, Optional
 
 import fastjsonschema
 
-from ..services.datastore.deleted_models_behaviour import DeletedModelsBehaviour
+from ..services.datastore.commands import OrderBy
+from ..services.datastore.ordering import ASCENDING, DESCENDING
 from ..shared.exceptions import PresenterException
+from ..shared.filters import And, Filter, FilterOperator, Or, contains
 from ..shared.patterns import Collection
 from ..shared.schema import schema_version
 from .base import BasePresenter
@@ -61,12 +62,24 @@ class GetUsers(BasePresenter):
     schema = get_users_schema
 
     def get_result(self) -> Any:
+        """
+        The users are filtered by the datastore. With the datastore reader, sorting
+        and pagination are done by the datastore adapter, which keeps only the
+        requested page of users in memory (see DatastoreAdapter.query).
+        """
         criteria = self.get_and_check_criteria()
-        users = self.get_all_users(criteria)
-        users = self.filter_temp_users(users)
-        users = self.filter_keyword(users)
-        users = self.sort_users(users, criteria)
-        users = self.paginate_users(users)
+        direction = DESCENDING if self.data.get("reverse", False) else ASCENDING
+        # Sort by id last to get a stable order of users with equal values.
+        order_by = [OrderBy(crit, direction, ALLOWED[crit]) for crit in criteria]
+        order_by.append(OrderBy("id"))
+        users = self.datastore.query(
+            Collection("user"),
+            self.get_filter(),
+            ["id"],
+            order_by,
+            limit=self.data.get("entries", 100),
+            offset=self.data.get("start_index", 0),
+        )
         return {"users": [user["id"] for user in users]}
 
     def get_and_check_criteria(self) -> List[str]:
@@ -78,52 +91,19 @@ class GetUsers(BasePresenter):
             raise PresenterException(f"Sort criteria '{not_allowed}' are not allowed")
         return criteria
 
-    def get_all_users(self, criteria: List[str]) -> List[Dict[str, Any]]:
-        fields = criteria[:]
-        for name in ("username", "first_name", "last_name", "id", "meeting_id"):
-            if name not in fields:
-                fields.append(name)
-
-        return list(
-            self.datastore.get_all(
-                Collection("user"),
-                fields,
-                DeletedModelsBehaviour.NO_DELETED,
-            ).values()
-        )
-
-    def filter_temp_users(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def get_filter(self) -> Optional[Filter]:
+        filters: List[Filter] = []
         if not self.data.get("include_temporary", False):
-            users = [user for user in users if user.get("meeting_id") is None]
-        return users
-
-    def _check_name(self, user: Dict[str, Any], name: str) -> bool:
-        return user.get(name) is not None and self.data["filter"] in user[name]
-
-    def filter_keyword(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            filters.append(FilterOperator("meeting_id", "=", None))
         if self.data.get("filter"):
-            users = [
-                user
-                for user in users
-                if self._check_name(user, "username")
-                or self._check_name(user, "first_name")
-                or self._check_name(user, "last_name")
-            ]
-        return users
-
-    def sort_users(
-        self, users: List[Dict[str, Any]], criteria: List[str]
-    ) -> List[Dict[str, Any]]:
-        for user in users:
-            for crit in criteria:
-                if user.get(crit) is None:
-                    user[crit] = ALLOWED[crit]
-
-        users.sort(key=itemgetter(*criteria), reverse=self.data.get("reverse", False))
-        return users
-
-    def paginate_users(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        start_index = self.data.get("start_index", 0)
-        end_index = start_index + self.data.get("entries", 100)
-        users = users[start_index:end_index]
-        return users
+            filters.append(
+                Or(
+                    *(
+                        contains(name, self.data["filter"])
+                        for name in ("username", "first_name", "last_name")
+                    )
+                )
+            )
+        if not filters:
+            return None
+        return And(*filters)
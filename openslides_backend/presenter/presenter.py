@@ -70,7 +70,11 @@ class PresenterHandler(BaseHandler):
             raise PresenterException(exception.message)
 
         # Parse presentations and creates response
-        response = self.parse_presenters(payload)
+        try:
+            response = self.parse_presenters(payload)
+        finally:
+            self.log_trace()
+        self.check_repeated_reads()
         self.logger.debug("Request was successful. Send response now.")
         return response
 
@@ -95,6 +99,7 @@ class PresenterHandler(BaseHandler):
         for presenter_blob in payload:
             PresenterClass = presenters_map.get(presenter_blob["presenter"])
             if PresenterClass is not None:
+                self.set_trace_label(presenter_blob["presenter"])
                 presenter_instance = PresenterClass(
                     presenter_blob.get("data"),
                     self.services,
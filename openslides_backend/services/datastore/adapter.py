@@ -1,13 +1,46 @@
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from logging import DEBUG
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 import simplejson as json
 from simplejson.errors import JSONDecodeError
 
 from ...shared.exceptions import DatastoreException, DatastoreLockedException
-from ...shared.filters import And, Filter, FilterOperator, filter_visitor
+from ...shared.filters import (
+    And,
+    Filter,
+    FilterOperator,
+    filter_visitor,
+    get_conjuncts,
+    get_fields,
+    matches,
+)
+from ...shared.interfaces.event import Event
 from ...shared.interfaces.logging import LoggingModule
-from ...shared.interfaces.write_request import WriteRequest
+from ...shared.interfaces.write_request import (
+    CollectionFieldLock,
+    LockedFields,
+    WriteRequest,
+)
 from ...shared.patterns import (
+    KEYSEPARATOR,
     Collection,
     CollectionField,
     FullQualifiedField,
@@ -15,30 +48,119 @@ from ...shared.patterns import (
 )
 from ...shared.typing import DeletedModel, ModelMap
 from . import commands
+from .batch import BatchRequest, ReaderBatch
+from .cache import ModelCache
 from .deleted_models_behaviour import (
     DeletedModelsBehaviour,
     InstanceAdditionalBehaviour,
 )
-from .http_engine import HTTPEngine as Engine
-from .interface import DatastoreService, PartialModel
+from .filter_slice import FilterSlice
+from .id_pool import IdPool
+from .interface import DatastoreService, Engine, PartialModel
+from .json_stream import iter_json_items
+from .lazy_model import LazyModel
+from .ordering import order_models
+from .pending_changes import PendingChanges
+from .shared_cache import SharedModelCache
+from .trace import DatastoreTrace
 
 # TODO: Use proper typing here.
 DatastoreResponse = Any
 
 
+def normalize_fqid(fqid: FullQualifiedId) -> FullQualifiedId:
+    """
+    Returns the FQId with an int id. Results, the cache and the placeholders of
+    get_deferred are keyed by int ids, but some actions build FQIds with str ids.
+    """
+    if isinstance(fqid.id, int):
+        return fqid
+    return FullQualifiedId(fqid.collection, int(fqid.id))
+
+
 class DatastoreAdapter(DatastoreService):
     """
     Adapter to connect to readable and writeable datastore.
+
+    If get_many_chunk_size is set, get_many requests with more ids are split into
+    chunks which are fetched concurrently by up to get_many_parallelism threads.
+
+    If a shared_cache is given, models which are missing in the request-scoped cache
+    are looked up there before they are fetched from the datastore.
+
+    If filter_locks is enabled, the CollectionFields locked by filter, min and max
+    requests are sent together with the filter, so that the writer only rejects
+    changes of models matching it. The writer has to support such locks.
+
+    If an id_pool is given, ids of its collections are reserved from this pool.
+
+    Results of load_slice are kept like the cache. The exists, count, min and max
+    requests are answered from them if possible, including the pending
+    additional_relation_models.
+
+    Events applied with apply_changes are kept until the next write. The get,
+    get_many, filter, load_slice, exists, count, min and max requests for the
+    current state return the models with these changes, so every read of a request
+    sees the changes of the previous actions.
     """
 
     # The key of this dictionary is a stringified FullQualifiedId or FullQualifiedField or CollectionField
-    locked_fields: Dict[str, int]
+    locked_fields: LockedFields
+
+    # If enabled, get and get_many requests are served from a request-scoped cache.
+    use_cache: bool
 
-    def __init__(self, engine: Engine, logging: LoggingModule) -> None:
+    # If enabled, the current position reported by the first filter, exists, count,
+    # min or max response is pinned and all following get and get_many requests
+    # read the datastore at this position.
+    pin_position: bool
+    pinned_position: Optional[int]
+
+    # If set, every command sent to the datastore is recorded.
+    trace: Optional[DatastoreTrace]
+
+    # Results of filter requests loaded with load_slice.
+    slices: List[FilterSlice]
+
+    # The ids reserved during this request. Pending models with these ids are new.
+    new_ids: Dict[Collection, Set[int]]
+
+    # The events of this request which are not written yet.
+    pending_changes: PendingChanges
+
+    # If disabled, reads return the datastore state without the pending changes.
+    # Use without_pending_changes to disable it temporarily.
+    use_pending_changes: bool
+
+    def __init__(
+        self,
+        engine: Engine,
+        logging: LoggingModule,
+        get_many_chunk_size: int = None,
+        get_many_parallelism: int = None,
+        shared_cache: SharedModelCache = None,
+        id_pool: IdPool = None,
+        filter_locks: bool = False,
+    ) -> None:
         self.logger = logging.getLogger(__name__)
         self.engine = engine
+        self.filter_locks = filter_locks
+        self.get_many_chunk_size = get_many_chunk_size or 0
+        self.get_many_parallelism = get_many_parallelism or 1
         self.locked_fields = {}
         self.additional_relation_models: ModelMap = {}
+        self.use_cache = False
+        self.pin_position = False
+        self.pinned_position = None
+        self.cache = ModelCache()
+        self.shared_cache = shared_cache
+        self.id_pool = id_pool
+        self.deferred: List[LazyModel] = []
+        self.trace = None
+        self.slices = []
+        self.new_ids = defaultdict(set)
+        self.pending_changes = PendingChanges()
+        self.use_pending_changes = True
 
     def retrieve(self, command: commands.Command) -> DatastoreResponse:
         """
@@ -46,7 +168,82 @@ class DatastoreAdapter(DatastoreService):
 
         This method also checks the payload and decodes JSON body.
         """
-        content, status_code = self.engine.retrieve(command.name, command.data)
+        # Debug messages may contain the whole request or response, so they are
+        # only formatted if they are logged at all.
+        data = command.data
+        log_debug = self.logger.isEnabledFor(DEBUG)
+        if log_debug:
+            self.logger.debug(
+                f"Start {command.name.upper()} request to datastore with the "
+                f"following data: {data.decode() if data is not None else None}"
+            )
+        start = time.perf_counter()
+        content, status_code = self.engine.retrieve(command.name, data)
+        if self.trace is not None:
+            latency = (time.perf_counter() - start) * 1000
+            self.trace.record(command, len(content), latency)
+        return self.decode_response(content, status_code, log_debug)
+
+    def retrieve_stream(
+        self, command: commands.Command, expand: Sequence[str] = ()
+    ) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """
+        Like retrieve, but decodes the response incrementally while it is received.
+        Yields the items of the response object, see iter_json_items.
+        """
+        data = command.data
+        log_debug = self.logger.isEnabledFor(DEBUG)
+        if log_debug:
+            self.logger.debug(
+                f"Start streamed {command.name.upper()} request to datastore with the "
+                f"following data: {data.decode() if data is not None else None}"
+            )
+        start = time.perf_counter()
+        chunks, status_code = self.engine.stream(command.name, data)
+        if self.trace is not None:
+            chunks = self.trace_stream(command, chunks, start)
+        if status_code >= 400:
+            self.decode_response(b"".join(chunks), status_code, log_debug)
+        if log_debug:
+            self.logger.debug(f"Get streamed response with status code {status_code}")
+        try:
+            yield from iter_json_items(chunks, expand)
+        except JSONDecodeError as e:
+            raise DatastoreException(
+                f"Bad response from datastore service. Body does not contain valid JSON. Error: {e}"
+            )
+        finally:
+            # Releases the connection if the caller stops before the end.
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def trace_stream(
+        self, command: commands.Command, chunks: Iterator[bytes], start: float
+    ) -> Iterator[bytes]:
+        """
+        Records the command when the stream is consumed or closed.
+        """
+        bytes_in = 0
+        try:
+            for chunk in chunks:
+                bytes_in += len(chunk)
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            if self.trace is not None:
+                latency = (time.perf_counter() - start) * 1000
+                self.trace.record(command, bytes_in, latency)
+
+    def decode_response(
+        self, content: bytes, status_code: int, log_debug: bool
+    ) -> DatastoreResponse:
+        """
+        Decodes the JSON body of the response and raises a DatastoreException if
+        the datastore sent an error.
+        """
         if len(content):
             try:
                 payload = json.loads(content)
@@ -55,7 +252,8 @@ class DatastoreAdapter(DatastoreService):
                 raise DatastoreException(error_message)
         else:
             payload = None
-        self.logger.debug(f"Get response with status code {status_code}: {payload}")
+        if log_debug:
+            self.logger.debug(f"Get response with status code {status_code}: {payload}")
         if status_code >= 400:
             error_message = f"Datastore service sends HTTP {status_code}."
             additional_error_message = (
@@ -64,13 +262,15 @@ class DatastoreAdapter(DatastoreService):
             if additional_error_message is not None:
                 type_verbose = additional_error_message.get("type_verbose")
                 if type_verbose == "MODEL_LOCKED":
+                    key = additional_error_message.get("key")
                     raise DatastoreLockedException(
                         " ".join(
                             (
                                 error_message,
-                                f"Model '{additional_error_message.get('key')}' raises {type_verbose} error.",
+                                f"Model '{key}' raises {type_verbose} error.",
                             )
-                        )
+                        ),
+                        key,
                     )
                 elif type_verbose == "MODEL_DOES_NOT_EXIST":
                     error_message = " ".join(
@@ -94,7 +294,51 @@ class DatastoreAdapter(DatastoreService):
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
     ) -> PartialModel:
-        mapped_fields_set = set()
+        fqid = normalize_fqid(fqid)
+        reads_pending = self.reads_pending_changes(position, get_deleted_models)
+        if reads_pending and self.pending_changes.is_local(fqid):
+            return self.get_local(fqid, mapped_fields)
+        if self.is_cacheable(position, get_deleted_models):
+            response = self.get_cached(fqid, mapped_fields, lock_result)
+        else:
+            response = self.get_uncached(
+                fqid, mapped_fields, position, get_deleted_models, lock_result
+            )
+        if lock_result:
+            instance_position = response.get("meta_position")
+            if instance_position is None:
+                raise DatastoreException(
+                    "Response from datastore does not contain field 'meta_position' but this is required."
+                )
+            self.update_locked_fields(fqid, instance_position)
+        if reads_pending:
+            pending_model = self.pending_changes.get(fqid)
+            if pending_model is not None:
+                response = pending_model.apply(response, mapped_fields or None)
+        return response
+
+    def get_local(
+        self, fqid: FullQualifiedId, mapped_fields: Optional[List[str]]
+    ) -> PartialModel:
+        """
+        Returns a model which was created or deleted during this request. Such
+        models are not read from the datastore and are never locked.
+        """
+        pending_model = self.pending_changes.get(fqid)
+        assert pending_model is not None
+        if pending_model.deleted:
+            raise DatastoreException(f"Model '{fqid}' does not exist.")
+        return pending_model.apply({}, mapped_fields or None)
+
+    def get_uncached(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[Iterable[str]],
+        position: Optional[int],
+        get_deleted_models: DeletedModelsBehaviour,
+        lock_result: bool,
+    ) -> PartialModel:
+        mapped_fields_set: Set[str] = set()
         if mapped_fields:
             mapped_fields_set.update(mapped_fields)
             if lock_result:
@@ -102,21 +346,43 @@ class DatastoreAdapter(DatastoreService):
         command = commands.Get(
             fqid=fqid,
             mapped_fields=mapped_fields_set,
-            position=position,
+            position=self.get_read_position(position),
             get_deleted_models=get_deleted_models,
         )
-        self.logger.debug(
-            f"Start GET request to datastore with the following data: {command.data}"
-        )
-        response = self.retrieve(command)
-        if lock_result:
-            instance_position = response.get("meta_position")
-            if instance_position is None:
-                raise DatastoreException(
-                    "Response from datastore does not contain field 'meta_position' but this is required."
+        return self.retrieve(command)
+
+    def get_cached(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[List[str]],
+        lock_result: bool,
+    ) -> PartialModel:
+        """
+        Serves the get request from the cache and fetches only missing fields from
+        the datastore.
+        """
+        fields = self.get_cache_fields(mapped_fields, lock_result)
+        model, missing_fields = self.cache.get(fqid, fields)
+        if model is None:
+            fetch_fields = self.get_cache_fields(missing_fields, True)
+            response = self.get_shared_cached(fqid, fetch_fields)
+            if response is None:
+                response = self.get_uncached(
+                    fqid, fetch_fields, None, DeletedModelsBehaviour.NO_DELETED, False
                 )
-            self.update_locked_fields(fqid, instance_position)
-        return response
+                self.update_shared_cache(fqid, fetch_fields, response)
+            if not self.cache.update(fqid, fetch_fields, response):
+                # The model has changed since we cached it, so we have to fetch all
+                # requested fields again.
+                fetch_fields = self.get_cache_fields(fields, True)
+                response = self.get_uncached(
+                    fqid, fetch_fields, None, DeletedModelsBehaviour.NO_DELETED, False
+                )
+                self.cache.update(fqid, fetch_fields, response)
+                self.update_shared_cache(fqid, fetch_fields, response)
+            model, _ = self.cache.get(fqid, fields)
+            assert model is not None
+        return model
 
     def get_many(
         self,
@@ -135,23 +401,38 @@ class DatastoreAdapter(DatastoreService):
                 if get_many_request.mapped_fields is not None:
                     get_many_request.mapped_fields.add("meta_position")
 
-        command = commands.GetMany(
-            get_many_requests=get_many_requests,
-            mapped_fields=mapped_fields,
-            position=position,
-            get_deleted_models=get_deleted_models,
-        )
-        self.logger.debug(
-            f"Start GET_MANY request to datastore with the following data: {command.data}"
-        )
-        response = self.retrieve(command)
-        result = {}
-        for collection_str in response.keys():
-            inner_result = {}
-            collection = Collection(collection_str)
-            for id_str, value in response[collection_str].items():
-                instance_id = int(id_str)
-                if lock_result:
+        get_many_requests = [
+            commands.GetManyRequest(
+                request.collection,
+                [int(id) for id in request.ids],
+                request.mapped_fields,
+            )
+            for request in get_many_requests
+        ]
+        reads_pending = self.reads_pending_changes(position, get_deleted_models)
+        read_requests = get_many_requests
+        if reads_pending:
+            read_requests = [
+                commands.GetManyRequest(
+                    request.collection,
+                    [
+                        id
+                        for id in request.ids
+                        if not self.pending_changes.is_local(
+                            FullQualifiedId(request.collection, id)
+                        )
+                    ],
+                    request.mapped_fields,
+                )
+                for request in get_many_requests
+            ]
+        if self.is_cacheable(position, get_deleted_models):
+            result = self.get_many_cached(read_requests)
+        else:
+            result = self.get_many_uncached(read_requests, position, get_deleted_models)
+        if lock_result:
+            for collection, models in result.items():
+                for instance_id, value in models.items():
                     instance_position = value.get("meta_position")
                     if instance_position is None:
                         raise DatastoreException(
@@ -159,10 +440,388 @@ class DatastoreAdapter(DatastoreService):
                         )
                     fqid = FullQualifiedId(collection, instance_id)
                     self.update_locked_fields(fqid, instance_position)
-                inner_result[instance_id] = value
-            result[collection] = inner_result
+        if reads_pending:
+            self.apply_pending_changes(get_many_requests, result)
+        return result
+
+    def reads_pending_changes(
+        self, position: Optional[int], get_deleted_models: DeletedModelsBehaviour
+    ) -> bool:
+        """
+        Only reads of the current state without deleted models see pending changes.
+        """
+        return (
+            self.use_pending_changes
+            and bool(self.pending_changes)
+            and position is None
+            and get_deleted_models == DeletedModelsBehaviour.NO_DELETED
+        )
+
+    def apply_pending_changes(
+        self,
+        get_many_requests: List[commands.GetManyRequest],
+        result: Dict[Collection, Dict[int, PartialModel]],
+    ) -> None:
+        """
+        Applies the pending changes to the result of the given get_many requests.
+        Models created during this request are added, deleted ones are removed.
+        """
+        for get_many_request in get_many_requests:
+            models = result.setdefault(get_many_request.collection, {})
+            mapped_fields = get_many_request.mapped_fields or None
+            for id in get_many_request.ids:
+                pending_model = self.pending_changes.get(
+                    FullQualifiedId(get_many_request.collection, id)
+                )
+                if pending_model is None:
+                    continue
+                if pending_model.deleted:
+                    models.pop(id, None)
+                elif pending_model.created:
+                    models[id] = pending_model.apply({}, mapped_fields)
+                elif id in models:
+                    models[id] = pending_model.apply(models[id], mapped_fields)
+
+    def get_many_uncached(
+        self,
+        get_many_requests: List[commands.GetManyRequest],
+        position: Optional[int],
+        get_deleted_models: DeletedModelsBehaviour,
+    ) -> Dict[Collection, Dict[int, PartialModel]]:
+        position = self.get_read_position(position)
+        chunks = self.split_get_many_requests(
+            commands.merge_get_many_requests(get_many_requests)
+        )
+        get_many_commands = [
+            commands.GetMany(
+                get_many_requests=chunk,
+                position=position,
+                get_deleted_models=get_deleted_models,
+            )
+            for chunk in chunks
+        ]
+        if len(get_many_commands) == 1:
+            responses: Iterable[DatastoreResponse] = [
+                self.retrieve(get_many_commands[0])
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.get_many_parallelism, len(get_many_commands))
+            ) as executor:
+                responses = list(executor.map(self.retrieve, get_many_commands))
+
+        return self.decode_get_many_response(responses)
+
+    def get_many_stream(
+        self,
+        get_many_requests: List[commands.GetManyRequest],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> Iterator[Tuple[Collection, int, PartialModel]]:
+        """
+        Like get_many, but yields the models one by one. The chunks of
+        get_many_chunk_size ids are requested one after another and their responses
+        are decoded while they are received, so only one chunk is held in memory.
+        The cache and the pending changes are not used, but a pinned position is.
+        """
+        position = self.get_read_position(None)
+        chunks = self.split_get_many_requests(
+            commands.merge_get_many_requests(get_many_requests)
+        )
+        for chunk in chunks:
+            command = commands.GetMany(
+                get_many_requests=chunk,
+                position=position,
+                get_deleted_models=get_deleted_models,
+            )
+            collections = [str(request.collection) for request in chunk]
+            for path, value in self.retrieve_stream(command, collections):
+                if len(path) == 2:
+                    yield Collection(path[0]), int(path[1]), value
+
+    def decode_get_many_response(
+        self, responses: Iterable[DatastoreResponse]
+    ) -> Dict[Collection, Dict[int, PartialModel]]:
+        result: Dict[Collection, Dict[int, PartialModel]] = {}
+        for response in responses:
+            for collection_str in response.keys():
+                inner_result = result.setdefault(Collection(collection_str), {})
+                for id_str, value in response[collection_str].items():
+                    inner_result[int(id_str)] = value
         return result
 
+    def split_get_many_requests(
+        self, get_many_requests: List[commands.GetManyRequest]
+    ) -> List[List[commands.GetManyRequest]]:
+        """
+        Splits the given requests into chunks with at most get_many_chunk_size ids.
+        Returns a single chunk with the unchanged requests if splitting is disabled
+        or not necessary.
+        """
+        chunk_size = self.get_many_chunk_size
+        if (
+            chunk_size <= 0
+            or sum(len(request.ids) for request in get_many_requests) <= chunk_size
+        ):
+            return [get_many_requests]
+        chunks: List[List[commands.GetManyRequest]] = []
+        chunk: List[commands.GetManyRequest] = []
+        chunk_ids = 0
+        for request in get_many_requests:
+            start = 0
+            while start < len(request.ids):
+                if chunk_ids == chunk_size:
+                    chunks.append(chunk)
+                    chunk = []
+                    chunk_ids = 0
+                ids = request.ids[start : start + chunk_size - chunk_ids]
+                chunk.append(
+                    commands.GetManyRequest(
+                        request.collection, ids, request.mapped_fields
+                    )
+                )
+                chunk_ids += len(ids)
+                start += len(ids)
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def get_many_cached(
+        self, get_many_requests: List[commands.GetManyRequest]
+    ) -> Dict[Collection, Dict[int, PartialModel]]:
+        """
+        Serves the get_many request from the cache. All missing fields of all
+        requested models are fetched from the datastore in one request. Models whose
+        cached fields turn out to be outdated are fetched again in a second request.
+        """
+        requested = self.get_requested_fields(get_many_requests)
+        not_found: Set[FullQualifiedId] = set()
+        for refetch_all in (False, True):
+            fetch = self.get_missing_fields(requested, not_found, refetch_all)
+            if not fetch:
+                break
+            response = self.get_many_uncached(
+                self.get_fetch_requests(fetch),
+                None,
+                DeletedModelsBehaviour.NO_DELETED,
+            )
+            not_found.update(self.update_cache(fetch, response))
+
+        result: Dict[Collection, Dict[int, PartialModel]] = {
+            get_many_request.collection: {} for get_many_request in get_many_requests
+        }
+        for fqid, fields in requested.items():
+            if fqid in not_found:
+                continue
+            model, _ = self.cache.get(fqid, fields)
+            assert model is not None
+            result[fqid.collection][fqid.id] = model
+        return result
+
+    def get_requested_fields(
+        self, get_many_requests: List[commands.GetManyRequest]
+    ) -> Dict[FullQualifiedId, Optional[Set[str]]]:
+        requested: Dict[FullQualifiedId, Optional[Set[str]]] = {}
+        for get_many_request in get_many_requests:
+            fields = self.get_cache_fields(get_many_request.mapped_fields, False)
+            for instance_id in get_many_request.ids:
+                fqid = FullQualifiedId(get_many_request.collection, int(instance_id))
+                if fqid in requested:
+                    requested[fqid] = self.merge_cache_fields(requested[fqid], fields)
+                else:
+                    requested[fqid] = fields
+        return requested
+
+    def get_missing_fields(
+        self,
+        requested: Dict[FullQualifiedId, Optional[Set[str]]],
+        not_found: Set[FullQualifiedId],
+        refetch_all: bool,
+    ) -> Dict[FullQualifiedId, Optional[Set[str]]]:
+        """
+        Returns the fields which have to be fetched from the datastore for each of
+        the requested models which are not in the cache or the shared cache.
+        """
+        fetch: Dict[FullQualifiedId, Optional[Set[str]]] = {}
+        for fqid, fields in requested.items():
+            if fqid in not_found:
+                continue
+            model, missing_fields = self.cache.get(fqid, fields)
+            if model is None:
+                fetch_fields = self.get_cache_fields(
+                    fields if refetch_all else missing_fields, True
+                )
+                shared_model = (
+                    None if refetch_all else self.get_shared_cached(fqid, fetch_fields)
+                )
+                if shared_model is None:
+                    fetch[fqid] = fetch_fields
+                elif not self.cache.update(fqid, fetch_fields, shared_model):
+                    fetch[fqid] = self.get_cache_fields(fields, True)
+        return fetch
+
+    def get_fetch_requests(
+        self, fetch: Dict[FullQualifiedId, Optional[Set[str]]]
+    ) -> List[commands.GetManyRequest]:
+        """
+        Groups the models to fetch into one GetManyRequest per collection and fields.
+        """
+        fqids_per_request: Dict[
+            Tuple[Collection, Optional[FrozenSet[str]]], List[int]
+        ] = defaultdict(list)
+        for fqid, fields in fetch.items():
+            key = (fqid.collection, None if fields is None else frozenset(fields))
+            fqids_per_request[key].append(fqid.id)
+        return [
+            commands.GetManyRequest(
+                collection, ids, None if fields is None else set(fields)
+            )
+            for (collection, fields), ids in fqids_per_request.items()
+        ]
+
+    def update_cache(
+        self,
+        fetch: Dict[FullQualifiedId, Optional[Set[str]]],
+        response: Dict[Collection, Dict[int, PartialModel]],
+    ) -> Set[FullQualifiedId]:
+        """
+        Puts the fetched models into the cache and returns the ones not found.
+        """
+        not_found = set()
+        for fqid, fields in fetch.items():
+            model = response.get(fqid.collection, {}).get(fqid.id)
+            if model is None:
+                not_found.add(fqid)
+            else:
+                self.cache.update(fqid, fields, model)
+                self.update_shared_cache(fqid, fields, model)
+        return not_found
+
+    def get_request(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[List[str]],
+        lock_result: bool,
+    ) -> BatchRequest:
+        fqid = normalize_fqid(fqid)
+        return self.prefetch_request(
+            [commands.GetManyRequest(fqid.collection, [fqid.id], mapped_fields)],
+            lambda: self.get(fqid, mapped_fields, lock_result=lock_result),
+        )
+
+    def get_many_request(
+        self, get_many_requests: List[commands.GetManyRequest], lock_result: bool
+    ) -> BatchRequest:
+        return self.prefetch_request(
+            get_many_requests,
+            lambda: self.get_many(get_many_requests, lock_result=lock_result),
+        )
+
+    def prefetch_request(
+        self,
+        get_many_requests: List[commands.GetManyRequest],
+        read: Callable[[], Any],
+    ) -> BatchRequest:
+        """
+        Returns a request which fetches the models missing in the cache and then
+        calls read, which serves them from the cache. Without cache, read is only
+        called after the batch was sent.
+        """
+        if not self.use_cache:
+            return BatchRequest(None, lambda _: read())
+        fetch = self.get_missing_fields(
+            self.get_requested_fields(get_many_requests), set(), False
+        )
+        if not fetch:
+            return BatchRequest(None, lambda _: read())
+        command = commands.GetMany(
+            get_many_requests=self.get_fetch_requests(fetch),
+            position=self.get_read_position(None),
+            get_deleted_models=DeletedModelsBehaviour.NO_DELETED,
+        )
+
+        def handle(response: DatastoreResponse) -> Any:
+            result = self.decode_get_many_response([response])
+            self.update_cache(fetch, result)
+            return read()
+
+        return BatchRequest(command, handle)
+
+    def get_deferred(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: List[str] = None,
+        lock_result: bool = False,
+    ) -> LazyModel:
+        """
+        Returns a placeholder for the requested model without contacting the
+        datastore. When any pending placeholder is accessed, all of them are fetched
+        together with a single get_many request, see fetch_deferred.
+        """
+        lazy_model = LazyModel(
+            normalize_fqid(fqid),
+            self.get_cache_fields(mapped_fields, lock_result),
+            lock_result,
+            self.fetch_deferred,
+        )
+        self.deferred.append(lazy_model)
+        return lazy_model
+
+    def fetch_deferred(self) -> None:
+        """
+        Fetches all pending placeholders from get_deferred in one get_many request.
+        The mapped_fields of placeholders with the same FQId are merged, so every
+        model is requested only once.
+        """
+        deferred, self.deferred = self.deferred, []
+        if not deferred:
+            return
+        requested: Dict[FullQualifiedId, Optional[Set[str]]] = {}
+        for lazy_model in deferred:
+            if lazy_model.fqid in requested:
+                requested[lazy_model.fqid] = self.merge_cache_fields(
+                    requested[lazy_model.fqid], lazy_model.mapped_fields
+                )
+            else:
+                requested[lazy_model.fqid] = lazy_model.mapped_fields
+
+        fqids_per_request: Dict[
+            Tuple[Collection, Optional[FrozenSet[str]]], List[int]
+        ] = defaultdict(list)
+        for fqid, fields in requested.items():
+            key = (fqid.collection, None if fields is None else frozenset(fields))
+            fqids_per_request[key].append(fqid.id)
+        if self.logger.isEnabledFor(DEBUG):
+            self.logger.debug(
+                f"Fetch {len(deferred)} deferred get requests for {len(requested)} models."
+            )
+        result = self.get_many(
+            [
+                commands.GetManyRequest(
+                    collection, ids, None if fields is None else set(fields)
+                )
+                for (collection, fields), ids in fqids_per_request.items()
+            ]
+        )
+
+        for lazy_model in deferred:
+            fqid = lazy_model.fqid
+            model = result.get(fqid.collection, {}).get(fqid.id)
+            if model is not None:
+                model = {
+                    field: value
+                    for field, value in model.items()
+                    if lazy_model.mapped_fields is None
+                    or field in lazy_model.mapped_fields
+                }
+                if lazy_model.lock_result and not self.pending_changes.is_local(fqid):
+                    instance_position = model.get("meta_position")
+                    if instance_position is None:
+                        raise DatastoreException(
+                            "Response from datastore does not contain field 'meta_position' but this is required."
+                        )
+                    self.update_locked_fields(fqid, instance_position)
+            lazy_model.resolve(model)
+
     def get_all(
         self,
         collection: Collection,
@@ -180,9 +839,6 @@ class DatastoreAdapter(DatastoreService):
             mapped_fields=mapped_fields_set,
             get_deleted_models=get_deleted_models,
         )
-        self.logger.debug(
-            f"Start GET_ALL request to datastore with the following data: {command.data}"
-        )
         response = self.retrieve(command)
         if lock_result:
             for item in response:
@@ -196,6 +852,24 @@ class DatastoreAdapter(DatastoreService):
                 self.update_locked_fields(fqid, instance_position)
         return response
 
+    def get_all_stream(
+        self,
+        collection: Collection,
+        mapped_fields: List[str] = None,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> Iterator[Tuple[int, PartialModel]]:
+        """
+        Like get_all, but yields the models one by one while the response is
+        received instead of decoding the whole response at once.
+        """
+        command = commands.GetAll(
+            collection=collection,
+            mapped_fields=set(mapped_fields or []),
+            get_deleted_models=get_deleted_models,
+        )
+        for (id_str,), model in self.retrieve_stream(command):
+            yield int(id_str), model
+
     def filter(
         self,
         collection: Collection,
@@ -204,49 +878,390 @@ class DatastoreAdapter(DatastoreService):
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
     ) -> Dict[int, PartialModel]:
+        return self.execute_request(
+            self.filter_request(
+                collection, filter, mapped_fields, get_deleted_models, lock_result
+            )
+        )
+
+    def filter_request(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str],
+        get_deleted_models: DeletedModelsBehaviour,
+        lock_result: bool,
+    ) -> BatchRequest:
+        full_filter = self.apply_deleted_models_behaviour_to_filter(
+            filter, get_deleted_models
+        )
+        command = commands.Filter(
+            collection=collection, filter=full_filter, mapped_fields=set(mapped_fields)
+        )
+
+        def handle(response: DatastoreResponse) -> Dict[int, PartialModel]:
+            pos = response["position"]
+            data = response["data"]
+            # TODO: add option to use collectionfield locks
+            if lock_result:
+                self.lock_filter_fields(collection, filter, pos)
+            result = {int(key): val for key, val in data.items()}
+            if self.reads_pending_changes(None, get_deleted_models):
+                self.apply_pending_changes_to_filter(
+                    collection, filter, mapped_fields, result
+                )
+            return result
+
+        return BatchRequest(command, handle)
+
+    def apply_pending_changes_to_filter(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str],
+        result: Dict[int, PartialModel],
+    ) -> None:
+        """
+        Applies the pending changes to the result of a filter request. Changed models
+        are checked against the filter again. Models whose changes touch fields of
+        the filter are read with get, which includes these changes.
+        """
+        filter_data = filter.to_dict()
+        filter_fields = get_fields(filter_data)
+        for id, pending_model in self.pending_changes.get_models(collection):
+            if pending_model.deleted:
+                result.pop(id, None)
+                continue
+            if pending_model.created:
+                model = pending_model.apply({}, None)
+            elif (
+                id in result and not filter_fields & pending_model.get_changed_fields()
+            ):
+                result[id] = pending_model.apply(result[id], mapped_fields or None)
+                continue
+            elif id in self.new_ids[collection]:
+                # Relation updates of a new model precede its create event.
+                continue
+            else:
+                model = self.get(
+                    FullQualifiedId(collection, id),
+                    list(filter_fields.union(mapped_fields)) if mapped_fields else None,
+                )
+            if matches(model, filter_data):
+                result[id] = (
+                    {field: model[field] for field in mapped_fields if field in model}
+                    if mapped_fields
+                    else model
+                )
+            else:
+                result.pop(id, None)
+
+    def load_slice(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> Dict[int, PartialModel]:
+        """
+        Like filter, but keeps the result so that exists, count, min and max requests
+        for this filter or a narrower one are answered locally. If the same slice was
+        loaded before, it is returned without a request.
+        """
+        return self.execute_request(
+            self.load_slice_request(
+                collection, filter, mapped_fields, get_deleted_models, lock_result
+            )
+        )
+
+    def load_slice_request(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str],
+        get_deleted_models: DeletedModelsBehaviour,
+        lock_result: bool,
+    ) -> BatchRequest:
         full_filter = self.apply_deleted_models_behaviour_to_filter(
             filter, get_deleted_models
         )
+        conjuncts = [conjunct.to_dict() for conjunct in get_conjuncts(full_filter)]
+        fields = set(mapped_fields) if mapped_fields else None
+        for slice in self.slices:
+            if (
+                slice.collection == collection
+                and slice.conjuncts == conjuncts
+                and (
+                    slice.fields is None if fields is None else slice.has_fields(fields)
+                )
+            ):
+                if lock_result:
+                    self.lock_filter_fields(collection, filter, slice.position)
+                data = {
+                    id: {field: model[field] for field in fields if field in model}
+                    if fields is not None
+                    else dict(model)
+                    for id, model in slice.models.items()
+                }
+                if self.reads_pending_changes(None, get_deleted_models):
+                    self.apply_pending_changes_to_filter(
+                        collection, filter, mapped_fields, data
+                    )
+                return BatchRequest(None, lambda _: data)
         command = commands.Filter(
             collection=collection, filter=full_filter, mapped_fields=set(mapped_fields)
         )
-        self.logger.debug(
-            f"Start FILTER request to datastore with the following data: {command.data}"
+
+        def handle(response: DatastoreResponse) -> Dict[int, PartialModel]:
+            position = response["position"]
+            data = {int(key): val for key, val in response["data"].items()}
+            if lock_result:
+                self.lock_filter_fields(collection, filter, position)
+            if self.use_cache:
+                self.slices.append(
+                    FilterSlice(collection, conjuncts, fields, position, data)
+                )
+            if self.reads_pending_changes(None, get_deleted_models):
+                self.apply_pending_changes_to_filter(
+                    collection, filter, mapped_fields, data
+                )
+            return data
+
+        return BatchRequest(command, handle)
+
+    def lock_filter_fields(
+        self, collection: Collection, filter: Filter, position: int
+    ) -> None:
+        fields: List[str] = []
+        filter_visitor(filter, lambda fo: fields.append(fo.field))
+        for field in fields:
+            self.lock_collection_field(
+                CollectionField(collection, field), filter, position
+            )
+
+    def lock_collection_field(
+        self, key: CollectionField, filter: Filter, position: int
+    ) -> None:
+        """
+        Locks the CollectionField for the models matching the filter if filter_locks
+        is enabled, otherwise for all models. Filters of the same CollectionField
+        are combined. A lock for all models is kept, since it includes the filter.
+        """
+        if not self.filter_locks:
+            self.update_locked_fields(key, position)
+            return
+        current = self.locked_fields.get(str(key))
+        if isinstance(current, int):
+            return
+        filter_data = filter.to_dict()
+        if current is not None:
+            position = min(position, current["position"])
+            if current["filter"] != filter_data:
+                filter_data = {"or_filter": [current["filter"], filter_data]}
+        self.locked_fields[str(key)] = CollectionFieldLock(
+            position=position, filter=filter_data
         )
-        response = self.retrieve(command)
-        pos = response["position"]
-        data = response["data"]
-        # TODO: add option to use collectionfield locks
-        if lock_result:
-            fields = []
-            filter_visitor(filter, lambda fo: fields.append(fo.field))
-            for field in fields:
-                cf = CollectionField(collection, field)
-                self.update_locked_fields(cf, pos)
-        data = {int(key): val for key, val in data.items()}
-        return data
 
-    def exists(
+    def select_request(
         self,
         collection: Collection,
         filter: Filter,
+        fields: Set[str],
+        get_deleted_models: DeletedModelsBehaviour,
+        select: Callable[[List[PartialModel], int], Any],
+    ) -> Optional[BatchRequest]:
+        """
+        Returns a request which calls select with the models matching the filter
+        and the position they were read at, if a loaded slice contains them.
+
+        If the request has to see pending changes of the collection, they are
+        applied like for filter requests. Without a matching slice, the models are
+        then read with a filter request instead of asking the datastore, which does
+        not know the pending changes. Otherwise None is returned and the request
+        has to be sent to the datastore.
+        """
+        full_filter = self.apply_deleted_models_behaviour_to_filter(
+            filter, get_deleted_models
+        )
+        local = self.select_from_slices(collection, full_filter, fields)
+        reads_pending = self.reads_pending_changes(None, get_deleted_models) and any(
+            self.pending_changes.get_models(collection)
+        )
+        if local is not None:
+            models, position = local
+            if reads_pending:
+                result = {model["id"]: model for model in models}
+                self.apply_pending_changes_to_filter(
+                    collection, filter, list(fields), result
+                )
+                models = list(result.values())
+            value = select(models, position)
+            return BatchRequest(None, lambda _: value)
+        if not reads_pending:
+            return None
+        request = self.filter_request(
+            collection, filter, list(fields) or ["id"], get_deleted_models, False
+        )
+
+        def handle(response: DatastoreResponse) -> Any:
+            return select(list(request.handle(response).values()), response["position"])
+
+        return BatchRequest(request.command, handle)
+
+    def select_from_slices(
+        self, collection: Collection, full_filter: Filter, fields: Set[str]
+    ) -> Optional[Tuple[List[PartialModel], int]]:
+        """
+        Returns the models matching the filter and the position they were read at,
+        if a loaded slice contains all of them with the given fields.
+        """
+        conjuncts = [conjunct.to_dict() for conjunct in get_conjuncts(full_filter)]
+        for slice in reversed(self.slices):
+            if slice.collection != collection:
+                continue
+            models = slice.select(
+                conjuncts,
+                fields,
+                self.additional_relation_models,
+                self.new_ids[collection],
+            )
+            if models is not None:
+                return models, slice.position
+        return None
+
+    def filter_stream(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
-    ) -> bool:
+    ) -> Iterator[Tuple[int, PartialModel]]:
+        """
+        Like filter, but yields the models one by one while the response is
+        received. If lock_result is set, the fields are locked after the last
+        model, so the iterator has to be consumed completely.
+        """
         full_filter = self.apply_deleted_models_behaviour_to_filter(
             filter, get_deleted_models
         )
-        command = commands.Exists(collection=collection, filter=full_filter)
-        self.logger.debug(
-            f"Start EXISTS request to datastore with the following data: {command.data}"
+        command = commands.Filter(
+            collection=collection, filter=full_filter, mapped_fields=set(mapped_fields)
         )
-        response = self.retrieve(command)
+        position = None
+        for path, value in self.retrieve_stream(command, ("data",)):
+            if path == ("position",):
+                position = value
+            elif len(path) == 2:
+                yield int(path[1]), value
         if lock_result:
-            position = response.get("position")
             if position is None:
                 raise DatastoreException("Invalid response from datastore.")
+            self.lock_filter_fields(collection, filter, position)
+
+    def query(
+        self,
+        collection: Collection,
+        filter: Optional[Filter],
+        mapped_fields: List[str],
+        order_by: List[commands.OrderBy] = [],
+        limit: int = None,
+        offset: int = 0,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> List[PartialModel]:
+        """
+        Returns the models matching the filter sorted by order_by, skipping the first
+        offset ones and returning at most limit ones.
+
+        Only the MemoryEngine supports query requests. The datastore reader has no
+        such endpoint, so with the HTTPEngine only the filter is pushed down: the
+        matching models are streamed and sorted here, keeping at most
+        offset + limit of them in memory.
+        """
+        if filter is not None:
+            full_filter: Optional[
+                Filter
+            ] = self.apply_deleted_models_behaviour_to_filter(
+                filter, get_deleted_models
+            )
+        elif get_deleted_models != DeletedModelsBehaviour.ALL_MODELS:
+            full_filter = FilterOperator(
+                "meta_deleted",
+                "=",
+                get_deleted_models == DeletedModelsBehaviour.ONLY_DELETED,
+            )
+        else:
+            full_filter = None
+        command = commands.Query(
+            collection=collection,
+            filter=full_filter,
+            mapped_fields=set(mapped_fields),
+            order_by=order_by,
+            limit=limit,
+            offset=offset,
+        )
+        if self.engine.supports(command.name):
+            return self.retrieve(command)["data"]
+
+        fields = set(mapped_fields)
+        if fields:
+            fields.update(item.field for item in order_by)
+        if full_filter is None:
+            models: Iterable[Tuple[int, PartialModel]] = self.get_all_stream(
+                collection, list(fields), DeletedModelsBehaviour.ALL_MODELS
+            )
+        else:
+            models = self.filter_stream(collection, full_filter, list(fields))
+        result = order_models(
+            (model for _, model in models),
+            [item.to_dict() for item in order_by],
+            limit,
+            offset,
+        )
+        if mapped_fields:
+            result = [
+                {field: model[field] for field in mapped_fields if field in model}
+                for model in result
+            ]
+        return result
+
+    def exists(
+        self,
+        collection: Collection,
+        filter: Filter,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> bool:
+        request = self.exists_request(collection, filter, get_deleted_models)
+        if lock_result:
+            if request.command is not None:
+                response = self.retrieve(request.command)
+                if response.get("position") is None:
+                    raise DatastoreException("Invalid response from datastore.")
             raise NotImplementedError("Locking is not implemented")
-        return response["exists"]
+        return self.execute_request(request)
+
+    def exists_request(
+        self,
+        collection: Collection,
+        filter: Filter,
+        get_deleted_models: DeletedModelsBehaviour,
+    ) -> BatchRequest:
+        local = self.select_request(
+            collection,
+            filter,
+            set(),
+            get_deleted_models,
+            lambda models, _: bool(models),
+        )
+        if local is not None:
+            return local
+        full_filter = self.apply_deleted_models_behaviour_to_filter(
+            filter, get_deleted_models
+        )
+        command = commands.Exists(collection=collection, filter=full_filter)
+        return BatchRequest(command, lambda response: response["exists"])
 
     def count(
         self,
@@ -255,17 +1270,33 @@ class DatastoreAdapter(DatastoreService):
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
     ) -> int:
+        request = self.count_request(collection, filter, get_deleted_models)
+        if lock_result:
+            if request.command is not None:
+                self.retrieve(request.command)
+            raise NotImplementedError("Locking is not implemented")
+        return self.execute_request(request)
+
+    def count_request(
+        self,
+        collection: Collection,
+        filter: Filter,
+        get_deleted_models: DeletedModelsBehaviour,
+    ) -> BatchRequest:
+        local = self.select_request(
+            collection,
+            filter,
+            set(),
+            get_deleted_models,
+            lambda models, _: len(models),
+        )
+        if local is not None:
+            return local
         full_filter = self.apply_deleted_models_behaviour_to_filter(
             filter, get_deleted_models
         )
         command = commands.Count(collection=collection, filter=full_filter)
-        self.logger.debug(
-            f"Start COUNT request to datastore with the following data: {command.data}"
-        )
-        response = self.retrieve(command)
-        if lock_result:
-            raise NotImplementedError("Locking is not implemented")
-        return response["count"]
+        return BatchRequest(command, lambda response: response["count"])
 
     def min(
         self,
@@ -276,22 +1307,17 @@ class DatastoreAdapter(DatastoreService):
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
     ) -> Optional[int]:
-        # TODO: This method does not reflect the position of the fetched objects.
-        full_filter = self.apply_deleted_models_behaviour_to_filter(
-            filter, get_deleted_models
-        )
-        command = commands.Min(
-            collection=collection, filter=full_filter, field=field, type=type
-        )
-        self.logger.debug(
-            f"Start MIN request to datastore with the following data: {command.data}"
-        )
-        response = self.retrieve(command)
-        if lock_result:
-            self.update_locked_fields(
-                CollectionField(collection, field), response.get("position")
+        return self.execute_request(
+            self.aggregate_request(
+                commands.Min,
+                collection,
+                filter,
+                field,
+                type,
+                get_deleted_models,
+                lock_result,
             )
-        return response.get("min")
+        )
 
     def max(
         self,
@@ -302,22 +1328,99 @@ class DatastoreAdapter(DatastoreService):
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
         lock_result: bool = False,
     ) -> Optional[int]:
+        return self.execute_request(
+            self.aggregate_request(
+                commands.Max,
+                collection,
+                filter,
+                field,
+                type,
+                get_deleted_models,
+                lock_result,
+            )
+        )
+
+    def aggregate_request(
+        self,
+        command_class: Type[Union[commands.Min, commands.Max]],
+        collection: Collection,
+        filter: Filter,
+        field: str,
+        type: str,
+        get_deleted_models: DeletedModelsBehaviour,
+        lock_result: bool,
+    ) -> BatchRequest:
+        """
+        Returns the request for a min or max command.
+        """
         # TODO: This method does not reflect the position of the fetched objects.
         full_filter = self.apply_deleted_models_behaviour_to_filter(
             filter, get_deleted_models
         )
-        command = commands.Max(
+        command = command_class(
             collection=collection, filter=full_filter, field=field, type=type
         )
-        self.logger.debug(
-            f"Start MAX request to datastore with the following data: {command.data}"
+
+        def select(models: List[PartialModel], position: int) -> Optional[int]:
+            if lock_result:
+                self.lock_collection_field(
+                    CollectionField(collection, field), filter, position
+                )
+            values = [model[field] for model in models if model.get(field) is not None]
+            function = min if command_class is commands.Min else max
+            return function(values) if values else None
+
+        local = self.select_request(
+            collection, filter, {field}, get_deleted_models, select
         )
-        response = self.retrieve(command)
-        if lock_result:
-            self.update_locked_fields(
-                CollectionField(collection, field), response.get("position")
-            )
-        return response.get("max")
+        if local is not None:
+            return local
+
+        def handle(response: DatastoreResponse) -> Optional[int]:
+            if lock_result:
+                self.lock_collection_field(
+                    CollectionField(collection, field), filter, response["position"]
+                )
+            return response.get(command.name)
+
+        return BatchRequest(command, handle)
+
+    def batch(self) -> ReaderBatch:
+        """
+        Returns a new batch to send several independent reader requests at once.
+        """
+        return ReaderBatch(self)
+
+    def execute_request(self, request: BatchRequest) -> Any:
+        self.execute_batch([request])
+        return request.result
+
+    def execute_batch(self, requests: List[BatchRequest]) -> None:
+        """
+        Sends the commands of the given requests in one batch command if the engine
+        supports it and one by one otherwise. Requests without command are resolved
+        afterwards, since they may read models fetched by the others.
+
+        Only the MemoryEngine supports batch commands. The datastore reader has no
+        batch endpoint, so with the HTTPEngine a batch saves no round trips; it
+        still serves requests from the cache and slices before sending anything.
+        """
+        pending: List[BatchRequest] = []
+        batch_commands: List[commands.Command] = []
+        for request in requests:
+            if request.command is not None and not request.done:
+                pending.append(request)
+                batch_commands.append(request.command)
+        if len(batch_commands) > 1 and self.engine.supports("batch"):
+            responses = self.retrieve(commands.Batch(batch_commands))
+        else:
+            responses = [self.retrieve(command) for command in batch_commands]
+        for request, response in zip(pending, responses):
+            self.pin_current_position(response)
+            request.resolve(response)
+        for request in requests:
+            if not request.done:
+                request.resolve(None)
 
     def apply_deleted_models_behaviour_to_filter(
         self, filter: Filter, get_deleted_models: DeletedModelsBehaviour
@@ -332,6 +1435,151 @@ class DatastoreAdapter(DatastoreService):
         )
         return And(filter, deleted_models_filter)
 
+    def is_cacheable(
+        self, position: Optional[int], get_deleted_models: DeletedModelsBehaviour
+    ) -> bool:
+        """
+        Only requests for the current state of existing models are served from the
+        cache.
+        """
+        return (
+            self.use_cache
+            and position is None
+            and get_deleted_models == DeletedModelsBehaviour.NO_DELETED
+        )
+
+    def get_read_position(self, position: Optional[int]) -> Optional[int]:
+        """
+        Returns the position a get or get_many request has to read from.
+        """
+        if position is not None or not self.pin_position:
+            return position
+        return self.pinned_position
+
+    def pin_current_position(self, response: Any) -> None:
+        """
+        Pins the position of the given response of a filter, exists, count, min or
+        max request if no position is pinned yet. The reader returns its current
+        position with them, so all models read at this position are consistent
+        with the state the response was computed from. Responses of get and
+        get_many do not contain it: the meta_position of their models may be far
+        behind the current position.
+        """
+        if (
+            self.pin_position
+            and self.pinned_position is None
+            and isinstance(response, dict)
+            and isinstance(response.get("position"), int)
+        ):
+            self.pinned_position = response["position"]
+
+    def get_cache_fields(
+        self, mapped_fields: Optional[Iterable[str]], add_position: bool
+    ) -> Optional[Set[str]]:
+        """
+        Returns the given mapped_fields as set (or None for the full model) and adds
+        meta_position if requested.
+        """
+        if not mapped_fields:
+            return None
+        fields = set(mapped_fields)
+        if add_position:
+            fields.add("meta_position")
+        return fields
+
+    def merge_cache_fields(
+        self, a: Optional[Set[str]], b: Optional[Set[str]]
+    ) -> Optional[Set[str]]:
+        if a is None or b is None:
+            return None
+        return a | b
+
+    def get_shared_cached(
+        self, fqid: FullQualifiedId, mapped_fields: Optional[Set[str]]
+    ) -> Optional[PartialModel]:
+        """
+        Returns the model from the shared cache if it is cached there and not newer
+        than the pinned position.
+        """
+        if self.shared_cache is None:
+            return None
+        model = self.shared_cache.get(fqid, mapped_fields)
+        if (
+            model is not None
+            and self.pinned_position is not None
+            and model.get("meta_position", 0) > self.pinned_position
+        ):
+            return None
+        return model
+
+    def update_shared_cache(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[Set[str]],
+        model: PartialModel,
+    ) -> None:
+        if self.shared_cache is not None:
+            self.shared_cache.update(fqid, mapped_fields, model)
+
+    def get_shared_cache_metrics(self) -> Optional[Dict[str, int]]:
+        if self.shared_cache is None:
+            return None
+        return self.shared_cache.get_metrics()
+
+    def reset_cache(self) -> None:
+        """
+        Drops all cached models, the pending changes and the pinned position. Has to
+        be called whenever the datastore content might have changed, e. g. after
+        writing. See invalidate_locked_key for retries of rejected writes.
+        """
+        self.cache.clear()
+        self.slices = []
+        self.pending_changes.clear()
+        self.pinned_position = None
+
+    def invalidate_locked_key(self, key: Optional[str]) -> None:
+        """
+        Prepares a retry after the datastore rejected a write because of the given
+        locked key (FQId, FQField or CollectionField). Only the cached models and
+        slices affected by the key are dropped, so the retry reads all other models
+        from the cache again. If the key is unknown, the whole cache is dropped.
+
+        The pending changes of the failed write and the pinned position are always
+        dropped, since the locked models have to be read at a newer position.
+        """
+        if key is None:
+            self.reset_cache()
+            return
+        parts = key.split(KEYSEPARATOR)
+        collection = Collection(parts[0])
+        if len(parts) > 1 and parts[1].isdigit():
+            self.cache.invalidate(FullQualifiedId(collection, int(parts[1])))
+        else:
+            self.cache.invalidate_collection(collection)
+        self.slices = [slice for slice in self.slices if slice.collection != collection]
+        self.pending_changes.clear()
+        self.pinned_position = None
+
+    def apply_changes(self, events: Iterable[Event]) -> None:
+        """
+        Adds the given events to the pending changes, see PendingChanges.
+        """
+        self.pending_changes.apply_events(events)
+
+    @contextmanager
+    def without_pending_changes(self) -> Iterator[None]:
+        """
+        Reads in this context return the datastore state without the pending
+        changes. Needed by code which merges its own changes with the ones of the
+        previous actions of this request, e. g. the RelationManager.
+        """
+        use_pending_changes = self.use_pending_changes
+        self.use_pending_changes = False
+        try:
+            yield
+        finally:
+            self.use_pending_changes = use_pending_changes
+
     def update_locked_fields(
         self,
         key: Union[FullQualifiedId, FullQualifiedField, CollectionField],
@@ -344,11 +1592,18 @@ class DatastoreAdapter(DatastoreService):
         self.locked_fields[str(key)] = position
 
     def reserve_ids(self, collection: Collection, amount: int) -> Sequence[int]:
+        ids: Sequence[int]
+        if self.id_pool is not None and self.id_pool.is_pooled(collection):
+            ids = self.id_pool.take(collection, amount, self.reserve_ids_uncached)
+        else:
+            ids = self.reserve_ids_uncached(collection, amount)
+        self.new_ids[collection].update(ids)
+        return ids
+
+    def reserve_ids_uncached(
+        self, collection: Collection, amount: int
+    ) -> Sequence[int]:
         command = commands.ReserveIds(collection=collection, amount=amount)
-        self.logger.debug(
-            f"Start RESERVE_IDS request to datastore with the following data: "
-            f"Collection: {collection}, Amount: {amount}"
-        )
         response = self.retrieve(command)
         return response.get("ids")
 
@@ -359,15 +1614,37 @@ class DatastoreAdapter(DatastoreService):
         if isinstance(write_requests, WriteRequest):
             write_requests = [write_requests]
         command = commands.Write(write_requests=write_requests)
-        self.logger.debug(
-            f"Start WRITE request to datastore with the following data: "
-            f"Write request: {write_requests}"
-        )
-        self.retrieve(command)
+        try:
+            self.retrieve(command)
+        except DatastoreLockedException as exception:
+            # The locked models might have been read from the shared cache, so
+            # they have to be fetched from the datastore on retry.
+            if self.shared_cache is not None:
+                for write_request in write_requests:
+                    for key in write_request.locked_fields:
+                        parts = key.split(KEYSEPARATOR)
+                        if len(parts) > 1 and parts[1].isdigit():
+                            self.shared_cache.invalidate(
+                                FullQualifiedId(Collection(parts[0]), int(parts[1]))
+                            )
+            self.invalidate_locked_key(exception.key)
+            raise
+        except Exception:
+            self.reset_cache()
+            raise
+        self.reset_cache()
+        if self.shared_cache is not None:
+            for write_request in write_requests:
+                for event in write_request.events:
+                    self.shared_cache.invalidate(event["fqid"])
 
     def truncate_db(self) -> None:
         command = commands.TruncateDb()
-        self.logger.debug("Start TRUNCATE_DB request to datastore")
+        self.reset_cache()
+        if self.shared_cache is not None:
+            self.shared_cache.clear()
+        if self.id_pool is not None:
+            self.id_pool.clear()
         self.retrieve(command)
 
     def fetch_model(
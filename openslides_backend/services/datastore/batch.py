@@ -0,0 +1,168 @@
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+from ...shared.exceptions import DatastoreException
+from ...shared.filters import Filter
+from ...shared.patterns import Collection, FullQualifiedId
+from . import commands
+from .deleted_models_behaviour import DeletedModelsBehaviour
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .adapter import DatastoreAdapter
+
+
+class BatchRequest:
+    """
+    A reader request of a DatastoreAdapter. If command is None, the result does not
+    depend on a response of the datastore. Otherwise handle converts the response
+    of the command to the result.
+    """
+
+    def __init__(
+        self,
+        command: Optional[commands.Command],
+        handle: Callable[[Any], Any],
+    ) -> None:
+        self.command = command
+        self.handle = handle
+        self.done = False
+        self.value: Any = None
+
+    def resolve(self, response: Any) -> None:
+        self.value = self.handle(response)
+        self.done = True
+
+    @property
+    def result(self) -> Any:
+        if not self.done:
+            raise DatastoreException("The batch was not executed yet.")
+        return self.value
+
+
+class ReaderBatch:
+    """
+    Collects reader requests which do not depend on each other and sends them to
+    the datastore in one batch request on execute. The methods take the same
+    arguments as the ones of the DatastoreAdapter and return a BatchRequest whose
+    result is available after execute.
+
+    Requests answered from the cache or from loaded slices are not sent. Models of
+    get and get_many requests are fetched into the cache, so the cache has to be
+    enabled to batch them.
+    """
+
+    def __init__(self, datastore: "DatastoreAdapter") -> None:
+        self.datastore = datastore
+        self.requests: List[BatchRequest] = []
+
+    def add(self, request: BatchRequest) -> BatchRequest:
+        self.requests.append(request)
+        return request
+
+    def get(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: List[str] = None,
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(self.datastore.get_request(fqid, mapped_fields, lock_result))
+
+    def get_many(
+        self,
+        get_many_requests: List[commands.GetManyRequest],
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(self.datastore.get_many_request(get_many_requests, lock_result))
+
+    def filter(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.filter_request(
+                collection, filter, mapped_fields, get_deleted_models, lock_result
+            )
+        )
+
+    def load_slice(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.load_slice_request(
+                collection, filter, mapped_fields, get_deleted_models, lock_result
+            )
+        )
+
+    def exists(
+        self,
+        collection: Collection,
+        filter: Filter,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.exists_request(collection, filter, get_deleted_models)
+        )
+
+    def count(
+        self,
+        collection: Collection,
+        filter: Filter,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.count_request(collection, filter, get_deleted_models)
+        )
+
+    def min(
+        self,
+        collection: Collection,
+        filter: Filter,
+        field: str,
+        type: str = "int",
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.aggregate_request(
+                commands.Min,
+                collection,
+                filter,
+                field,
+                type,
+                get_deleted_models,
+                lock_result,
+            )
+        )
+
+    def max(
+        self,
+        collection: Collection,
+        filter: Filter,
+        field: str,
+        type: str = "int",
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> BatchRequest:
+        return self.add(
+            self.datastore.aggregate_request(
+                commands.Max,
+                collection,
+                filter,
+                field,
+                type,
+                get_deleted_models,
+                lock_result,
+            )
+        )
+
+    def execute(self) -> None:
+        self.datastore.execute_batch(self.requests)
+        self.requests = []
@@ -0,0 +1,107 @@
+from copy import deepcopy
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from ...shared.patterns import Collection, FullQualifiedId
+from .interface import PartialModel
+
+MISSING = object()
+"""
+Marker for fields which were requested from the datastore but do not exist in the
+model. The datastore omits such fields in its response.
+"""
+
+
+class ModelCache:
+    """
+    Field-granular cache for models read from the datastore.
+
+    For every FQId we save all fields we have fetched so far together with the
+    meta_position of the model at that time. If we receive a newer meta_position for
+    a model, all previously cached fields of this model are dropped so that the
+    cached fields of one model always belong to the same position.
+    """
+
+    def __init__(self) -> None:
+        self.models: Dict[FullQualifiedId, Dict[str, Any]] = {}
+        self.complete_models: Set[FullQualifiedId] = set()
+
+    def get(
+        self, fqid: FullQualifiedId, mapped_fields: Optional[Set[str]]
+    ) -> Tuple[Optional[PartialModel], Optional[Set[str]]]:
+        """
+        Returns the cached (partial) model and the set of fields which are missing
+        in the cache. If mapped_fields is None, the full model is requested. In this
+        case the missing fields are None if the full model is not in the cache.
+        """
+        cached_model = self.models.get(fqid)
+        is_complete = fqid in self.complete_models
+        if mapped_fields is None:
+            if cached_model is None or not is_complete:
+                return None, None
+            fields: Iterable[str] = cached_model.keys()
+            missing_fields: Set[str] = set()
+        else:
+            fields = mapped_fields
+            if is_complete:
+                missing_fields = set()
+            elif cached_model is None:
+                missing_fields = set(mapped_fields)
+            else:
+                missing_fields = mapped_fields - cached_model.keys()
+            if missing_fields:
+                return None, missing_fields
+        assert cached_model is not None
+        model = {}
+        for field in fields:
+            value = cached_model.get(field, MISSING)
+            if value is not MISSING:
+                model[field] = deepcopy(value)
+        return model, missing_fields
+
+    def update(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[Set[str]],
+        model: PartialModel,
+    ) -> bool:
+        """
+        Adds the given (partial) model to the cache. The mapped_fields have to be the
+        fields which were requested from the datastore, None means the full model.
+        Returns False if previously cached fields had to be dropped because the
+        model has changed in the meantime.
+        """
+        position = model.get("meta_position")
+        cached_model = self.models.get(fqid)
+        is_consistent = True
+        if cached_model is None or cached_model.get("meta_position") != position:
+            is_consistent = cached_model is None
+            cached_model = self.models[fqid] = {}
+            self.complete_models.discard(fqid)
+        if mapped_fields is None:
+            cached_model.clear()
+            self.complete_models.add(fqid)
+            fields: Iterable[str] = model.keys()
+        else:
+            fields = mapped_fields
+        for field in fields:
+            value = model.get(field, MISSING)
+            cached_model[field] = value if value is MISSING else deepcopy(value)
+        return is_consistent
+
+    def invalidate(self, fqid: FullQualifiedId) -> None:
+        """
+        Removes the model with the given FQId from the cache.
+        """
+        self.models.pop(fqid, None)
+        self.complete_models.discard(fqid)
+
+    def invalidate_collection(self, collection: Collection) -> None:
+        """
+        Removes all models of the given collection from the cache.
+        """
+        for fqid in [fqid for fqid in self.models if fqid.collection == collection]:
+            self.invalidate(fqid)
+
+    def clear(self) -> None:
+        self.models.clear()
+        self.complete_models.clear()
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 
 import simplejson as json
 from mypy_extensions import TypedDict
@@ -6,9 +6,10 @@ from mypy_extensions import TypedDict
 from ...shared.filters import Filter as FilterInterface
 from ...shared.filters import FilterData
 from ...shared.interfaces.event import Event
-from ...shared.interfaces.write_request import WriteRequest
+from ...shared.interfaces.write_request import LockedFields, WriteRequest
 from ...shared.patterns import Collection, FullQualifiedId
 from .deleted_models_behaviour import DeletedModelsBehaviour
+from .ordering import ASCENDING, OrderByData
 
 GetManyRequestData = TypedDict(
     "GetManyRequestData",
@@ -29,14 +30,11 @@ class GetManyRequest:
         self,
         collection: Collection,
         ids: List[int],
-        mapped_fields: Union[Set[str], List[str]] = None,
+        mapped_fields: Optional[Iterable[str]] = None,
     ) -> None:
         self.collection = collection
         self.ids = ids
-        if isinstance(mapped_fields, list):
-            self.mapped_fields = set(mapped_fields)
-        else:
-            self.mapped_fields = mapped_fields
+        self.mapped_fields = None if mapped_fields is None else set(mapped_fields)
 
     def to_dict(self) -> GetManyRequestData:
         result: GetManyRequestData = {
@@ -48,8 +46,29 @@ class GetManyRequest:
         return result
 
 
+class OrderBy:
+    """
+    Encapsulates a single sort criterion of a query request. Models without a value
+    for the field are sorted as if they had the default value.
+    """
+
+    def __init__(
+        self, field: str, direction: str = ASCENDING, default: Any = None
+    ) -> None:
+        self.field = field
+        self.direction = direction
+        self.default = default
+
+    def to_dict(self) -> OrderByData:
+        result: OrderByData = {"field": self.field, "direction": self.direction}
+        if self.default is not None:
+            result["default"] = self.default
+        return result
+
+
 CommandData = Dict[
-    str, Union[str, int, List[str], List[GetManyRequestData], FilterData]
+    str,
+    Union[str, int, List[str], List[GetManyRequestData], List[OrderByData], FilterData],
 ]
 
 
@@ -59,7 +78,7 @@ StringifiedWriteRequest = TypedDict(
         "events": List[Event],
         "information": Dict[str, List[str]],
         "user_id": int,
-        "locked_fields": Dict[str, int],
+        "locked_fields": LockedFields,
     },
 )
 
@@ -72,8 +91,12 @@ class Command:
     Command is the base class for commands used by the Engine interface.
 
     The property 'name' returns by default the name of the class converted to snake case.
+    The property 'data' returns the JSON encoded command. It is encoded only once, so
+    a command must not be changed after it has been sent.
     """
 
+    encoded_data: Optional[bytes] = None
+
     @property
     def name(self) -> str:
         name = type(self).__name__
@@ -82,8 +105,13 @@ class Command:
         ).lstrip("_")
 
     @property
-    def data(self) -> Optional[str]:
-        return json.dumps(self.get_raw_data())
+    def data(self) -> Optional[bytes]:
+        if self.encoded_data is None:
+            self.encoded_data = self.encode()
+        return self.encoded_data
+
+    def encode(self) -> bytes:
+        return json.dumps(self.get_raw_data()).encode()
 
     def get_raw_data(self) -> CommandData:
         raise NotImplementedError
@@ -103,7 +131,7 @@ class Get(Command):
         self,
         fqid: FullQualifiedId,
         mapped_fields: Set[str] = None,
-        position: int = None,
+        position: Optional[int] = None,
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
     ) -> None:
         self.fqid = fqid
@@ -123,19 +151,50 @@ class Get(Command):
         return result
 
 
+def merge_get_many_requests(
+    get_many_requests: Iterable[GetManyRequest],
+) -> List[GetManyRequest]:
+    """
+    Merges all requests of the same collection into one request with the union of
+    their mapped_fields and removes duplicate ids. The order of the collections and
+    ids is kept.
+    """
+    merged: Dict[Collection, GetManyRequest] = {}
+    for get_many_request in get_many_requests:
+        target = merged.get(get_many_request.collection)
+        if target is None:
+            merged[get_many_request.collection] = GetManyRequest(
+                get_many_request.collection,
+                list(dict.fromkeys(get_many_request.ids)),
+                get_many_request.mapped_fields,
+            )
+            continue
+        known_ids = set(target.ids)
+        target.ids.extend(
+            id for id in dict.fromkeys(get_many_request.ids) if id not in known_ids
+        )
+        if not target.mapped_fields or not get_many_request.mapped_fields:
+            # An empty or missing mapped_fields means all fields.
+            target.mapped_fields = None
+        else:
+            target.mapped_fields |= get_many_request.mapped_fields
+    return list(merged.values())
+
+
 class GetMany(Command):
     """
-    GetMany command
+    GetMany command. Requests of the same collection are merged, see
+    merge_get_many_requests.
     """
 
     def __init__(
         self,
         get_many_requests: List[GetManyRequest],
         mapped_fields: Set[str] = None,
-        position: int = None,
+        position: Optional[int] = None,
         get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
     ) -> None:
-        self.get_many_requests = get_many_requests
+        self.get_many_requests = merge_get_many_requests(get_many_requests)
         self.mapped_fields = mapped_fields
         self.position = position
         self.get_deleted_models = get_deleted_models
@@ -290,6 +349,61 @@ class Filter(Command):
         return result
 
 
+class Query(Command):
+    """
+    Query command: Filters the collection, sorts the result and returns the given
+    page of it as list of models. Without filter, all models are queried.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        filter: Optional[FilterInterface],
+        mapped_fields: Set[str] = None,
+        order_by: List[OrderBy] = [],
+        limit: int = None,
+        offset: int = 0,
+    ) -> None:
+        self.collection = collection
+        self.filter = filter
+        self.mapped_fields = mapped_fields
+        self.order_by = order_by
+        self.limit = limit
+        self.offset = offset
+
+    def get_raw_data(self) -> CommandData:
+        result: CommandData = {
+            "collection": str(self.collection),
+            "order_by": [order_by.to_dict() for order_by in self.order_by],
+            "offset": self.offset,
+        }
+        if self.filter is not None:
+            result["filter"] = self.filter.to_dict()
+        if self.mapped_fields is not None:
+            result["mapped_fields"] = list(self.mapped_fields)
+        if self.limit is not None:
+            result["limit"] = self.limit
+        return result
+
+
+class Batch(Command):
+    """
+    Batch command: Executes the given reader commands at once and returns the list
+    of their responses in the same order.
+    """
+
+    def __init__(self, commands: List[Command]) -> None:
+        self.commands = commands
+
+    def get_raw_data(self) -> Dict[str, Any]:
+        return {
+            "commands": [
+                {"command": command.name, "data": command.get_raw_data()}
+                for command in self.commands
+            ]
+        }
+
+
 class ReserveIds(Command):
     """
     Reserve ids command
@@ -311,8 +425,7 @@ class Write(Command):
     def __init__(self, write_requests: List[WriteRequest]) -> None:
         self.write_requests = write_requests
 
-    @property
-    def data(self) -> str:
+    def encode(self) -> bytes:
         stringified_write_requests: StringifiedWriteRequests = []
         for write_request in self.write_requests:
             information = {}
@@ -333,7 +446,9 @@ class Write(Command):
                     return str(o)
                 return super().default(o)
 
-        return json.dumps(stringified_write_requests, cls=WriteRequestJSONEncoder)
+        return json.dumps(
+            stringified_write_requests, cls=WriteRequestJSONEncoder
+        ).encode()
 
 
 class TruncateDb(Command):
@@ -0,0 +1,126 @@
+from typing import Any, Dict, List, Optional, Set
+
+from ...shared.filters import FilterData, get_fields, matches
+from ...shared.patterns import Collection
+from ...shared.typing import DeletedModel, ModelMap
+from .interface import PartialModel
+
+
+class FilterSlice:
+    """
+    Result of a filter request: all models of the collection which matched the
+    conjuncts of the filter at the given position. If fields is None, the models
+    are complete, otherwise they contain only these fields and the id.
+
+    A slice answers every request for a filter which contains all of its conjuncts
+    and whose remaining conjuncts only use fields of the slice.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        conjuncts: List[FilterData],
+        fields: Optional[Set[str]],
+        position: int,
+        models: Dict[int, PartialModel],
+    ) -> None:
+        self.collection = collection
+        self.conjuncts = conjuncts
+        self.fields = None if fields is None else fields | {"id"}
+        self.position = position
+        self.models = {id: {**model, "id": id} for id, model in models.items()}
+
+    def has_fields(self, fields: Set[str]) -> bool:
+        return self.fields is None or fields <= self.fields
+
+    def get_remaining_conjuncts(
+        self, conjuncts: List[FilterData]
+    ) -> Optional[List[FilterData]]:
+        """
+        Returns the conjuncts which are not part of this slice or None if the slice
+        does not contain all models matching the given conjuncts.
+        """
+        if any(conjunct not in conjuncts for conjunct in self.conjuncts):
+            return None
+        return [conjunct for conjunct in conjuncts if conjunct not in self.conjuncts]
+
+    def select(
+        self,
+        conjuncts: List[FilterData],
+        fields: Set[str],
+        pending_models: ModelMap,
+        new_ids: Set[int],
+    ) -> Optional[List[PartialModel]]:
+        """
+        Returns the models matching all given conjuncts, which have to be evaluated
+        with the given fields. Pending models of the collection which are not written
+        yet replace the models of the slice. New ones are added. Returns None if the
+        slice cannot answer the request.
+        """
+        remaining = self.get_remaining_conjuncts(conjuncts)
+        if remaining is None:
+            return None
+        remaining_fields = {
+            field for conjunct in remaining for field in get_fields(conjunct)
+        }
+        if not self.has_fields(fields | remaining_fields):
+            return None
+        pending_ids = set()
+        result = []
+        for fqid, pending_model in pending_models.items():
+            if fqid.collection != self.collection:
+                continue
+            pending_ids.add(fqid.id)
+            model = self.merge_pending_model(
+                fqid.id, pending_model, conjuncts, fields, fqid.id in new_ids
+            )
+            if model is False:
+                return None
+            if model is not None:
+                result.append(model)
+        for id, model in self.models.items():
+            if id not in pending_ids and all(
+                matches(model, conjunct) for conjunct in remaining
+            ):
+                result.append(model)
+        return result
+
+    def merge_pending_model(
+        self,
+        id: int,
+        pending_model: Any,
+        conjuncts: List[FilterData],
+        fields: Set[str],
+        is_new: bool,
+    ) -> Any:
+        """
+        Returns the pending model merged into the model of the slice if it matches
+        all conjuncts, None if it does not match and False if this is unknown
+        because fields of a model outside of the slice are missing.
+        """
+        base = self.models.get(id)
+        if isinstance(pending_model, DeletedModel):
+            if base is None:
+                return None
+            changes: Dict[str, Any] = {"meta_deleted": True}
+        else:
+            changes = pending_model
+        if base is None:
+            if not is_new:
+                used_fields = fields.union(*(get_fields(c) for c in conjuncts))
+                if not used_fields - {"id", "meta_deleted"} <= changes.keys():
+                    return False
+            model = {"meta_deleted": False, **changes, "id": id}
+        else:
+            model = {**base, **changes}
+        for conjunct in conjuncts:
+            # The slice conjuncts still hold for unchanged fields of its models.
+            if (
+                base is not None
+                and conjunct in self.conjuncts
+                and not get_fields(conjunct) & changes.keys()
+            ):
+                continue
+            if not matches(model, conjunct):
+                return None
+        return model
@@ -1,14 +1,49 @@
-from typing import Optional, Tuple
+import gzip
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from ...shared.exceptions import DatastoreConnectionException
 from ...shared.interfaces.logging import LoggingModule
 
+DEFAULT_READER_POOL_SIZE = 10
+DEFAULT_WRITER_POOL_SIZE = 2
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_READER_EJECTION_TIME = 30.0
+STREAM_CHUNK_SIZE = 65536
+COMPRESSION_LEVEL = 1
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+
 
 class HTTPEngine:
     """
     HTTP implementation of the Engine interface
+
+    The engine keeps one session with a pool of keep-alive connections for the reader
+    and one for the writer. Sessions are created lazily and recreated after a fork,
+    so an engine created in the Gunicorn master process never shares sockets with
+    its workers.
+
+    The reader URL may be a comma separated list of URLs of reader replicas. Read
+    requests are then distributed across them either round robin or to the reader
+    with the least outstanding requests. A reader which cannot be reached or does
+    not answer in time is ejected for reader_ejection_time seconds and the request
+    is retried on the next reader if the connection could not be established.
+
+    Request bodies of at least compression_threshold bytes are sent gzip compressed.
+    If a datastore service answers such a request with 415 Unsupported Media Type,
+    compression is disabled for this service and the request is sent again
+    uncompressed. Other errors are never replayed, so compression must only be
+    enabled for datastore services which either decode compressed bodies or answer
+    with 415. Responses are compressed by the datastore services if they support
+    it, since requests accepts gzip and decodes the body transparently.
     """
 
     READER_ENDPOINTS = [
@@ -28,31 +63,253 @@ class HTTPEngine:
         datastore_reader_url: str,
         datastore_writer_url: str,
         logging: LoggingModule,
+        reader_pool_size: int = None,
+        writer_pool_size: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        reader_balancing: str = None,
+        reader_ejection_time: float = None,
+        compression_threshold: int = None,
     ):
         self.logger = logging.getLogger(__name__)
-        self.datastore_reader_url = datastore_reader_url
+        self.datastore_reader_urls = [
+            url.strip() for url in datastore_reader_url.split(",") if url.strip()
+        ]
         self.datastore_writer_url = datastore_writer_url
+        self.reader_balancing = reader_balancing or LEAST_OUTSTANDING
+        if self.reader_balancing not in (ROUND_ROBIN, LEAST_OUTSTANDING):
+            raise ValueError(f"Unknown reader balancing {self.reader_balancing}.")
+        self.reader_ejection_time = (
+            DEFAULT_READER_EJECTION_TIME
+            if reader_ejection_time is None
+            else reader_ejection_time
+        )
+        self.readers_lock = threading.Lock()
+        self.next_reader = 0
+        self.outstanding_requests = {url: 0 for url in self.datastore_reader_urls}
+        self.ejected_until = {url: 0.0 for url in self.datastore_reader_urls}
         self.headers = {"Content-Type": "application/json"}
+        self.pool_sizes = {
+            "reader": reader_pool_size or DEFAULT_READER_POOL_SIZE,
+            "writer": writer_pool_size or DEFAULT_WRITER_POOL_SIZE,
+        }
+        # Writes are not interrupted, since the writer may still commit them.
+        connect_timeout = connect_timeout or DEFAULT_CONNECT_TIMEOUT
+        self.timeouts: Dict[str, Tuple[float, Optional[float]]] = {
+            "reader": (connect_timeout, read_timeout or DEFAULT_READ_TIMEOUT),
+            "writer": (connect_timeout, None),
+        }
+        self.compression_threshold = compression_threshold or 0
+        self.uncompressed_urls: Set[str] = set()
+        self.sessions: Dict[str, requests.Session] = {}
+        self.sessions_pid = os.getpid()
+        self.sessions_lock = threading.Lock()
+
+    def get_session(self, service: str) -> requests.Session:
+        """
+        Returns the session for the given service (reader or writer). Sessions
+        inherited from a parent process are discarded without closing them since
+        their sockets still belong to the parent.
+        """
+        with self.sessions_lock:
+            if self.sessions_pid != os.getpid():
+                self.sessions = {}
+                self.sessions_pid = os.getpid()
+            session = self.sessions.get(service)
+            if session is None:
+                pool_size = self.pool_sizes[service]
+                hosts = len(self.datastore_reader_urls) if service == "reader" else 1
+                adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(self.headers)
+                self.sessions[service] = session
+            return session
+
+    def close(self) -> None:
+        """
+        Closes all sessions of this process and their connections.
+        """
+        with self.sessions_lock:
+            if self.sessions_pid == os.getpid():
+                for session in self.sessions.values():
+                    session.close()
+            self.sessions = {}
+
+    def acquire_reader(self, excluded: Set[str]) -> str:
+        """
+        Chooses the reader for the next request. Ejected readers are only used if
+        no other reader is available.
+        """
+        with self.readers_lock:
+            candidates = [
+                url for url in self.datastore_reader_urls if url not in excluded
+            ]
+            now = time.monotonic()
+            healthy = [url for url in candidates if self.ejected_until[url] <= now]
+            if healthy:
+                candidates = healthy
+            # Rotate the candidates, so ties are broken round robin.
+            offset = self.next_reader % len(candidates)
+            self.next_reader += 1
+            candidates = candidates[offset:] + candidates[:offset]
+            if self.reader_balancing == ROUND_ROBIN:
+                url = candidates[0]
+            else:
+                url = min(candidates, key=lambda url: self.outstanding_requests[url])
+            self.outstanding_requests[url] += 1
+            return url
+
+    def release_reader(self, url: str, failed: bool) -> None:
+        with self.readers_lock:
+            self.outstanding_requests[url] -= 1
+            if failed:
+                self.ejected_until[url] = time.monotonic() + self.reader_ejection_time
+            else:
+                self.ejected_until[url] = 0.0
+
+    def supports(self, endpoint: str) -> bool:
+        # The reader has no query and batch endpoints, see MemoryEngine.
+        return endpoint in self.READER_ENDPOINTS or endpoint in self.WRITER_ENDPOINTS
 
-    def retrieve(self, endpoint: str, data: Optional[str]) -> Tuple[bytes, int]:
+    def retrieve(self, endpoint: str, data: Optional[bytes]) -> Tuple[bytes, int]:
         """
         Throws 2 kinds of DatastoreConnectionException:
         1. If there is no valid endpoint given to build a URL
-        2. If the datastore cannot be reached for unknown reasons
+        2. If the datastore cannot be reached for unknown reasons or does not
+           answer in time
         Other exceptions from request.post are passed thru
         """
         # TODO: Check and test this error handling.
-        if endpoint in self.READER_ENDPOINTS:
-            base_url = self.datastore_reader_url
-        elif endpoint in self.WRITER_ENDPOINTS:
-            base_url = self.datastore_writer_url
-        else:
+        if endpoint in self.WRITER_ENDPOINTS:
+            return self.post("writer", self.datastore_writer_url, endpoint, data)
+        if endpoint not in self.READER_ENDPOINTS:
             raise DatastoreConnectionException(f"Endpoint {endpoint} does not exist.")
+        response, base_url = self.post_to_reader(endpoint, data, stream=False)
+        self.release_reader(base_url, failed=False)
+        return response.content, response.status_code
+
+    def stream(
+        self, endpoint: str, data: Optional[bytes]
+    ) -> Tuple[Iterator[bytes], int]:
+        """
+        Like retrieve, but returns the body of the response of a reader endpoint as
+        iterator of chunks. The connection is kept until the body is read completely,
+        so the iterator has to be consumed.
+        """
+        if endpoint not in self.READER_ENDPOINTS:
+            raise DatastoreConnectionException(
+                f"Endpoint {endpoint} does not exist or cannot be streamed."
+            )
+        response, base_url = self.post_to_reader(endpoint, data, stream=True)
+        return self.iter_content(response, base_url), response.status_code
+
+    def iter_content(
+        self, response: requests.Response, base_url: str
+    ) -> Iterator[bytes]:
+        failed = False
+        try:
+            yield from response.iter_content(STREAM_CHUNK_SIZE)
+        except requests.exceptions.RequestException as e:
+            failed = True
+            raise DatastoreConnectionException(
+                f"Reading the response of the datastore service on {base_url} failed. Error: {e}"
+            ) from e
+        finally:
+            response.close()
+            self.release_reader(base_url, failed)
+
+    def post_to_reader(
+        self, endpoint: str, data: Optional[bytes], stream: bool
+    ) -> Tuple[requests.Response, str]:
+        """
+        Sends the request to one of the readers. Returns the response and the URL
+        of the reader, which has to be released afterwards.
+        """
+        tried: Set[str] = set()
+        while True:
+            base_url = self.acquire_reader(tried)
+            tried.add(base_url)
+            response: Optional[requests.Response] = None
+            failed = False
+            try:
+                response = self.send("reader", base_url, endpoint, data, stream)
+            except DatastoreConnectionException as e:
+                failed = True
+                # Retry only if the reader could not be reached. A slow reader is
+                # ejected, but the expensive request is not sent again.
+                if len(tried) == len(self.datastore_reader_urls) or isinstance(
+                    e.__cause__, requests.exceptions.ReadTimeout
+                ):
+                    raise
+                self.logger.warning(f"{e.message} Retry on another reader.")
+            finally:
+                # The reader of a response is released by the caller.
+                if response is None:
+                    self.release_reader(base_url, failed)
+            if response is not None:
+                return response, base_url
+
+    def post(
+        self, service: str, base_url: str, endpoint: str, data: Optional[bytes]
+    ) -> Tuple[bytes, int]:
+        response = self.send(service, base_url, endpoint, data, stream=False)
+        return response.content, response.status_code
+
+    def send(
+        self,
+        service: str,
+        base_url: str,
+        endpoint: str,
+        data: Optional[bytes],
+        stream: bool,
+    ) -> requests.Response:
         url = "/".join((base_url, endpoint))
+        if data is not None and self.should_compress(base_url, data):
+            compressed = gzip.compress(data, compresslevel=COMPRESSION_LEVEL)
+            headers = {"Content-Encoding": "gzip"}
+            response = self.post_url(service, url, compressed, stream, headers)
+            if response.status_code != 415:
+                return response
+            response.close()
+            self.uncompressed_urls.add(base_url)
+            self.logger.warning(
+                f"Datastore service on {base_url} does not accept compressed "
+                "requests. Compression is disabled for it."
+            )
+        return self.post_url(service, url, data, stream, None)
+
+    def should_compress(self, base_url: str, data: bytes) -> bool:
+        return (
+            self.compression_threshold > 0
+            and len(data) >= self.compression_threshold
+            and base_url not in self.uncompressed_urls
+        )
 
+    def post_url(
+        self,
+        service: str,
+        url: str,
+        data: Optional[bytes],
+        stream: bool,
+        headers: Optional[Dict[str, str]],
+    ) -> requests.Response:
+        session = self.get_session(service)
         try:
-            response = requests.post(url=url, data=data, headers=self.headers)
+            response = session.post(
+                url=url,
+                data=data,
+                headers=headers,
+                timeout=self.timeouts[service],
+                stream=stream,
+            )
         except requests.exceptions.ConnectionError as e:
             error_message = f"Cannot reach the datastore service on {url}. Error: {e}"
-            raise DatastoreConnectionException(error_message)
-        return response.content, response.status_code
+            raise DatastoreConnectionException(error_message) from e
+        except requests.exceptions.Timeout as e:
+            error_message = (
+                f"Datastore service on {url} did not answer in time. Error: {e}"
+            )
+            raise DatastoreConnectionException(error_message) from e
+        return response
@@ -0,0 +1,99 @@
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Deque, Dict, List, Sequence, Set
+
+from ...shared.interfaces.logging import LoggingModule
+from ...shared.patterns import Collection
+
+ReserveIds = Callable[[Collection, int], Sequence[int]]
+
+
+class IdPool:
+    """
+    Pool of ids which are reserved in advance in blocks and are shared by all
+    requests of one worker process.
+
+    Only collections with a positive block size are pooled. The first reservation
+    of a collection reserves the requested ids and one block more at the datastore.
+    If less than half of a block is left afterwards, another block is reserved in
+    the background, so most reservations are served without a request to the
+    datastore writer.
+    """
+
+    def __init__(
+        self, logging: LoggingModule, block_sizes: Dict[str, int] = None
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.block_sizes = {
+            collection: size
+            for collection, size in (block_sizes or {}).items()
+            if size > 0
+        }
+        self.ids: Dict[str, Deque[int]] = defaultdict(deque)
+        self.refilling: Set[str] = set()
+        self.generation = 0
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def is_pooled(self, collection: Collection) -> bool:
+        return str(collection) in self.block_sizes
+
+    def take(
+        self, collection: Collection, amount: int, reserve: ReserveIds
+    ) -> List[int]:
+        """
+        Returns amount ids of the pool. Missing ids are reserved with the given
+        function together with a new block.
+        """
+        key = str(collection)
+        block_size = self.block_sizes[key]
+        with self.lock:
+            ids = self.ids[key]
+            result = [ids.popleft() for _ in range(min(amount, len(ids)))]
+            generation = self.generation
+        missing = amount - len(result)
+        if missing:
+            new_ids = list(reserve(collection, missing + block_size))
+            result.extend(new_ids[:missing])
+            self.add(key, new_ids[missing:], generation)
+        self.refill_if_low(collection, reserve)
+        return result
+
+    def refill_if_low(self, collection: Collection, reserve: ReserveIds) -> None:
+        key = str(collection)
+        with self.lock:
+            if len(self.ids[key]) * 2 >= self.block_sizes[key] or key in self.refilling:
+                return
+            self.refilling.add(key)
+            generation = self.generation
+        self.executor.submit(self.refill, collection, reserve, generation)
+
+    def refill(
+        self, collection: Collection, reserve: ReserveIds, generation: int
+    ) -> None:
+        key = str(collection)
+        try:
+            self.add(key, reserve(collection, self.block_sizes[key]), generation)
+        except Exception as e:
+            # The next reservation reserves the ids itself and raises the error.
+            self.logger.debug(f"Could not refill the id pool of {key}: {e}")
+        finally:
+            with self.lock:
+                self.refilling.discard(key)
+
+    def add(self, key: str, ids: Sequence[int], generation: int) -> None:
+        """
+        Adds the ids to the pool unless it was cleared since they were requested.
+        """
+        with self.lock:
+            if generation == self.generation:
+                self.ids[key].extend(ids)
+
+    def clear(self) -> None:
+        """
+        Drops all pooled ids, e. g. if the datastore was truncated.
+        """
+        with self.lock:
+            self.ids.clear()
+            self.generation += 1
@@ -1,16 +1,31 @@
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from typing_extensions import Protocol
 
 from ...shared.filters import Filter
-from ...shared.interfaces.write_request import WriteRequest
+from ...shared.interfaces.event import Event
+from ...shared.interfaces.write_request import LockedFields, WriteRequest
 from ...shared.patterns import Collection, FullQualifiedId
 from ...shared.typing import ModelMap
-from .commands import GetManyRequest
+from .batch import ReaderBatch
+from .commands import GetManyRequest, OrderBy
 from .deleted_models_behaviour import (
     DeletedModelsBehaviour,
     InstanceAdditionalBehaviour,
 )
+from .lazy_model import LazyModel
+from .trace import DatastoreTrace
 
 PartialModel = Dict[str, Any]
 
@@ -20,9 +35,13 @@ class DatastoreService(Protocol):
     Datastore defines the interface to the datastore.
     """
 
-    # The key of this dictionary is a stringified FullQualifiedId or FullQualifiedField
-    locked_fields: Dict[str, int]
+    locked_fields: LockedFields
     additional_relation_models: ModelMap
+    use_cache: bool
+    use_pending_changes: bool
+    pin_position: bool
+    pinned_position: Optional[int]
+    trace: Optional[DatastoreTrace]
 
     def get(
         self,
@@ -44,6 +63,13 @@ class DatastoreService(Protocol):
     ) -> Dict[Collection, Dict[int, PartialModel]]:
         ...
 
+    def get_many_stream(
+        self,
+        get_many_requests: List[GetManyRequest],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> Iterator[Tuple[Collection, int, PartialModel]]:
+        ...
+
     def get_all(
         self,
         collection: Collection,
@@ -53,6 +79,14 @@ class DatastoreService(Protocol):
     ) -> Dict[int, PartialModel]:
         ...
 
+    def get_all_stream(
+        self,
+        collection: Collection,
+        mapped_fields: List[str] = None,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> Iterator[Tuple[int, PartialModel]]:
+        ...
+
     def filter(
         self,
         collection: Collection,
@@ -63,6 +97,38 @@ class DatastoreService(Protocol):
     ) -> Dict[int, PartialModel]:
         ...
 
+    def load_slice(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> Dict[int, PartialModel]:
+        ...
+
+    def filter_stream(
+        self,
+        collection: Collection,
+        filter: Filter,
+        mapped_fields: List[str] = [],
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+        lock_result: bool = False,
+    ) -> Iterator[Tuple[int, PartialModel]]:
+        ...
+
+    def query(
+        self,
+        collection: Collection,
+        filter: Optional[Filter],
+        mapped_fields: List[str],
+        order_by: List[OrderBy] = [],
+        limit: int = None,
+        offset: int = 0,
+        get_deleted_models: DeletedModelsBehaviour = DeletedModelsBehaviour.NO_DELETED,
+    ) -> List[PartialModel]:
+        ...
+
     def exists(
         self,
         collection: Collection,
@@ -103,6 +169,32 @@ class DatastoreService(Protocol):
     ) -> Optional[int]:
         ...
 
+    def get_deferred(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: List[str] = None,
+        lock_result: bool = False,
+    ) -> LazyModel:
+        ...
+
+    def fetch_deferred(self) -> None:
+        ...
+
+    def get_shared_cache_metrics(self) -> Optional[Dict[str, int]]:
+        ...
+
+    def reset_cache(self) -> None:
+        ...
+
+    def apply_changes(self, events: Iterable[Event]) -> None:
+        ...
+
+    def without_pending_changes(self) -> ContextManager[None]:
+        ...
+
+    def batch(self) -> ReaderBatch:
+        ...
+
     def reserve_ids(self, collection: Collection, amount: int) -> Sequence[int]:
         ...
 
@@ -134,5 +226,13 @@ class Engine(Protocol):
     be the HTTPEngine per default
     """
 
-    def retrieve(self, endpoint: str, data: str) -> Tuple[bytes, int]:
+    def supports(self, endpoint: str) -> bool:
+        ...
+
+    def retrieve(self, endpoint: str, data: Optional[bytes]) -> Tuple[bytes, int]:
+        ...
+
+    def stream(
+        self, endpoint: str, data: Optional[bytes]
+    ) -> Tuple[Iterator[bytes], int]:
         ...
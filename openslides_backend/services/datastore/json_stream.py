@@ -0,0 +1,116 @@
+import codecs
+import re
+from typing import Any, Collection, Iterable, Iterator, Tuple
+
+import simplejson as json
+from simplejson.errors import JSONDecodeError
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JSONStream:
+    """
+    Incremental reader for a JSON document which is received in chunks of bytes.
+    Values are decoded one at a time, so the whole document never has to be held in
+    memory at once.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.index = 0
+        self.exhausted = False
+
+    def read_more(self) -> bool:
+        """
+        Appends the next chunk to the buffer. Returns False if there are no more
+        chunks.
+        """
+        if self.exhausted:
+            return False
+        try:
+            text = self.decoder.decode(next(self.chunks))
+        except StopIteration:
+            text = self.decoder.decode(b"", final=True)
+            self.exhausted = True
+        self.buffer = self.buffer[self.index :] + text
+        self.index = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it.
+        """
+        while True:
+            match = WHITESPACE.match(self.buffer, self.index)
+            if match:
+                self.index = match.end()
+            if self.index < len(self.buffer):
+                return self.buffer[self.index]
+            if not self.read_more():
+                raise JSONDecodeError("Unexpected end of data", self.buffer, self.index)
+
+    def consume(self, expected: str) -> None:
+        if self.peek() != expected:
+            raise JSONDecodeError(f"Expecting '{expected}'", self.buffer, self.index)
+        self.index += 1
+
+    def value(self) -> Any:
+        """
+        Decodes the next value. Values which reach the end of the buffer are decoded
+        again with more data, because they might be incomplete, e. g. numbers.
+        """
+        while True:
+            try:
+                # The stubs of simplejson require the internal arguments as well.
+                value, end = self.json_decoder.raw_decode(  # type: ignore
+                    self.buffer, self.index
+                )
+            except JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            if end < len(self.buffer) or not self.read_more():
+                self.index = end
+                return value
+
+    def keys(self) -> Iterator[str]:
+        """
+        Iterates over the keys of the next object. After every key, the caller has to
+        consume its value, e. g. by calling value().
+        """
+        self.consume("{")
+        if self.peek() == "}":
+            self.index += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise JSONDecodeError(
+                    "Expecting property name", self.buffer, self.index
+                )
+            self.consume(":")
+            yield key
+            if self.peek() == "}":
+                self.index += 1
+                return
+            self.consume(",")
+
+
+def iter_json_items(
+    chunks: Iterable[bytes], expand: Collection[str] = ()
+) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """
+    Iterates over the items of the JSON object given in chunks. Yields the path of
+    every item and its value. If the value of an item whose key is in expand is an
+    object, its items are yielded one by one instead, e. g. (("data", "1"), model).
+    """
+    stream = JSONStream(chunks)
+    for key in stream.keys():
+        if key in expand and stream.peek() == "{":
+            for inner_key in stream.keys():
+                yield (key, inner_key), stream.value()
+        else:
+            yield (key,), stream.value()
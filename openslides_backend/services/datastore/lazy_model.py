@@ -0,0 +1,70 @@
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Set
+
+from ...shared.exceptions import DatastoreException
+from ...shared.patterns import FullQualifiedId
+
+
+class LazyModel(Mapping[str, Any]):
+    """
+    Read-only placeholder for a model which is fetched from the datastore when one of
+    its fields is accessed for the first time. All placeholders which are pending at
+    this time are fetched together, see DatastoreAdapter.get_deferred.
+    """
+
+    def __init__(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[Set[str]],
+        lock_result: bool,
+        fetch: Callable[[], None],
+    ) -> None:
+        self.fqid = fqid
+        self.mapped_fields = mapped_fields
+        self.lock_result = lock_result
+        self.fetch = fetch
+        self.model: Optional[Dict[str, Any]] = None
+        self.exception: Optional[DatastoreException] = None
+
+    @property
+    def is_resolved(self) -> bool:
+        return self.model is not None or self.exception is not None
+
+    def resolve(self, model: Optional[Dict[str, Any]]) -> None:
+        """
+        Sets the fetched model. None means that the model does not exist.
+        """
+        if model is None:
+            self.exception = DatastoreException(f"Model '{self.fqid}' does not exist.")
+        else:
+            self.model = model
+
+    @property
+    def exists(self) -> bool:
+        if not self.is_resolved:
+            self.fetch()
+        return self.model is not None
+
+    def get_model(self) -> Dict[str, Any]:
+        """
+        Returns the fetched model. Raises a DatastoreException if it does not exist.
+        """
+        if not self.is_resolved:
+            self.fetch()
+        if self.exception is not None:
+            raise self.exception
+        assert self.model is not None
+        return self.model
+
+    def __getitem__(self, field: str) -> Any:
+        return self.get_model()[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.get_model())
+
+    def __len__(self) -> int:
+        return len(self.get_model())
+
+    def __repr__(self) -> str:
+        if not self.is_resolved:
+            return f"LazyModel({repr(str(self.fqid))}, pending)"
+        return f"LazyModel({repr(str(self.fqid))}, {repr(self.model)})"
@@ -0,0 +1,473 @@
+import gzip
+import threading
+from collections import defaultdict
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import simplejson as json
+
+from ...shared.exceptions import DatastoreConnectionException
+from ...shared.filters import matches
+from ...shared.interfaces.logging import LoggingModule
+from ...shared.patterns import KEYSEPARATOR
+from .deleted_models_behaviour import DeletedModelsBehaviour
+from .ordering import order_models
+
+Model = Dict[str, Any]
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class MemoryDatastoreError(Exception):
+    """
+    Error which is sent to the client like the errors of the datastore service.
+    """
+
+    def __init__(self, type_verbose: str, message: str, **kwargs: Any) -> None:
+        self.error = {"type_verbose": type_verbose, "msg": message, **kwargs}
+
+
+class MemoryEngine:
+    """
+    In-memory implementation of the Engine interface which emulates the reader and
+    the writer of the datastore in the current process. It can be used instead of
+    the HTTPEngine to run tests or to profile actions without a datastore service.
+
+    Every write request gets its own position and all versions of the models are
+    kept, so reads at a given position and locked_fields work like in the
+    datastore. There is no persistence. Request bodies may be gzip compressed like
+    the ones the HTTPEngine sends.
+
+    Like the query command, the batch command is only supported by this engine.
+    The DatastoreAdapter sends the commands of a batch one by one otherwise.
+    """
+
+    # Size of the chunks of streamed responses.
+    stream_chunk_size = 65536
+
+    def __init__(self, logging: LoggingModule) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.handlers: Dict[str, Callable[[Any], Any]] = {
+            "get": self.get,
+            "get_many": self.get_many,
+            "get_all": self.get_all,
+            "filter": self.filter,
+            "query": self.query,
+            "exists": self.exists,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "batch": self.batch,
+            "reserve_ids": self.reserve_ids,
+            "write": self.write,
+            "truncate_db": self.truncate_db,
+        }
+        self.position = 0
+        self.versions: Dict[str, List[Tuple[int, Model]]] = defaultdict(list)
+        self.field_positions: Dict[str, int] = {}
+        self.max_ids: Dict[str, int] = defaultdict(int)
+
+    def supports(self, endpoint: str) -> bool:
+        return endpoint in self.handlers
+
+    def retrieve(self, endpoint: str, data: Optional[bytes]) -> Tuple[bytes, int]:
+        handler = self.handlers.get(endpoint)
+        if handler is None:
+            raise DatastoreConnectionException(f"Endpoint {endpoint} does not exist.")
+        if data and data.startswith(GZIP_MAGIC):
+            data = gzip.decompress(data)
+        request = json.loads(data) if data else {}
+        try:
+            with self.lock:
+                response = handler(request)
+        except MemoryDatastoreError as e:
+            return json.dumps({"error": e.error}).encode(), 400
+        if response is None:
+            return b"", 201 if endpoint == "write" else 200
+        return json.dumps(response).encode(), 200
+
+    def stream(
+        self, endpoint: str, data: Optional[bytes]
+    ) -> Tuple[Iterator[bytes], int]:
+        content, status_code = self.retrieve(endpoint, data)
+        chunks = (
+            content[start : start + self.stream_chunk_size]
+            for start in range(0, len(content), self.stream_chunk_size)
+        )
+        return chunks, status_code
+
+    # Reader
+
+    def get(self, request: Dict[str, Any]) -> Model:
+        fqid = request["fqid"]
+        model = self.get_model(
+            fqid, request.get("position"), request.get("get_deleted_models")
+        )
+        if model is None:
+            raise MemoryDatastoreError(
+                "MODEL_DOES_NOT_EXIST", f"Model '{fqid}' does not exist.", fqid=fqid
+            )
+        return self.map_fields(model, request.get("mapped_fields"))
+
+    def get_many(self, request: Dict[str, Any]) -> Dict[str, Dict[str, Model]]:
+        result: Dict[str, Dict[str, Model]] = {}
+        for get_many_request in request["requests"]:
+            collection = get_many_request["collection"]
+            mapped_fields = get_many_request.get("mapped_fields")
+            if mapped_fields and request.get("mapped_fields"):
+                mapped_fields = mapped_fields + request["mapped_fields"]
+            models = result.setdefault(collection, {})
+            for id_ in get_many_request["ids"]:
+                model = self.get_model(
+                    f"{collection}{KEYSEPARATOR}{id_}",
+                    request.get("position"),
+                    request.get("get_deleted_models"),
+                )
+                if model is not None:
+                    models[str(id_)] = self.map_fields(model, mapped_fields)
+        return result
+
+    def get_all(self, request: Dict[str, Any]) -> Dict[str, Model]:
+        return {
+            str(model["id"]): self.map_fields(model, request.get("mapped_fields"))
+            for model in self.get_collection(
+                request["collection"], request.get("get_deleted_models")
+            )
+        }
+
+    def filter(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "position": self.position,
+            "data": {
+                str(model["id"]): self.map_fields(model, request.get("mapped_fields"))
+                for model in self.filter_collection(request)
+            },
+        }
+
+    def query(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        models = order_models(
+            (
+                self.filter_collection(request)
+                if "filter" in request
+                else self.get_collection(
+                    request["collection"], DeletedModelsBehaviour.ALL_MODELS
+                )
+            ),
+            request.get("order_by", []),
+            request.get("limit"),
+            request.get("offset", 0),
+        )
+        return {
+            "position": self.position,
+            "data": [
+                self.map_fields(model, request.get("mapped_fields")) for model in models
+            ],
+        }
+
+    def exists(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        exists = any(True for _ in self.filter_collection(request))
+        return {"exists": exists, "position": self.position}
+
+    def count(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        count = sum(1 for _ in self.filter_collection(request))
+        return {"count": count, "position": self.position}
+
+    def min(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"min": self.aggregate(request, min), "position": self.position}
+
+    def max(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"max": self.aggregate(request, max), "position": self.position}
+
+    def aggregate(
+        self, request: Dict[str, Any], function: Callable[[List[Any]], Any]
+    ) -> Any:
+        field = request["field"]
+        values = [
+            model[field]
+            for model in self.filter_collection(request)
+            if model.get(field) is not None
+        ]
+        return function(values) if values else None
+
+    def get_model(
+        self, fqid: str, position: Optional[int], get_deleted_models: Optional[int]
+    ) -> Optional[Model]:
+        """
+        Returns the model at the given position (or the current one) if it matches
+        the deleted models behaviour.
+        """
+        model = None
+        for version_position, version in reversed(self.versions.get(fqid, [])):
+            if position is None or version_position <= position:
+                model = version
+                break
+        if model is None or not self.matches_deleted_models_behaviour(
+            model, get_deleted_models
+        ):
+            return None
+        return model
+
+    def get_collection(
+        self, collection: str, get_deleted_models: Optional[int] = None
+    ) -> Iterable[Model]:
+        prefix = f"{collection}{KEYSEPARATOR}"
+        for fqid, versions in self.versions.items():
+            if fqid.startswith(prefix):
+                model = versions[-1][1]
+                if self.matches_deleted_models_behaviour(model, get_deleted_models):
+                    yield model
+
+    def filter_collection(self, request: Dict[str, Any]) -> Iterable[Model]:
+        # The adapter already adds the meta_deleted filter, so all models are
+        # considered here.
+        for model in self.get_collection(
+            request["collection"], DeletedModelsBehaviour.ALL_MODELS
+        ):
+            if self.matches(model, request["filter"]):
+                yield model
+
+    def matches_deleted_models_behaviour(
+        self, model: Model, get_deleted_models: Optional[int]
+    ) -> bool:
+        if get_deleted_models == DeletedModelsBehaviour.ALL_MODELS:
+            return True
+        if get_deleted_models == DeletedModelsBehaviour.ONLY_DELETED:
+            return model["meta_deleted"]
+        return not model["meta_deleted"]
+
+    def matches(self, model: Model, filter: Dict[str, Any]) -> bool:
+        try:
+            return matches(model, filter)
+        except ValueError as e:
+            raise MemoryDatastoreError("INVALID_REQUEST", str(e))
+
+    def map_fields(self, model: Model, mapped_fields: Optional[List[str]]) -> Model:
+        if not mapped_fields:
+            return model
+        return {field: model[field] for field in mapped_fields if field in model}
+
+    def batch(self, request: Dict[str, Any]) -> List[Any]:
+        responses = []
+        for item in request["commands"]:
+            if item["command"] in ("batch", "reserve_ids", "write", "truncate_db"):
+                raise MemoryDatastoreError(
+                    "INVALID_REQUEST",
+                    f"Command {item['command']} is not allowed in a batch.",
+                )
+            responses.append(self.handlers[item["command"]](item["data"]))
+        return responses
+
+    # Writer
+
+    def reserve_ids(self, request: Dict[str, Any]) -> Dict[str, List[int]]:
+        collection = request["collection"]
+        start = self.max_ids[collection] + 1
+        self.max_ids[collection] += request["amount"]
+        return {"ids": list(range(start, self.max_ids[collection] + 1))}
+
+    def write(self, write_requests: List[Dict[str, Any]]) -> None:
+        """
+        Writes the write requests one after another like the writer does, so the
+        locked fields of a request are checked against the changes of the previous
+        ones. Every write request gets its own position. If one of them fails,
+        nothing is written.
+        """
+        undo: List[Callable[[], None]] = []
+        position = self.position
+        try:
+            for write_request in write_requests:
+                self.check_locked_fields(write_request.get("locked_fields", {}))
+                position += 1
+                self.write_request(write_request, position, undo)
+        except Exception:
+            for undo_change in reversed(undo):
+                undo_change()
+            raise
+        self.position = position
+
+    def write_request(
+        self,
+        write_request: Dict[str, Any],
+        position: int,
+        undo: List[Callable[[], None]],
+    ) -> None:
+        """
+        Applies the events of the write request at the given position. The
+        functions to revert the changes are added to undo.
+        """
+        changed_models: Dict[str, Model] = {}
+        changed_fields: List[Tuple[str, Iterable[str]]] = []
+        for event in write_request["events"]:
+            fqid = event["fqid"]
+            if fqid in changed_models:
+                model: Optional[Model] = changed_models[fqid]
+            else:
+                model = self.get_model(fqid, None, DeletedModelsBehaviour.ALL_MODELS)
+            model, fields = self.apply_event(event, model, position)
+            changed_models[fqid] = model
+            changed_fields.append((fqid, fields))
+
+        for fqid, model in changed_models.items():
+            undo.append(self.get_restore(self.versions, fqid))
+            self.versions[fqid] = self.versions.get(fqid, []) + [
+                (position, deepcopy(model))
+            ]
+            collection, id_ = fqid.split(KEYSEPARATOR)
+            undo.append(self.get_restore(self.max_ids, collection))
+            self.max_ids[collection] = max(self.max_ids[collection], int(id_))
+        for fqid, fields in changed_fields:
+            collection = fqid.split(KEYSEPARATOR)[0]
+            for field in fields:
+                for key in (
+                    f"{fqid}{KEYSEPARATOR}{field}",
+                    f"{collection}{KEYSEPARATOR}{field}",
+                ):
+                    undo.append(self.get_restore(self.field_positions, key))
+                    self.field_positions[key] = position
+
+    def get_restore(self, values: Dict[str, Any], key: str) -> Callable[[], None]:
+        """
+        Returns a function which restores the current value of the key.
+        """
+        if key in values:
+            value = values[key]
+
+            def restore() -> None:
+                values[key] = value
+
+        else:
+
+            def restore() -> None:
+                values.pop(key, None)
+
+        return restore
+
+    def apply_event(
+        self, event: Dict[str, Any], model: Optional[Model], position: int
+    ) -> Tuple[Model, Iterable[str]]:
+        """
+        Returns the new model and the changed fields.
+        """
+        fqid = event["fqid"]
+        event_type = event["type"]
+        if event_type == "create":
+            if model is not None:
+                raise MemoryDatastoreError(
+                    "MODEL_EXISTS", f"Model '{fqid}' already exists.", fqid=fqid
+                )
+            model = {
+                field: value
+                for field, value in event["fields"].items()
+                if value is not None
+            }
+            fields: Iterable[str] = list(model.keys())
+            model["meta_deleted"] = False
+        elif event_type in ("update", "delete"):
+            if model is None or model["meta_deleted"]:
+                raise MemoryDatastoreError(
+                    "MODEL_DOES_NOT_EXIST", f"Model '{fqid}' does not exist.", fqid=fqid
+                )
+            model = deepcopy(model)
+            if event_type == "update":
+                fields = self.apply_update(model, event)
+            else:
+                model["meta_deleted"] = True
+                fields = [field for field in model if not field.startswith("meta_")]
+        elif event_type == "restore":
+            if model is None or not model["meta_deleted"]:
+                raise MemoryDatastoreError(
+                    "MODEL_NOT_DELETED", f"Model '{fqid}' is not deleted.", fqid=fqid
+                )
+            model = deepcopy(model)
+            model["meta_deleted"] = False
+            fields = [field for field in model if not field.startswith("meta_")]
+        else:
+            raise MemoryDatastoreError(
+                "INVALID_REQUEST", f"Unknown event type {event_type}."
+            )
+        model["meta_position"] = position
+        return model, fields
+
+    def apply_update(self, model: Model, event: Dict[str, Any]) -> List[str]:
+        fields = []
+        for field, value in (event.get("fields") or {}).items():
+            if value is None:
+                model.pop(field, None)
+            else:
+                model[field] = value
+            fields.append(field)
+        list_fields = event.get("list_fields") or {}
+        for field, values in list_fields.get("add", {}).items():
+            current = model.get(field) or []
+            if not isinstance(current, list):
+                raise MemoryDatastoreError(
+                    "INVALID_REQUEST", f"Field '{field}' is not a list."
+                )
+            model[field] = current + [value for value in values if value not in current]
+            fields.append(field)
+        for field, values in list_fields.get("remove", {}).items():
+            current = model.get(field) or []
+            if not isinstance(current, list):
+                raise MemoryDatastoreError(
+                    "INVALID_REQUEST", f"Field '{field}' is not a list."
+                )
+            model[field] = [value for value in current if value not in values]
+            fields.append(field)
+        return fields
+
+    def check_locked_fields(self, locked_fields: Dict[str, Any]) -> None:
+        """
+        Raises a MODEL_LOCKED error if a locked key (FQId, FQField or
+        CollectionField) was changed after the given position. CollectionFields
+        locked with a filter are only locked for models which matched the filter
+        at the given position or after it.
+        """
+        for key, lock in locked_fields.items():
+            parts = key.split(KEYSEPARATOR)
+            if isinstance(lock, dict):
+                locked = self.is_filter_locked(
+                    parts[0], parts[1], lock["position"], lock["filter"]
+                )
+            elif len(parts) == 2 and parts[1].isdigit():
+                versions = self.versions.get(key)
+                locked = (versions[-1][0] if versions else 0) > lock
+            else:
+                locked = self.field_positions.get(key, 0) > lock
+            if locked:
+                raise MemoryDatastoreError(
+                    "MODEL_LOCKED", f"Key '{key}' is locked.", key=key
+                )
+
+    def is_filter_locked(
+        self, collection: str, field: str, position: int, filter: Dict[str, Any]
+    ) -> bool:
+        """
+        Checks if the field of a model of the collection was changed after the
+        position and the model matched the filter before or after the change.
+        """
+        prefix = f"{collection}{KEYSEPARATOR}"
+        for fqid, versions in self.versions.items():
+            if (
+                not fqid.startswith(prefix)
+                or self.field_positions.get(f"{fqid}{KEYSEPARATOR}{field}", 0)
+                <= position
+            ):
+                continue
+            models = [self.get_model(fqid, position, DeletedModelsBehaviour.ALL_MODELS)]
+            models.extend(
+                version
+                for version_position, version in versions
+                if version_position > position
+            )
+            if any(
+                model is not None and self.matches(model, filter) for model in models
+            ):
+                return True
+        return False
+
+    def truncate_db(self, request: Dict[str, Any]) -> None:
+        self.position = 0
+        self.versions.clear()
+        self.field_positions.clear()
+        self.max_ids.clear()
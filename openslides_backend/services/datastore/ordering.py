@@ -0,0 +1,58 @@
+from functools import cmp_to_key
+from heapq import nsmallest
+from typing import Any, Dict, Iterable, List, Optional
+
+from mypy_extensions import TypedDict
+
+OrderByData = TypedDict(
+    "OrderByData",
+    {"field": str, "direction": str, "default": Any},
+    total=False,
+)
+
+ASCENDING = "asc"
+DESCENDING = "desc"
+
+
+def compare_values(a: Any, b: Any) -> int:
+    """
+    Compares two values. None is smaller than every other value.
+    """
+    if a == b:
+        return 0
+    if a is None:
+        return -1
+    if b is None:
+        return 1
+    return -1 if a < b else 1
+
+
+def order_models(
+    models: Iterable[Dict[str, Any]],
+    order_by: List[OrderByData],
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Sorts the models by the fields in order_by and returns the requested page.
+    Missing fields are replaced by the given default value. The order of models
+    with equal values is kept. If limit is given, only offset + limit models are
+    kept in memory.
+    """
+
+    def compare(a: Dict[str, Any], b: Dict[str, Any]) -> int:
+        for item in order_by:
+            field = item["field"]
+            default = item.get("default")
+            result = compare_values(
+                default if a.get(field) is None else a[field],
+                default if b.get(field) is None else b[field],
+            )
+            if result:
+                return -result if item.get("direction") == DESCENDING else result
+        return 0
+
+    key = cmp_to_key(compare)
+    if limit is None:
+        return sorted(models, key=key)[offset:]
+    return nsmallest(offset + limit, models, key=key)[offset:]
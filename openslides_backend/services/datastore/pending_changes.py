@@ -0,0 +1,144 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, cast
+
+from ...shared.interfaces.event import Event, EventType
+from ...shared.patterns import Collection, FullQualifiedId
+from .interface import PartialModel
+
+
+class PendingModel:
+    """
+    The changes of all events of one model which are not written yet. Fields set to
+    None are deleted. Values added to or removed from list fields whose value is
+    unknown are kept as operations and applied to the value read from the datastore.
+    """
+
+    def __init__(self) -> None:
+        self.created = False
+        self.deleted = False
+        self.fields: Dict[str, Any] = {}
+        self.list_operations: Dict[str, List[Tuple[str, List[Any]]]] = {}
+
+    def apply_event(self, event: Event) -> None:
+        if event["type"] == EventType.Delete:
+            self.deleted = True
+            self.fields = {}
+            self.list_operations = {}
+            return
+        if event["type"] == EventType.Create:
+            self.apply_create_event(event)
+            return
+        for field, value in (event.get("fields") or {}).items():
+            self.fields[field] = value
+            self.list_operations.pop(field, None)
+        list_fields = cast(
+            Dict[str, Dict[str, List[Any]]], event.get("list_fields") or {}
+        )
+        for operation in ("add", "remove"):
+            for field, values in list_fields.get(operation, {}).items():
+                if field in self.fields or self.created:
+                    self.fields[field] = apply_list_operation(
+                        self.fields.get(field), operation, values
+                    )
+                else:
+                    self.list_operations.setdefault(field, []).append(
+                        (operation, values)
+                    )
+
+    def apply_create_event(self, event: Event) -> None:
+        """
+        Relation updates of a new model may precede its create event. Since create
+        events are written first, the changes of these updates are applied on top
+        of the fields of the created model.
+        """
+        fields = self.fields
+        list_operations = self.list_operations
+        self.created = True
+        self.deleted = False
+        self.fields = dict(event.get("fields") or {})
+        self.list_operations = {}
+        self.fields.update(fields)
+        for field, operations in list_operations.items():
+            value = self.fields.get(field)
+            for operation, values in operations:
+                value = apply_list_operation(value, operation, values)
+            self.fields[field] = value
+
+    def get_changed_fields(self) -> Set[str]:
+        return set(self.fields) | set(self.list_operations)
+
+    def apply(
+        self, model: PartialModel, mapped_fields: Optional[Iterable[str]]
+    ) -> PartialModel:
+        """
+        Returns a copy of the given model read from the datastore with all changes
+        applied. Only fields in mapped_fields are changed, if given.
+        """
+        fields = None if mapped_fields is None else set(mapped_fields)
+        result = dict(model)
+        for field, value in self.fields.items():
+            if fields is not None and field not in fields:
+                continue
+            if value is None:
+                result.pop(field, None)
+            else:
+                result[field] = value
+        for field, operations in self.list_operations.items():
+            if fields is not None and field not in fields:
+                continue
+            value = result.get(field)
+            for operation, values in operations:
+                value = apply_list_operation(value, operation, values)
+            result[field] = value
+        return result
+
+
+def apply_list_operation(
+    value: Optional[List[Any]], operation: str, values: List[Any]
+) -> List[Any]:
+    current = value or []
+    if operation == "add":
+        return current + [item for item in values if item not in current]
+    return [item for item in current if item not in values]
+
+
+class PendingChanges:
+    """
+    Read-your-writes view of all events created during the current request which
+    are not written to the datastore yet. The DatastoreAdapter applies it to the
+    models read by get, get_many and filter, so that nested and following actions
+    see the changes of previous ones.
+    """
+
+    def __init__(self) -> None:
+        self.models: Dict[FullQualifiedId, PendingModel] = {}
+
+    def apply_events(self, events: Iterable[Event]) -> None:
+        for event in events:
+            fqid = event["fqid"]
+            if fqid not in self.models:
+                self.models[fqid] = PendingModel()
+            self.models[fqid].apply_event(event)
+
+    def get(self, fqid: FullQualifiedId) -> Optional[PendingModel]:
+        return self.models.get(fqid)
+
+    def is_local(self, fqid: FullQualifiedId) -> bool:
+        """
+        Returns True if the model was created or deleted during this request, so
+        it must not be read from the datastore.
+        """
+        pending_model = self.models.get(fqid)
+        return pending_model is not None and (
+            pending_model.created or pending_model.deleted
+        )
+
+    def get_models(self, collection: Collection) -> Iterator[Tuple[int, PendingModel]]:
+        for fqid, pending_model in self.models.items():
+            if fqid.collection == collection:
+                yield fqid.id, pending_model
+
+    def clear(self) -> None:
+        self.models = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.models)
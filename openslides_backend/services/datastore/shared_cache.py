@@ -0,0 +1,138 @@
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from ...shared.patterns import Collection, FullQualifiedId
+from .cache import MISSING
+from .interface import PartialModel
+
+DEFAULT_MAX_SIZE = 10000
+
+CacheEntry = Tuple[Any, int, float]
+
+
+class SharedModelCache:
+    """
+    Least recently used cache for fields of models which is shared by all requests
+    of one worker process.
+
+    Every entry maps a (FQId, field) pair to its value, the meta_position of the
+    model and the time it was fetched. Since other workers may change the cached
+    models at any time, entries are only used for max_staleness seconds. Entries
+    of models written by this worker are invalidated immediately, see
+    DatastoreAdapter.write. Only models of the given collections are cached. The
+    cache is disabled if max_staleness is not positive. The numbers of hits and
+    misses are part of the health info.
+    """
+
+    def __init__(
+        self,
+        max_size: int = None,
+        max_staleness: float = None,
+        collections: Iterable[str] = None,
+    ) -> None:
+        self.max_size = max_size or DEFAULT_MAX_SIZE
+        self.max_staleness = max_staleness or 0
+        self.collections = set(collections or [])
+        self.entries: "OrderedDict[Tuple[FullQualifiedId, str], CacheEntry]" = (
+            OrderedDict()
+        )
+        self.fields: Dict[FullQualifiedId, Set[str]] = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, collection: Collection) -> bool:
+        return self.max_staleness > 0 and str(collection) in self.collections
+
+    def get(
+        self, fqid: FullQualifiedId, mapped_fields: Optional[Set[str]]
+    ) -> Optional[PartialModel]:
+        """
+        Returns the requested fields of the model if all of them are cached, belong
+        to the same meta_position and are not outdated. The full model (mapped_fields
+        is None) is never served from this cache.
+        """
+        if mapped_fields is None or not self.is_cacheable(fqid.collection):
+            return None
+        min_time = time.monotonic() - self.max_staleness
+        model = {}
+        position = None
+        with self.lock:
+            for field in mapped_fields:
+                entry = self.entries.get((fqid, field))
+                if (
+                    entry is None
+                    or entry[2] < min_time
+                    or (position is not None and entry[1] != position)
+                ):
+                    self.misses += 1
+                    return None
+                value, position, _ = entry
+                if value is not MISSING:
+                    model[field] = value
+            for field in mapped_fields:
+                self.entries.move_to_end((fqid, field))
+            self.hits += 1
+        return deepcopy(model)
+
+    def update(
+        self,
+        fqid: FullQualifiedId,
+        mapped_fields: Optional[Set[str]],
+        model: PartialModel,
+    ) -> None:
+        """
+        Adds the given fields of the model to the cache. The model has to contain
+        meta_position. Cached fields of another meta_position are dropped.
+        """
+        position = model.get("meta_position")
+        if not self.is_cacheable(fqid.collection) or position is None:
+            return
+        fields: Iterable[str] = model.keys() if mapped_fields is None else mapped_fields
+        now = time.monotonic()
+        with self.lock:
+            for field in list(self.fields.get(fqid, ())):
+                if self.entries[(fqid, field)][1] != position:
+                    self.remove(fqid, field)
+            for field in fields:
+                value = model.get(field, MISSING)
+                self.entries[(fqid, field)] = (
+                    value if value is MISSING else deepcopy(value),
+                    position,
+                    now,
+                )
+                self.entries.move_to_end((fqid, field))
+                self.fields.setdefault(fqid, set()).add(field)
+            while len(self.entries) > self.max_size:
+                (old_fqid, old_field), _ = self.entries.popitem(last=False)
+                self.discard_field(old_fqid, old_field)
+
+    def remove(self, fqid: FullQualifiedId, field: str) -> None:
+        del self.entries[(fqid, field)]
+        self.discard_field(fqid, field)
+
+    def discard_field(self, fqid: FullQualifiedId, field: str) -> None:
+        cached_fields = self.fields[fqid]
+        cached_fields.discard(field)
+        if not cached_fields:
+            del self.fields[fqid]
+
+    def invalidate(self, fqid: FullQualifiedId) -> None:
+        """
+        Removes all fields of the model with the given FQId from the cache.
+        """
+        with self.lock:
+            for field in self.fields.pop(fqid, set()):
+                self.entries.pop((fqid, field), None)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.fields.clear()
@@ -0,0 +1,216 @@
+import os
+import traceback
+from collections import Counter, defaultdict
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from . import commands
+
+TRACE_HEADER = "X-Datastore-Trace"
+
+DATASTORE_PATH = os.path.dirname(os.path.abspath(__file__))
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(DATASTORE_PATH)))
+
+
+class TracedCommand:
+    """
+    Record of one command sent to the datastore. ids is the number of requested
+    ids, reserved ids or written events, fields the number of mapped fields. The
+    latency is given in milliseconds. The call site is only recorded for reads of
+    a single model.
+    """
+
+    call_site: Optional[str] = None
+
+    def __init__(
+        self,
+        name: str,
+        label: Optional[str],
+        collections: List[str],
+        ids: int,
+        fields: int,
+        bytes_out: int,
+        bytes_in: int,
+        latency: float,
+    ) -> None:
+        self.name = name
+        self.label = label
+        self.collections = collections
+        self.ids = ids
+        self.fields = fields
+        self.bytes_out = bytes_out
+        self.bytes_in = bytes_in
+        self.latency = latency
+
+    def __repr__(self) -> str:
+        return (
+            f"TracedCommand({self.name} {','.join(self.collections)} ids={self.ids} "
+            f"fields={self.fields} out={self.bytes_out} in={self.bytes_in} "
+            f"{self.latency:.1f}ms)"
+        )
+
+
+class DatastoreTrace:
+    """
+    Records every command a DatastoreAdapter sends to the datastore during one
+    request. Commands are tagged with the label which is set while they are sent,
+    e. g. the name of the current action, so they can be aggregated per label.
+    """
+
+    def __init__(self) -> None:
+        self.commands: List[TracedCommand] = []
+        self.label: Optional[str] = None
+        self.lock = Lock()
+
+    def record(self, command: commands.Command, bytes_in: int, latency: float) -> None:
+        data = command.data
+        traced = TracedCommand(
+            command.name,
+            self.label,
+            get_collections(command),
+            get_number_of_ids(command),
+            get_number_of_fields(command),
+            len(data) if data is not None else 0,
+            bytes_in,
+            latency,
+        )
+        if traced.ids == 1 and traced.name in ("get", "get_many"):
+            traced.call_site = get_call_site()
+        # Chunks of get_many requests are sent concurrently.
+        with self.lock:
+            self.commands.append(traced)
+
+    def summary(self, label: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns the number of calls, the transferred bytes and the total latency of
+        all commands or of the commands with the given label.
+        """
+        traced = [
+            command
+            for command in self.commands
+            if label is None or command.label == label
+        ]
+        return {
+            "calls": len(traced),
+            "bytes_out": sum(command.bytes_out for command in traced),
+            "bytes_in": sum(command.bytes_in for command in traced),
+            "time_ms": round(sum(command.latency for command in traced), 1),
+            "commands": dict(Counter(command.name for command in traced)),
+        }
+
+    def labels(self) -> List[str]:
+        return list(
+            dict.fromkeys(
+                command.label for command in self.commands if command.label is not None
+            )
+        )
+
+    def find_repeated_reads(self, threshold: int) -> Dict[str, List[TracedCommand]]:
+        """
+        Returns the reads of single models of all collections which were read this
+        way at least threshold times, i. e. which should be read with one get_many
+        request instead.
+        """
+        reads: Dict[str, List[TracedCommand]] = defaultdict(list)
+        for command in self.commands:
+            if command.call_site is not None:
+                reads[command.collections[0]].append(command)
+        return {
+            collection: commands
+            for collection, commands in reads.items()
+            if len(commands) >= threshold
+        }
+
+    def format_summary(self, label: Optional[str] = None) -> str:
+        """
+        Returns the summary as one line, e. g. for a response header.
+        """
+        summary = self.summary(label)
+        parts = [f"{key}={summary[key]}" for key in ("calls", "bytes_out", "bytes_in")]
+        parts.append(f"time={summary['time_ms']}ms")
+        parts.extend(
+            f"{name}={count}" for name, count in sorted(summary["commands"].items())
+        )
+        return " ".join(parts)
+
+
+def get_collections(command: commands.Command) -> List[str]:
+    collections: Iterable[Any]
+    if isinstance(command, commands.Get):
+        collections = [command.fqid.collection]
+    elif isinstance(command, commands.GetMany):
+        collections = [request.collection for request in command.get_many_requests]
+    elif isinstance(command, commands.Batch):
+        collections = [
+            collection
+            for inner_command in command.commands
+            for collection in get_collections(inner_command)
+        ]
+    elif isinstance(command, commands.Write):
+        collections = [
+            event["fqid"].collection
+            for write_request in command.write_requests
+            for event in write_request.events
+        ]
+    else:
+        collections = [getattr(command, "collection", None)]
+    return list(
+        dict.fromkeys(str(collection) for collection in collections if collection)
+    )
+
+
+def get_number_of_ids(command: commands.Command) -> int:
+    if isinstance(command, commands.Get):
+        return 1
+    if isinstance(command, commands.GetMany):
+        return sum(len(request.ids) for request in command.get_many_requests)
+    if isinstance(command, commands.Batch):
+        return sum(
+            get_number_of_ids(inner_command) for inner_command in command.commands
+        )
+    if isinstance(command, commands.ReserveIds):
+        return command.amount
+    if isinstance(command, commands.Write):
+        return sum(
+            len(write_request.events) for write_request in command.write_requests
+        )
+    return 0
+
+
+def get_number_of_fields(command: commands.Command) -> int:
+    if isinstance(command, (commands.Min, commands.Max)):
+        return 1
+    if isinstance(command, commands.Batch):
+        return sum(
+            get_number_of_fields(inner_command) for inner_command in command.commands
+        )
+    fields: Set[str] = set(getattr(command, "mapped_fields", None) or ())
+    if isinstance(command, commands.GetMany):
+        for request in command.get_many_requests:
+            fields.update(request.mapped_fields or ())
+    return len(fields)
+
+
+def get_call_site(depth: int = 3) -> str:
+    """
+    Returns the innermost frames of the current stack outside of the datastore
+    adapter, e. g. "action/relations/single_relation_handler.py:120 in perform".
+    """
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(ROOT_PATH)
+        and not frame.filename.startswith(DATASTORE_PATH)
+    ]
+    return " <- ".join(
+        f"{os.path.relpath(frame.filename, ROOT_PATH)}:{frame.lineno} in {frame.name}"
+        for frame in reversed(frames[-depth:])
+    )
+
+
+def format_repeated_reads(collection: str, reads: List[TracedCommand]) -> str:
+    call_sites = Counter(read.call_site for read in reads)
+    return "\n".join(
+        [f"{len(reads)} reads of single models of collection {collection}:"]
+        + [f"  {count}x {call_site}" for call_site, count in call_sites.most_common()]
+    )
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Tuple
 
 
 def is_truthy(value: str) -> bool:
@@ -12,3 +13,45 @@ def is_truthy(value: str) -> bool:
 def is_dev_mode() -> bool:
     dev = os.environ.get("OPENSLIDES_DEVELOPMENT", "off")
     return is_truthy(dev)
+
+
+def get_n_plus_one_threshold() -> int:
+    return int(os.environ.get("OPENSLIDES_BACKEND_N_PLUS_ONE_THRESHOLD", "10"))
+
+
+def is_n_plus_one_strict() -> bool:
+    strict = os.environ.get("OPENSLIDES_BACKEND_N_PLUS_ONE_STRICT", "off")
+    return is_truthy(strict)
+
+
+def is_position_pinned() -> bool:
+    pin = os.environ.get("OPENSLIDES_BACKEND_PIN_POSITION", "off")
+    return is_truthy(pin)
+
+
+def get_retry_max() -> int:
+    return int(os.environ.get("OPENSLIDES_BACKEND_RETRY_MAX", "3"))
+
+
+def get_retry_budgets() -> Dict[str, int]:
+    """
+    Parses the retry budgets per action, given as comma separated list of
+    action:retries pairs, e. g. "poll.vote:10,speaker.create:6".
+    """
+    budgets: Dict[str, int] = {}
+    value = os.environ.get("OPENSLIDES_BACKEND_RETRY_BUDGETS", "")
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        action, _, retries = item.partition(":")
+        budgets[action.strip()] = int(retries)
+    return budgets
+
+
+def get_retry_delays() -> Tuple[float, float]:
+    """
+    Returns the base and the maximum delay between two retries in seconds.
+    """
+    base_delay = int(os.environ.get("OPENSLIDES_BACKEND_RETRY_BASE_DELAY", "20"))
+    max_delay = int(os.environ.get("OPENSLIDES_BACKEND_RETRY_MAX_DELAY", "1000"))
+    return base_delay / 1000, max_delay / 1000
@@ -12,6 +12,13 @@ class BackendBaseException(Exception):
         self.message = message
 
 
+class RepeatedReadsException(BackendBaseException):
+    """
+    Raised in strict mode if too many models of one collection were read one by one
+    during a request. It is no ViewException, so it is not sent to the client.
+    """
+
+
 class ViewException(BackendBaseException):
     status_code: int
 
@@ -78,7 +85,11 @@ class DatastoreConnectionException(DatastoreException):
 
 
 class DatastoreLockedException(DatastoreException):
-    pass
+    key: Optional[str]
+
+    def __init__(self, message: str, key: Optional[str] = None) -> None:
+        self.message = message
+        self.key = key
 
 
 class PermissionException(ServiceException):
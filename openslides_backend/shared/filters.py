@@ -1,5 +1,6 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Mapping, Set
 
 FilterData = Dict[str, Any]
 
@@ -20,6 +21,15 @@ class FilterOperator(Filter):
         return {"field": self.field, "operator": self.operator, "value": self.value}
 
 
+def contains(field: str, value: str) -> FilterOperator:
+    """
+    Returns a filter for models whose field contains the given string, ignoring
+    case. It uses the ILIKE operator "%=" with all wildcards in value escaped.
+    """
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return FilterOperator(field, "%=", f"%{escaped}%")
+
+
 class And(Filter):
     def __init__(self, *filters: Filter) -> None:
         self.filters = filters
@@ -58,3 +68,93 @@ def filter_visitor(filter: Filter, callback: Callable[[FilterOperator], None]) -
     elif isinstance(filter, (And, Or)):
         for f in filter.filters:
             filter_visitor(f, callback)
+
+
+def get_conjuncts(filter: Filter) -> List[Filter]:
+    """
+    Returns the operands of the given filter if it is a (nested) And filter and the
+    filter itself otherwise.
+    """
+    if isinstance(filter, And):
+        return [c for f in filter.filters for c in get_conjuncts(f)]
+    return [filter]
+
+
+def get_fields(filter: FilterData) -> Set[str]:
+    """
+    Returns all fields used in the given filter dict.
+    """
+    if "and_filter" in filter:
+        return {field for f in filter["and_filter"] for field in get_fields(f)}
+    if "or_filter" in filter:
+        return {field for f in filter["or_filter"] for field in get_fields(f)}
+    if "not_filter" in filter:
+        return get_fields(filter["not_filter"])
+    return {filter["field"]}
+
+
+def matches(model: Mapping[str, Any], filter: FilterData) -> bool:
+    """
+    Evaluates the given filter dict against the model like the datastore does.
+    Missing fields are treated as None. Raises a ValueError for unknown operators.
+    """
+    if "and_filter" in filter:
+        return all(matches(model, f) for f in filter["and_filter"])
+    if "or_filter" in filter:
+        return any(matches(model, f) for f in filter["or_filter"])
+    if "not_filter" in filter:
+        return not matches(model, filter["not_filter"])
+    value = model.get(filter["field"])
+    operator = filter["operator"]
+    expected = filter["value"]
+    if operator == "=":
+        return value == expected
+    if operator == "!=":
+        return value != expected
+    if operator == "~=":
+        if isinstance(value, str) and isinstance(expected, str):
+            return value.lower() == expected.lower()
+        return value == expected
+    if operator == "%=":
+        if not isinstance(value, str) or not isinstance(expected, str):
+            return False
+        return (
+            re.fullmatch(like_to_regex(expected), value, re.IGNORECASE | re.DOTALL)
+            is not None
+        )
+    if operator not in ("<", "<=", ">", ">="):
+        raise ValueError(f"Unknown operator {operator}.")
+    if value is None or expected is None:
+        return False
+    try:
+        if operator == "<":
+            return value < expected
+        if operator == "<=":
+            return value <= expected
+        if operator == ">":
+            return value > expected
+        return value >= expected
+    except TypeError:
+        return False
+
+
+def like_to_regex(pattern: str) -> str:
+    """
+    Converts an SQL LIKE pattern with the wildcards % and _ and the escape
+    character \\ to a regular expression.
+    """
+    regex = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            regex.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            regex.append(".*")
+        elif char == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
@@ -1,3 +1,11 @@
+from ...services.datastore.trace import DatastoreTrace, format_repeated_reads
+from ..env import (
+    get_n_plus_one_threshold,
+    is_dev_mode,
+    is_n_plus_one_strict,
+    is_position_pinned,
+)
+from ..exceptions import RepeatedReadsException
 from ..interfaces.logging import LoggingModule
 from ..interfaces.services import Services
 
@@ -12,5 +20,50 @@ class BaseHandler:
         self.logging = logging
         self.logger = logging.getLogger(__name__)
 
-        # Now initialize datastore instance.
+        # Now initialize datastore instance. Every handler serves only one request,
+        # so the datastore may cache all models it reads. If enabled, all models
+        # are read at the current position reported by the first filter, exists,
+        # count, min or max response to get a consistent snapshot.
         self.datastore = services.datastore()
+        self.datastore.use_cache = True
+        self.datastore.pin_position = is_position_pinned()
+
+        # In development mode and in strict N+1 mode, all commands sent to the
+        # datastore are recorded.
+        if is_dev_mode() or is_n_plus_one_strict():
+            self.datastore.trace = DatastoreTrace()
+
+    def set_trace_label(self, label: str) -> None:
+        if self.datastore.trace is not None:
+            self.datastore.trace.label = label
+
+    def log_trace(self) -> None:
+        """
+        Logs the datastore commands of every action or presenter of this request
+        and warns about collections whose models were read one by one.
+        """
+        trace = self.datastore.trace
+        if trace is not None:
+            for label in trace.labels():
+                self.logger.info(
+                    f"Datastore commands of {label}: {trace.format_summary(label)}"
+                )
+            repeated_reads = trace.find_repeated_reads(get_n_plus_one_threshold())
+            for collection, reads in repeated_reads.items():
+                self.logger.warning(format_repeated_reads(collection, reads))
+
+    def check_repeated_reads(self) -> None:
+        """
+        Raises a RepeatedReadsException in strict mode if the models of a collection
+        were read one by one too often.
+        """
+        trace = self.datastore.trace
+        if trace is not None and is_n_plus_one_strict():
+            repeated_reads = trace.find_repeated_reads(get_n_plus_one_threshold())
+            if repeated_reads:
+                raise RepeatedReadsException(
+                    "\n".join(
+                        format_repeated_reads(collection, reads)
+                        for collection, reads in repeated_reads.items()
+                    )
+                )
@@ -21,6 +21,9 @@ class Logger(Protocol):  # pragma: no cover
     def critical(self, message: str) -> None:
         ...
 
+    def isEnabledFor(self, level: int) -> bool:
+        ...
+
 
 class LoggingModule(Protocol):  # pragma: no cover
     """
@@ -1,12 +1,28 @@
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, TypedDict, Union
 
+from ..filters import FilterData
 from ..patterns import FullQualifiedId
 from .event import Event
 
 Information = Dict[FullQualifiedId, List[str]]
 
 
+class CollectionFieldLock(TypedDict):
+    """
+    Lock of a CollectionField which only conflicts with changes of models matching
+    the filter.
+    """
+
+    position: int
+    filter: FilterData
+
+
+# The key of this dictionary is a stringified FullQualifiedId or FullQualifiedField
+# or CollectionField. Only CollectionFields may be locked with a filter.
+LockedFields = Dict[str, Union[int, CollectionFieldLock]]
+
+
 @dataclass
 class WriteRequest:
     """
@@ -16,4 +32,4 @@ class WriteRequest:
     events: List[Event]
     information: Information
     user_id: int
-    locked_fields: Dict[str, int]
+    locked_fields: LockedFields
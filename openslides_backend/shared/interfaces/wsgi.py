@@ -23,6 +23,7 @@ class View(Protocol):  # pragma: no cover
     """
 
     method: str
+    response_headers: Dict[str, str]
 
     def __init__(self, logging: LoggingModule, services: Services) -> None:
         ...
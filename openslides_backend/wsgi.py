@@ -8,6 +8,8 @@ from .http.views import ActionView, PresenterView
 from .services.auth.adapter import AuthenticationHTTPAdapter
 from .services.datastore.adapter import DatastoreAdapter
 from .services.datastore.http_engine import HTTPEngine
+from .services.datastore.id_pool import IdPool
+from .services.datastore.shared_cache import SharedModelCache
 from .services.media.adapter import MediaServiceAdapter
 from .services.permission.adapter import PermissionHTTPAdapter
 from .shared.interfaces.logging import LoggingModule
@@ -27,9 +29,35 @@ class OpenSlidesBackendServices(containers.DeclarativeContainer):
     )
     media = providers.Singleton(MediaServiceAdapter, config.media_url, logging)
     engine = providers.Singleton(
-        HTTPEngine, config.datastore_reader_url, config.datastore_writer_url, logging
+        HTTPEngine,
+        config.datastore_reader_url,
+        config.datastore_writer_url,
+        logging,
+        config.datastore_reader_pool_size,
+        config.datastore_writer_pool_size,
+        config.datastore_connect_timeout,
+        config.datastore_read_timeout,
+        config.datastore_reader_balancing,
+        config.datastore_reader_ejection_time,
+        config.datastore_compression_threshold,
+    )
+    shared_cache = providers.Singleton(
+        SharedModelCache,
+        config.datastore_shared_cache_size,
+        config.datastore_shared_cache_max_staleness,
+        config.datastore_shared_cache_collections,
+    )
+    id_pool = providers.Singleton(IdPool, logging, config.datastore_id_pool_block_sizes)
+    datastore = providers.Factory(
+        DatastoreAdapter,
+        engine,
+        logging,
+        config.datastore_get_many_chunk_size,
+        config.datastore_get_many_parallelism,
+        shared_cache,
+        id_pool,
+        config.datastore_filter_locks,
     )
-    datastore = providers.Factory(DatastoreAdapter, engine, logging)
 
 
 class OpenSlidesBackendWSGI(containers.DeclarativeContainer):
@@ -79,6 +107,34 @@ def create_wsgi_application(logging: LoggingModule, view_name: str) -> WSGIAppli
             "media_url": environment["media_url"],
             "datastore_reader_url": environment["datastore_reader_url"],
             "datastore_writer_url": environment["datastore_writer_url"],
+            "datastore_reader_pool_size": environment["datastore_reader_pool_size"],
+            "datastore_writer_pool_size": environment["datastore_writer_pool_size"],
+            "datastore_connect_timeout": environment["datastore_connect_timeout"],
+            "datastore_read_timeout": environment["datastore_read_timeout"],
+            "datastore_reader_balancing": environment["datastore_reader_balancing"],
+            "datastore_reader_ejection_time": environment[
+                "datastore_reader_ejection_time"
+            ],
+            "datastore_compression_threshold": environment[
+                "datastore_compression_threshold"
+            ],
+            "datastore_get_many_chunk_size": environment[
+                "datastore_get_many_chunk_size"
+            ],
+            "datastore_get_many_parallelism": environment[
+                "datastore_get_many_parallelism"
+            ],
+            "datastore_shared_cache_size": environment["datastore_shared_cache_size"],
+            "datastore_shared_cache_max_staleness": environment[
+                "datastore_shared_cache_max_staleness"
+            ],
+            "datastore_shared_cache_collections": environment[
+                "datastore_shared_cache_collections"
+            ],
+            "datastore_id_pool_block_sizes": environment[
+                "datastore_id_pool_block_sizes"
+            ],
+            "datastore_filter_locks": environment["datastore_filter_locks"],
         },
         logging=logging,
     )
@@ -584,6 +584,37 @@ class SetNumberMixinSeriallTest(BaseActionTestCase):
         assert motion3.get("number") == "003"
         assert motion3.get("number_value") == 3
 
+    def test_complex_example_serially_numbered_one_request(self) -> None:
+        self._create_models_for_number_prefix_test()
+        response = self.request_multi(
+            "motion.create",
+            [
+                {
+                    "title": "test_Xcdfgee",
+                    "meeting_id": 222,
+                    "workflow_id": 12,
+                    "category_id": 7,
+                    "text": "test",
+                },
+                {
+                    "title": "test_Xcdfgee",
+                    "meeting_id": 222,
+                    "workflow_id": 12,
+                    "category_id": 9,
+                    "text": "test",
+                },
+            ],
+        )
+        self.assert_status_code(response, 200)
+        motion1 = self.get_model("motion/1")
+        assert motion1.get("number") == "A 001"
+        assert motion1.get("number_value") == 1
+        assert motion1.get("sequential_number") == 1
+        motion2 = self.get_model("motion/2")
+        assert motion2.get("number") == "002"
+        assert motion2.get("number_value") == 2
+        assert motion2.get("sequential_number") == 2
+
     def test_complex_example_serially_numbered_2(self) -> None:
         self._create_models_for_number_prefix_test()
         response = self.request(
@@ -108,11 +108,12 @@ class SpeakerCreateActionTest(BaseActionTestCase):
                 },
             ],
         )
+        # The second action sees the speaker created by the first one.
         self.assert_status_code(response, 400)
         self.assertIn(
-            "Datastore service sends HTTP 400. Model 'user/8' raises MODEL_LOCKED error.",
-            response.json["message"],
+            "User 8 is already on the list of speakers.", response.json["message"]
         )
+        self.assert_model_not_exists("speaker/2")
 
     def test_create_user_present(self) -> None:
         self.set_models(
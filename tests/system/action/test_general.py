@@ -59,3 +59,5 @@ class GeneralActionWSGITester(BaseActionTestCase):
         )
         for action in some_example_actions:
             self.assertIn(action, actions.keys())
+        shared_cache = response.json["healthinfo"]["shared_cache"]
+        self.assertEqual(set(shared_cache.keys()), {"hits", "misses", "size"})
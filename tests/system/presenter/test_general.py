@@ -1,3 +1,8 @@
+from unittest.mock import patch
+
+from openslides_backend.services.datastore.trace import TRACE_HEADER
+from openslides_backend.shared.exceptions import RepeatedReadsException
+
 from .base import BasePresenterTestCase
 
 
@@ -34,3 +39,36 @@ class GeneralPresenterWSGITester(BasePresenterTestCase):
             "Presenter non_existing_presenter does not exist.",
             response.json["message"],
         )
+
+    def test_trace_header(self) -> None:
+        self.create_model(
+            "mediafile/1", {"filename": "the filename", "is_directory": False}
+        )
+        payload = [{"presenter": "check_mediafile_id", "data": {"mediafile_id": 1}}]
+        response = self.client.post("/", json=payload)
+        self.assert_status_code(response, 200)
+        self.assertNotIn(TRACE_HEADER, response.headers)
+        with patch.dict("os.environ", {"OPENSLIDES_DEVELOPMENT": "1"}):
+            response = self.client.post("/", json=payload)
+        self.assert_status_code(response, 200)
+        self.assertTrue(response.headers[TRACE_HEADER].startswith("calls=1 "))
+        self.assertTrue(response.headers[TRACE_HEADER].endswith(" get=1"))
+
+    def test_repeated_reads_strict(self) -> None:
+        self.create_model(
+            "mediafile/1", {"filename": "the filename", "is_directory": False}
+        )
+        payload = [{"presenter": "check_mediafile_id", "data": {"mediafile_id": 1}}]
+        with patch.dict(
+            "os.environ",
+            {
+                "OPENSLIDES_BACKEND_N_PLUS_ONE_STRICT": "1",
+                "OPENSLIDES_BACKEND_N_PLUS_ONE_THRESHOLD": "1",
+            },
+        ):
+            with self.assertRaises(RepeatedReadsException) as context:
+                self.client.post("/", json=payload)
+        self.assertIn(
+            "1 reads of single models of collection mediafile:",
+            context.exception.message,
+        )
@@ -103,6 +103,24 @@ class TestGetUsers(BasePresenterTestCase):
         self.assertEqual(status_code, 200)
         self.assertEqual(data, {"users": [4]})
 
+    def test_keywords_filter_ignores_case(self) -> None:
+        self.create_model(
+            "user/2",
+            {"username": "florian", "first_name": "Florian", "last_name": "Freiheit"},
+        )
+        self.create_model(
+            "user/3", {"username": "test", "first_name": "Testy", "last_name": "Tester"}
+        )
+        self.create_model(
+            "user/4", {"username": "50%_off", "first_name": "Max", "last_name": "Xorr"}
+        )
+        status_code, data = self.request("get_users", {"filter": "FLO"})
+        self.assertEqual(status_code, 200)
+        self.assertEqual(data, {"users": [2]})
+        status_code, data = self.request("get_users", {"filter": "%_"})
+        self.assertEqual(status_code, 200)
+        self.assertEqual(data, {"users": [4]})
+
     def test_check_defaults(self) -> None:
         self.create_model("meeting/1", {"name": "meeting1"})
         self.create_model(
@@ -1,8 +1,12 @@
+import os
 from typing import Any, Type
 from unittest.mock import MagicMock, Mock
 
+from dependency_injector import providers
+
 from openslides_backend.environment import get_environment
 from openslides_backend.http.views import ActionView, PresenterView
+from openslides_backend.services.datastore.memory_engine import MemoryEngine
 from openslides_backend.services.media.interface import MediaService
 from openslides_backend.services.permission.interface import PermissionService
 from openslides_backend.shared.exceptions import MediaServiceException
@@ -25,9 +29,39 @@ def create_test_application(view: Type[View]) -> WSGIApplication:
             "permission_url": environment["permission_url"],
             "datastore_reader_url": environment["datastore_reader_url"],
             "datastore_writer_url": environment["datastore_writer_url"],
+            "datastore_reader_pool_size": environment["datastore_reader_pool_size"],
+            "datastore_writer_pool_size": environment["datastore_writer_pool_size"],
+            "datastore_connect_timeout": environment["datastore_connect_timeout"],
+            "datastore_read_timeout": environment["datastore_read_timeout"],
+            "datastore_reader_balancing": environment["datastore_reader_balancing"],
+            "datastore_reader_ejection_time": environment[
+                "datastore_reader_ejection_time"
+            ],
+            "datastore_compression_threshold": environment[
+                "datastore_compression_threshold"
+            ],
+            "datastore_get_many_chunk_size": environment[
+                "datastore_get_many_chunk_size"
+            ],
+            "datastore_get_many_parallelism": environment[
+                "datastore_get_many_parallelism"
+            ],
+            "datastore_shared_cache_size": environment["datastore_shared_cache_size"],
+            "datastore_shared_cache_max_staleness": environment[
+                "datastore_shared_cache_max_staleness"
+            ],
+            "datastore_shared_cache_collections": environment[
+                "datastore_shared_cache_collections"
+            ],
+            "datastore_id_pool_block_sizes": environment[
+                "datastore_id_pool_block_sizes"
+            ],
+            "datastore_filter_locks": environment["datastore_filter_locks"],
         },
         logging=MagicMock(),
     )
+    if os.environ.get("DATASTORE_ENGINE") == "memory":
+        services.engine.override(providers.Singleton(MemoryEngine, MagicMock()))
     mock_media_service = Mock(MediaService)
     mock_media_service.upload_mediafile = Mock(
         side_effect=side_effect_for_upload_method
@@ -1,14 +1,26 @@
+import time
+from typing import Any, Dict, List, cast
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import simplejson as json
 
 from openslides_backend.services.datastore import commands
 from openslides_backend.services.datastore.adapter import DatastoreAdapter
+from openslides_backend.services.datastore.id_pool import IdPool
 from openslides_backend.services.datastore.interface import GetManyRequest
-from openslides_backend.shared.filters import FilterOperator, Or
+from openslides_backend.services.datastore.memory_engine import MemoryEngine
+from openslides_backend.services.datastore.shared_cache import SharedModelCache
+from openslides_backend.services.datastore.trace import DatastoreTrace
+from openslides_backend.shared.exceptions import (
+    DatastoreException,
+    DatastoreLockedException,
+)
+from openslides_backend.shared.filters import And, FilterOperator, Or
+from openslides_backend.shared.interfaces.event import Event, EventType
 from openslides_backend.shared.interfaces.write_request import WriteRequest
 from openslides_backend.shared.patterns import Collection, FullQualifiedId
+from openslides_backend.shared.typing import DeletedModel
 
 
 class DatastoreAdapterTester(TestCase):
@@ -229,8 +241,9 @@ class DatastoreAdapterTester(TestCase):
         self.db.write(write_requests=write_requests)
         assert (
             command.data
-            == '[{"events": [], "information": {}, "user_id": 42, "locked_fields": {}}]'
+            == b'[{"events": [], "information": {}, "user_id": 42, "locked_fields": {}}]'
         )
+        self.engine.retrieve.assert_called_with("write", command.data)
 
     def test_write_old_style(self) -> None:
         write_request = WriteRequest(
@@ -241,5 +254,883 @@ class DatastoreAdapterTester(TestCase):
         self.db.write(write_requests=write_request)
         assert (
             command.data
-            == '[{"events": [], "information": {}, "user_id": 42, "locked_fields": {}}]'
+            == b'[{"events": [], "information": {}, "user_id": 42, "locked_fields": {}}]'
         )
+        self.engine.retrieve.assert_called_with("write", command.data)
+
+    def test_command_data_is_encoded_once(self) -> None:
+        command = commands.Get(FullQualifiedId(Collection("a"), 1), {"f"})
+        with patch.object(command, "get_raw_data", wraps=command.get_raw_data) as raw:
+            assert command.data is command.data
+        raw.assert_called_once()
+
+    def test_debug_log_disabled(self) -> None:
+        logger = Mock()
+        logger.isEnabledFor.return_value = False
+        self.db.logger = logger
+        self.engine.retrieve.return_value = (
+            json.dumps({"f": 1, "meta_position": 1}),
+            200,
+        )
+        self.db.get(FullQualifiedId(Collection("a"), 1), ["f"])
+        logger.debug.assert_not_called()
+
+    def test_get_cached(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("fakeModel"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": 1, "b": 2, "meta_position": 3}),
+            200,
+        )
+        assert self.db.get(fqid, ["a", "b"]) == {"a": 1, "b": 2}
+        assert self.db.get(fqid, ["a"]) == {"a": 1}
+        assert self.db.get(fqid, ["b"], lock_result=True) == {
+            "b": 2,
+            "meta_position": 3,
+        }
+        self.engine.retrieve.assert_called_once()
+        assert self.db.locked_fields == {"fakeModel/1": 3}
+
+    def test_get_cached_missing_fields(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("fakeModel"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": 1, "meta_position": 3}),
+            200,
+        )
+        assert self.db.get(fqid, ["a", "b"]) == {"a": 1}
+        self.engine.retrieve.return_value = (
+            json.dumps({"c": 4, "meta_position": 3}),
+            200,
+        )
+        assert self.db.get(fqid, ["a", "b", "c"]) == {"a": 1, "c": 4}
+        assert self.engine.retrieve.call_count == 2
+        data = json.loads(self.engine.retrieve.call_args[0][1])
+        assert set(data["mapped_fields"]) == {"c", "meta_position"}
+
+    def test_get_cached_outdated(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("fakeModel"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": 1, "meta_position": 3}),
+            200,
+        )
+        self.db.get(fqid, ["a"])
+        self.engine.retrieve.side_effect = [
+            (json.dumps({"b": 2, "meta_position": 4}), 200),
+            (json.dumps({"a": 5, "b": 2, "meta_position": 4}), 200),
+        ]
+        assert self.db.get(fqid, ["a", "b"], lock_result=True) == {
+            "a": 5,
+            "b": 2,
+            "meta_position": 4,
+        }
+        assert self.engine.retrieve.call_count == 3
+        assert self.db.locked_fields == {"fakeModel/1": 4}
+
+    def test_get_cached_returns_copies(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("fakeModel"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": [1, 2], "meta_position": 3}),
+            200,
+        )
+        self.db.get(fqid, ["a"])["a"].append(3)
+        assert self.db.get(fqid, ["a"]) == {"a": [1, 2]}
+
+    def test_get_many_cached(self) -> None:
+        self.db.use_cache = True
+        collection = Collection("a")
+        self.engine.retrieve.return_value = (
+            json.dumps({"f": 1, "meta_position": 3}),
+            200,
+        )
+        self.db.get(FullQualifiedId(collection, 1), ["f"])
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": {"2": {"f": 2, "meta_position": 4}}}),
+            200,
+        )
+        result = self.db.get_many(
+            [GetManyRequest(collection, [1, 2, 3], ["f"])], lock_result=True
+        )
+        assert result == {
+            collection: {
+                1: {"f": 1, "meta_position": 3},
+                2: {"f": 2, "meta_position": 4},
+            }
+        }
+        assert self.engine.retrieve.call_count == 2
+        call_args = self.engine.retrieve.call_args[0]
+        assert call_args[0] == "get_many"
+        data = json.loads(call_args[1])
+        assert len(data["requests"]) == 1
+        assert data["requests"][0]["ids"] == [2, 3]
+        assert self.db.locked_fields == {"a/1": 3, "a/2": 4}
+        self.db.get_many([GetManyRequest(collection, [1, 2], ["f"])])
+        assert self.engine.retrieve.call_count == 2
+
+    def test_get_deferred(self) -> None:
+        collection = Collection("a")
+        model_1 = self.db.get_deferred(FullQualifiedId(collection, 1), ["f"])
+        model_2 = self.db.get_deferred(
+            FullQualifiedId(collection, 2), ["g"], lock_result=True
+        )
+        model_1_again = self.db.get_deferred(FullQualifiedId(collection, 1), ["g"])
+        model_3 = self.db.get_deferred(FullQualifiedId(collection, 3), ["f"])
+        self.engine.retrieve.assert_not_called()
+        self.engine.retrieve.return_value = (
+            json.dumps(
+                {
+                    "a": {
+                        "1": {"f": 1, "g": 2, "meta_position": 3},
+                        "2": {"f": 3, "g": 4, "meta_position": 5},
+                    }
+                }
+            ),
+            200,
+        )
+        assert model_1["f"] == 1
+        assert dict(model_1) == {"f": 1}
+        assert dict(model_1_again) == {"g": 2}
+        assert dict(model_2) == {"g": 4, "meta_position": 5}
+        assert not model_3.exists
+        with self.assertRaises(DatastoreException):
+            model_3.get("f")
+        self.engine.retrieve.assert_called_once()
+        call_args = self.engine.retrieve.call_args[0]
+        assert call_args[0] == "get_many"
+        data = json.loads(call_args[1])
+        # The requests of one collection are merged.
+        assert len(data["requests"]) == 1
+        assert data["requests"][0]["ids"] == [1, 2, 3]
+        assert set(data["requests"][0]["mapped_fields"]) == {"f", "g", "meta_position"}
+        assert self.db.locked_fields == {"a/2": 5}
+
+    def test_get_deferred_cached(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("a"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"f": 1, "meta_position": 3}),
+            200,
+        )
+        self.db.get(fqid, ["f"])
+        model = self.db.get_deferred(fqid, ["f"])
+        assert dict(model) == {"f": 1}
+        assert self.engine.retrieve.call_count == 1
+
+    def test_str_ids(self) -> None:
+        # Some actions build FQIds with the id from a str.
+        fqid = FullQualifiedId(Collection("a"), cast(int, "1"))
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": {"1": {"f": 1, "meta_position": 3}}}),
+            200,
+        )
+        assert dict(self.db.get_deferred(fqid, ["f"])) == {"f": 1}
+        self.db.use_cache = True
+        result = self.db.get_many(
+            [GetManyRequest(Collection("a"), [cast(int, "1")], ["f"])]
+        )
+        assert result == {Collection("a"): {1: {"f": 1}}}
+        assert self.db.get(fqid, ["f"]) == {"f": 1}
+        assert dict(self.db.get_deferred(fqid, ["f"])) == {"f": 1}
+        assert self.engine.retrieve.call_count == 2
+
+    def test_merge_get_many_requests(self) -> None:
+        command = commands.GetMany(
+            [
+                GetManyRequest(Collection("a"), [1, 2, 1], ["f"]),
+                GetManyRequest(Collection("b"), [1], ["f"]),
+                GetManyRequest(Collection("a"), [3, 2], ["g"]),
+                GetManyRequest(Collection("b"), [2]),
+            ]
+        )
+        requests = cast(
+            List[commands.GetManyRequestData], command.get_raw_data()["requests"]
+        )
+        assert [request["collection"] for request in requests] == ["a", "b"]
+        assert requests[0]["ids"] == [1, 2, 3]
+        assert set(requests[0]["mapped_fields"]) == {"f", "g"}
+        assert requests[1]["ids"] == [1, 2]
+        assert "mapped_fields" not in requests[1]
+
+    def test_get_many_stream(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock(), get_many_chunk_size=2)
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_},
+                    )
+                    for id_ in range(1, 5)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        with patch.object(engine, "stream", wraps=engine.stream) as stream:
+            models = db.get_many_stream(
+                [
+                    GetManyRequest(Collection("a"), [1, 2, 2], ["f"]),
+                    GetManyRequest(Collection("a"), [3, 4, 5], ["f"]),
+                ]
+            )
+            assert next(models) == (Collection("a"), 1, {"f": 1})
+            assert stream.call_count == 1
+            assert list(models) == [
+                (Collection("a"), 2, {"f": 2}),
+                (Collection("a"), 3, {"f": 3}),
+                (Collection("a"), 4, {"f": 4}),
+            ]
+            assert stream.call_count == 3
+
+    def test_split_get_many_requests(self) -> None:
+        self.db.get_many_chunk_size = 3
+        chunks = self.db.split_get_many_requests(
+            [
+                GetManyRequest(Collection("a"), [1, 2], ["f"]),
+                GetManyRequest(Collection("b"), [1, 2, 3, 4, 5], ["g"]),
+            ]
+        )
+        assert [
+            [(str(request.collection), request.ids) for request in chunk]
+            for chunk in chunks
+        ] == [[("a", [1, 2]), ("b", [1])], [("b", [2, 3, 4])], [("b", [5])]]
+        assert chunks[1][0].mapped_fields == {"g"}
+
+    def test_get_many_chunked(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock(), get_many_chunk_size=4)
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"f": id_},
+                    )
+                    for id_ in range(1, 11)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            result = db.get_many(
+                [GetManyRequest(Collection("a"), list(range(1, 12)), ["f"])],
+                lock_result=True,
+            )
+        assert retrieve.call_count == 3
+        assert result == {
+            Collection("a"): {
+                id_: {"f": id_, "meta_position": 1} for id_ in range(1, 11)
+            }
+        }
+        assert db.locked_fields == {f"a/{id_}": 1 for id_ in range(1, 11)}
+
+    def test_write_resets_cache(self) -> None:
+        self.db.use_cache = True
+        fqid = FullQualifiedId(Collection("fakeModel"), 1)
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": 1, "meta_position": 3}),
+            200,
+        )
+        self.db.get(fqid, ["a"])
+        self.engine.retrieve.return_value = "", 200
+        self.db.write(
+            WriteRequest(events=[], information={}, user_id=42, locked_fields={})
+        )
+        self.engine.retrieve.return_value = (
+            json.dumps({"a": 2, "meta_position": 4}),
+            200,
+        )
+        assert self.db.get(fqid, ["a"]) == {"a": 2}
+        assert self.engine.retrieve.call_count == 3
+
+    def test_write_locked_invalidates_key(self) -> None:
+        engine = MemoryEngine(Mock())
+        writer = DatastoreAdapter(engine, Mock())
+        a = FullQualifiedId(Collection("a"), 1)
+        b = FullQualifiedId(Collection("b"), 1)
+
+        def write(db: DatastoreAdapter, event: Event, locked_fields: Any) -> None:
+            db.write(
+                WriteRequest(
+                    events=[event],
+                    information={},
+                    user_id=1,
+                    locked_fields=locked_fields,
+                )
+            )
+
+        write(writer, Event(type=EventType.Create, fqid=a, fields={"f": 1}), {})
+        write(writer, Event(type=EventType.Create, fqid=b, fields={"f": 1}), {})
+        db = DatastoreAdapter(engine, Mock())
+        db.use_cache = True
+        db.pin_position = True
+        db.get(b, ["f"], lock_result=True)
+        db.get(a, ["f"], lock_result=True)
+        db.apply_changes([Event(type=EventType.Update, fqid=b, fields={"f": 3})])
+        write(writer, Event(type=EventType.Update, fqid=a, fields={"f": 2}), {})
+        locked_fields = db.locked_fields
+        db.locked_fields = {}
+        with self.assertRaises(DatastoreLockedException) as context:
+            write(
+                db, Event(type=EventType.Update, fqid=b, fields={"f": 3}), locked_fields
+            )
+        assert context.exception.key == "a/1"
+        assert not db.pending_changes
+        assert db.pinned_position is None
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert db.get(b, ["f"]) == {"f": 1}
+            assert retrieve.call_count == 0
+            assert db.get(a, ["f"]) == {"f": 2}
+            assert retrieve.call_count == 1
+
+    def test_pin_position(self) -> None:
+        engine = MemoryEngine(Mock())
+        writer = DatastoreAdapter(engine, Mock())
+        a = FullQualifiedId(Collection("a"), 1)
+        b = FullQualifiedId(Collection("b"), 1)
+
+        def write(event: Event) -> None:
+            writer.write(
+                WriteRequest(
+                    events=[event], information={}, user_id=1, locked_fields={}
+                )
+            )
+
+        write(Event(type=EventType.Create, fqid=a, fields={"f": 1}))
+        write(Event(type=EventType.Create, fqid=b, fields={"f": 1}))
+        db = DatastoreAdapter(engine, Mock())
+        db.pin_position = True
+        # The meta_position of a model is not the current position, so get
+        # responses do not pin it.
+        assert db.get(a, ["f"]) == {"f": 1}
+        assert db.pinned_position is None
+        assert db.exists(Collection("a"), FilterOperator("f", "=", 1))
+        assert db.pinned_position == 2
+        assert db.get(b, ["f"]) == {"f": 1}
+        write(Event(type=EventType.Update, fqid=a, fields={"f": 2}))
+        assert db.get(a, ["f"]) == {"f": 1}
+        assert db.get_many([GetManyRequest(Collection("a"), [1], ["f"])]) == {
+            Collection("a"): {1: {"f": 1}}
+        }
+        db.reset_cache()
+        assert db.get(a, ["f"]) == {"f": 2}
+        assert db.count(Collection("b"), FilterOperator("f", "=", 1)) == 1
+        assert db.pinned_position == 3
+
+        # Without pin_position, every read sees the latest state.
+        db = DatastoreAdapter(engine, Mock())
+        assert db.exists(Collection("a"), FilterOperator("f", "=", 2))
+        assert db.pinned_position is None
+        write(Event(type=EventType.Update, fqid=a, fields={"f": 3}))
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert db.get(a, ["f"]) == {"f": 3}
+        assert json.loads(retrieve.call_args[0][1]).get("position") is None
+
+    def test_shared_cache(self) -> None:
+        engine = MemoryEngine(Mock())
+        shared_cache = SharedModelCache(max_staleness=60, collections=["a"])
+        fqid = FullQualifiedId(Collection("a"), 1)
+
+        def write(db: DatastoreAdapter, fields: Dict[str, Any]) -> None:
+            db.write(
+                WriteRequest(
+                    events=[
+                        Event(
+                            type=(
+                                EventType.Update
+                                if fields["f"] > 1
+                                else EventType.Create
+                            ),
+                            fqid=fqid,
+                            fields=fields,
+                        )
+                    ],
+                    information={},
+                    user_id=1,
+                    locked_fields={},
+                )
+            )
+
+        def get() -> Dict[str, Any]:
+            db = DatastoreAdapter(engine, Mock(), shared_cache=shared_cache)
+            db.use_cache = True
+            return db.get(fqid, ["f"])
+
+        write(DatastoreAdapter(engine, Mock()), {"f": 1})
+        assert get() == {"f": 1}
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert get() == {"f": 1}
+            assert retrieve.call_count == 0
+        assert shared_cache.get_metrics() == {"hits": 1, "misses": 1, "size": 2}
+        # Writes of other workers are not noticed until the fields are outdated.
+        write(DatastoreAdapter(engine, Mock()), {"f": 2})
+        assert get() == {"f": 1}
+        with patch(
+            "openslides_backend.services.datastore.shared_cache.time.monotonic",
+            return_value=time.monotonic() + 61,
+        ):
+            assert get() == {"f": 2}
+        # Own writes invalidate the cache immediately.
+        write(DatastoreAdapter(engine, Mock(), shared_cache=shared_cache), {"f": 3})
+        assert get() == {"f": 3}
+
+    def test_shared_cache_lru(self) -> None:
+        shared_cache = SharedModelCache(max_size=2, max_staleness=60, collections=["a"])
+        a1 = FullQualifiedId(Collection("a"), 1)
+        a2 = FullQualifiedId(Collection("a"), 2)
+        shared_cache.update(a1, {"f", "meta_position"}, {"f": 1, "meta_position": 1})
+        assert shared_cache.get(a1, {"f"}) == {"f": 1}
+        shared_cache.update(a2, {"f"}, {"f": 2, "meta_position": 1})
+        assert shared_cache.get(a1, {"f", "meta_position"}) is None
+        assert shared_cache.get(a1, {"f"}) == {"f": 1}
+        assert shared_cache.get(a2, {"f"}) == {"f": 2}
+        shared_cache.update(a1, {"f"}, {"f": 3, "meta_position": 2})
+        assert shared_cache.get(a1, {"f"}) == {"f": 3}
+        assert shared_cache.get(FullQualifiedId(Collection("b"), 1), {"f"}) is None
+
+    def test_stream(self) -> None:
+        engine = MemoryEngine(Mock())
+        engine.stream_chunk_size = 5
+        db = DatastoreAdapter(engine, Mock())
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_, "g": "text"},
+                    )
+                    for id_ in range(1, 4)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        assert list(db.get_all_stream(Collection("a"), ["f"])) == [
+            (1, {"f": 1}),
+            (2, {"f": 2}),
+            (3, {"f": 3}),
+        ]
+        filter = FilterOperator("f", ">=", 2)
+        result = db.filter_stream(Collection("a"), filter, ["g"], lock_result=True)
+        assert next(result) == (2, {"g": "text"})
+        assert db.locked_fields == {}
+        assert list(result) == [(3, {"g": "text"})]
+        assert db.locked_fields == {"a/f": 1}
+        with self.assertRaises(DatastoreException):
+            list(db.filter_stream(Collection("a"), FilterOperator("f", "<>", 1)))
+
+    def test_trace(self) -> None:
+        engine = MemoryEngine(Mock())
+        engine.stream_chunk_size = 5
+        db = DatastoreAdapter(engine, Mock())
+        db.trace = DatastoreTrace()
+        db.trace.label = "a.create"
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_},
+                    )
+                    for id_ in range(1, 4)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        db.trace.label = "a.update"
+        db.get(FullQualifiedId(Collection("a"), 1), ["f"])
+        db.get_many([GetManyRequest(Collection("a"), [1, 2], ["id", "f"])])
+        assert list(db.get_all_stream(Collection("a"), ["f"])) == [
+            (1, {"f": 1}),
+            (2, {"f": 2}),
+            (3, {"f": 3}),
+        ]
+        traced = db.trace.commands
+        assert [command.name for command in traced] == [
+            "write",
+            "get",
+            "get_many",
+            "get_all",
+        ]
+        assert [command.label for command in traced] == ["a.create"] + 3 * ["a.update"]
+        assert all(command.collections == ["a"] for command in traced)
+        assert [command.ids for command in traced] == [3, 1, 2, 0]
+        assert [command.fields for command in traced] == [0, 1, 2, 1]
+        assert traced[0].bytes_in == 0
+        assert traced[1].bytes_in == len(b'{"f": 1}')
+        assert traced[3].bytes_in == len(
+            b'{"1": {"f": 1}, "2": {"f": 2}, "3": {"f": 3}}'
+        )
+        summary = db.trace.summary("a.update")
+        assert summary["calls"] == 3
+        assert summary["commands"] == {"get": 1, "get_many": 1, "get_all": 1}
+        assert summary["bytes_out"] == sum(command.bytes_out for command in traced[1:])
+        assert db.trace.labels() == ["a.create", "a.update"]
+        assert db.trace.format_summary().startswith("calls=4 ")
+        assert db.trace.format_summary().endswith(" get=1 get_all=1 get_many=1 write=1")
+
+    def test_trace_repeated_reads(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection(collection), 1),
+                        fields={"id": 1},
+                    )
+                    for collection in ("a", "b")
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        db.trace = DatastoreTrace()
+        for _ in range(2):
+            db.get(FullQualifiedId(Collection("a"), 1))
+        db.get_many([GetManyRequest(Collection("a"), [1])])
+        db.get(FullQualifiedId(Collection("b"), 1))
+        db.get_many([GetManyRequest(Collection("b"), [1, 2])])
+        repeated_reads = db.trace.find_repeated_reads(2)
+        assert list(repeated_reads) == ["a"]
+        assert [read.name for read in repeated_reads["a"]] == ["get", "get", "get_many"]
+        call_site = repeated_reads["a"][0].call_site
+        assert call_site is not None
+        assert call_site.startswith(
+            "tests/unit/services/test_database_adapter.py:"
+        ) and call_site.endswith(" in test_trace_repeated_reads")
+        assert db.trace.find_repeated_reads(4) == {}
+
+    def test_query_without_engine_support(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_ % 3, "g": "text"},
+                    )
+                    for id_ in range(1, 8)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        with patch.object(engine, "supports", return_value=False):
+            with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+                result = db.query(
+                    Collection("a"),
+                    FilterOperator("id", ">", 1),
+                    ["id"],
+                    [commands.OrderBy("f", "desc"), commands.OrderBy("id")],
+                    limit=3,
+                    offset=1,
+                )
+        assert result == [{"id": 5}, {"id": 4}, {"id": 7}]
+        assert retrieve.call_args[0][0] == "filter"
+
+    def test_id_pool(self) -> None:
+        engine = MemoryEngine(Mock())
+        id_pool = IdPool(Mock(), {"a": 4})
+        db = DatastoreAdapter(engine, Mock(), id_pool=id_pool)
+
+        def wait_for_refill() -> None:
+            id_pool.executor.submit(lambda: None).result()
+
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert db.reserve_ids(Collection("a"), 2) == [1, 2]
+            assert db.reserve_ids(Collection("a"), 2) == [3, 4]
+            assert retrieve.call_count == 1
+            # Less than half of a block is left, so a new block is reserved.
+            assert db.reserve_id(Collection("a")) == 5
+            wait_for_refill()
+            assert retrieve.call_count == 2
+            assert db.reserve_ids(Collection("a"), 6) == [6, 7, 8, 9, 10, 11]
+            assert retrieve.call_count == 3
+        wait_for_refill()
+        assert db.reserve_id(Collection("b")) == 1
+        db.truncate_db()
+        assert db.reserve_id(Collection("a")) == 1
+
+    def test_load_slice(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.use_cache = True
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "m": id_ % 2, "f": id_, "g": id_ > 3},
+                    )
+                    for id_ in range(1, 7)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        slice_filter = FilterOperator("m", "=", 0)
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert db.load_slice(Collection("a"), slice_filter, ["f", "g"]) == {
+                2: {"f": 2, "g": False},
+                4: {"f": 4, "g": True},
+                6: {"f": 6, "g": True},
+            }
+            db.load_slice(Collection("a"), slice_filter, ["f"])
+            assert retrieve.call_count == 1
+            narrower = And(slice_filter, FilterOperator("g", "=", True))
+            assert db.exists(Collection("a"), narrower)
+            assert db.count(Collection("a"), narrower) == 2
+            assert db.min(Collection("a"), narrower, "f", lock_result=True) == 4
+            assert db.max(Collection("a"), slice_filter, "f") == 6
+            assert db.locked_fields == {"a/f": 1}
+            assert retrieve.call_count == 1
+            # Pending models are taken into account.
+            db.new_ids[Collection("a")].add(7)
+            db.additional_relation_models = {
+                FullQualifiedId(Collection("a"), 7): {"id": 7, "m": 0, "f": 7},
+                FullQualifiedId(Collection("a"), 6): DeletedModel(),
+                FullQualifiedId(Collection("a"), 3): {"id": 3, "m": 0, "f": 3},
+                FullQualifiedId(Collection("a"), 2): {"id": 2, "g": True},
+            }
+            assert db.count(Collection("a"), slice_filter) == 4
+            assert db.max(Collection("a"), slice_filter, "f") == 7
+            assert retrieve.call_count == 1
+            # Model 3 is neither part of the slice nor new, so its g is unknown.
+            assert db.min(Collection("a"), narrower, "f") == 4
+            assert retrieve.call_count == 2
+            del db.additional_relation_models[FullQualifiedId(Collection("a"), 3)]
+            assert db.min(Collection("a"), narrower, "f") == 2
+            assert retrieve.call_count == 2
+        db.reset_cache()
+        assert db.slices == []
+
+    def test_load_slice_pending_changes(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.use_cache = True
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "m": id_ % 2, "f": id_},
+                    )
+                    for id_ in range(1, 7)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        slice_filter = FilterOperator("m", "=", 0)
+        db.apply_changes(
+            [
+                Event(
+                    type=EventType.Create,
+                    fqid=FullQualifiedId(Collection("a"), 7),
+                    fields={"id": 7, "m": 0, "f": 7},
+                ),
+                Event(type=EventType.Delete, fqid=FullQualifiedId(Collection("a"), 2)),
+                Event(
+                    type=EventType.Update,
+                    fqid=FullQualifiedId(Collection("a"), 4),
+                    fields={"f": 8},
+                ),
+            ]
+        )
+        # Without a slice, the models are read with a filter request.
+        assert db.count(Collection("a"), slice_filter) == 3
+        assert db.max(Collection("a"), slice_filter, "f") == 8
+        filtered = db.filter(Collection("a"), slice_filter, ["f"])
+        assert filtered == {4: {"f": 8}, 6: {"f": 6}, 7: {"f": 7}}
+        assert db.load_slice(Collection("a"), slice_filter, ["f"]) == filtered
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            assert db.load_slice(Collection("a"), slice_filter, ["f"]) == filtered
+            assert db.exists(Collection("a"), slice_filter)
+            assert db.count(Collection("a"), slice_filter) == len(filtered)
+            assert db.min(Collection("a"), slice_filter, "f") == 6
+            assert db.max(Collection("a"), slice_filter, "f") == 8
+            assert retrieve.call_count == 0
+
+    def test_batch(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.use_cache = True
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_},
+                    )
+                    for id_ in range(1, 4)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        filter = FilterOperator("f", ">", 1)
+        with patch.object(engine, "retrieve", wraps=engine.retrieve) as retrieve:
+            batch = db.batch()
+            get = batch.get(FullQualifiedId(Collection("a"), 1), ["f"])
+            get_many = batch.get_many(
+                [GetManyRequest(Collection("a"), [2, 3], ["f"])], lock_result=True
+            )
+            filter_result = batch.filter(Collection("a"), filter, ["f"])
+            exists = batch.exists(Collection("a"), filter)
+            count = batch.count(Collection("a"), filter)
+            min_ = batch.min(Collection("a"), filter, "f")
+            max_ = batch.max(Collection("a"), filter, "f", lock_result=True)
+            with self.assertRaises(DatastoreException):
+                get.result
+            batch.execute()
+            assert retrieve.call_count == 1
+            assert retrieve.call_args[0][0] == "batch"
+            assert get.result == {"f": 1}
+            assert get_many.result == {
+                Collection("a"): {
+                    2: {"f": 2, "meta_position": 1},
+                    3: {"f": 3, "meta_position": 1},
+                }
+            }
+            assert filter_result.result == {2: {"f": 2}, 3: {"f": 3}}
+            assert exists.result is True
+            assert count.result == 2
+            assert min_.result == 2
+            assert max_.result == 3
+            assert db.locked_fields == {"a/2": 1, "a/3": 1, "a/f": 1}
+            # The models are served from the cache now.
+            assert db.get(FullQualifiedId(Collection("a"), 2), ["f"]) == {"f": 2}
+            assert retrieve.call_count == 1
+
+            # Without engine support, the commands are sent one by one.
+            with patch.object(engine, "supports", return_value=False):
+                batch = db.batch()
+                count = batch.count(Collection("a"), filter)
+                max_ = batch.max(Collection("a"), filter, "f")
+                batch.execute()
+            assert [call[0][0] for call in retrieve.call_args_list[1:]] == [
+                "count",
+                "max",
+            ]
+            assert (count.result, max_.result) == (2, 3)
+
+    def test_pending_changes_update_before_create(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        fqid = FullQualifiedId(Collection("a"), 1)
+        db.apply_changes(
+            [
+                Event(
+                    type=EventType.Update,
+                    fqid=fqid,
+                    fields={"f": 2},
+                    list_fields={"add": {"l": [2]}, "remove": {}},
+                ),
+                Event(
+                    type=EventType.Create,
+                    fqid=fqid,
+                    fields={"id": 1, "f": 1, "g": 1, "l": [1]},
+                ),
+            ]
+        )
+        assert db.get(fqid, ["f", "g", "l"]) == {"f": 2, "g": 1, "l": [1, 2]}
+
+    def test_pending_changes(self) -> None:
+        engine = MemoryEngine(Mock())
+        db = DatastoreAdapter(engine, Mock())
+        db.use_cache = True
+        db.write(
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=FullQualifiedId(Collection("a"), id_),
+                        fields={"id": id_, "f": id_, "l": [id_]},
+                    )
+                    for id_ in range(1, 4)
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            )
+        )
+        db.apply_changes(
+            [
+                Event(
+                    type=EventType.Create,
+                    fqid=FullQualifiedId(Collection("a"), 4),
+                    fields={"id": 4, "f": 4, "l": [4]},
+                ),
+                Event(
+                    type=EventType.Update,
+                    fqid=FullQualifiedId(Collection("a"), 1),
+                    fields={"f": 5},
+                    list_fields={"add": {"l": [5]}, "remove": {"l": [1]}},
+                ),
+                Event(
+                    type=EventType.Update,
+                    fqid=FullQualifiedId(Collection("a"), 2),
+                    fields={"f": None},
+                ),
+                Event(type=EventType.Delete, fqid=FullQualifiedId(Collection("a"), 3)),
+            ]
+        )
+        assert db.get(FullQualifiedId(Collection("a"), 1), ["f", "l"]) == {
+            "f": 5,
+            "l": [5],
+        }
+        assert db.get(FullQualifiedId(Collection("a"), 4), ["f"]) == {"f": 4}
+        with self.assertRaises(DatastoreException):
+            db.get(FullQualifiedId(Collection("a"), 3))
+        result = db.get_many(
+            [GetManyRequest(Collection("a"), [1, 2, 3, 4], ["f"])], lock_result=True
+        )
+        assert result == {
+            Collection("a"): {
+                1: {"f": 5, "meta_position": 1},
+                2: {"meta_position": 1},
+                4: {"f": 4},
+            }
+        }
+        assert db.locked_fields == {"a/1": 1, "a/2": 1}
+        assert db.filter(Collection("a"), FilterOperator("f", ">", 1), ["f"]) == {
+            1: {"f": 5},
+            4: {"f": 4},
+        }
+        # The datastore still contains the old state.
+        assert db.get(FullQualifiedId(Collection("a"), 3), ["f"], position=1) == {
+            "f": 3
+        }
+        with db.without_pending_changes():
+            assert db.get(FullQualifiedId(Collection("a"), 1), ["f"]) == {"f": 1}
+            assert db.get_many([GetManyRequest(Collection("a"), [3, 4], ["f"])]) == {
+                Collection("a"): {3: {"f": 3}}
+            }
+        assert db.use_pending_changes
+        db.reset_cache()
+        assert db.get(FullQualifiedId(Collection("a"), 1), ["f"]) == {"f": 1}
@@ -0,0 +1,200 @@
+import gzip
+from typing import Any, List
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from openslides_backend.services.datastore.http_engine import ROUND_ROBIN, HTTPEngine
+from openslides_backend.shared.exceptions import DatastoreConnectionException
+
+
+class HTTPEngineTester(TestCase):
+    def setUp(self) -> None:
+        self.engine = HTTPEngine(
+            "http://reader", "http://writer", MagicMock(), reader_pool_size=5
+        )
+
+    def test_sessions_are_reused(self) -> None:
+        reader_session = self.engine.get_session("reader")
+        assert self.engine.get_session("reader") is reader_session
+        assert self.engine.get_session("writer") is not reader_session
+
+    def test_pool_sizes(self) -> None:
+        reader_adapter = self.engine.get_session("reader").get_adapter("http://reader")
+        writer_adapter = self.engine.get_session("writer").get_adapter("http://writer")
+        assert isinstance(reader_adapter, HTTPAdapter)
+        assert isinstance(writer_adapter, HTTPAdapter)
+        assert reader_adapter.poolmanager.connection_pool_kw["maxsize"] == 5
+        assert writer_adapter.poolmanager.connection_pool_kw["maxsize"] == 2
+
+    def test_sessions_after_fork(self) -> None:
+        session = self.engine.get_session("reader")
+        with patch("os.getpid", return_value=self.engine.sessions_pid + 1):
+            assert self.engine.get_session("reader") is not session
+
+    def test_retrieve(self) -> None:
+        session = self.engine.get_session("reader")
+        response = MagicMock(content=b"{}", status_code=200)
+        with patch.object(session, "post", return_value=response) as post:
+            assert self.engine.retrieve("get", b"{}") == (b"{}", 200)
+        post.assert_called_with(
+            url="http://reader/get",
+            data=b"{}",
+            headers=None,
+            timeout=self.engine.timeouts["reader"],
+            stream=False,
+        )
+
+    def test_compression(self) -> None:
+        self.engine.compression_threshold = 10
+        session = self.engine.get_session("writer")
+        response = MagicMock(content=b"", status_code=201)
+        data = b'{"events": []}'
+        with patch.object(session, "post", return_value=response) as post:
+            self.engine.retrieve("write", b"[]")
+            self.engine.retrieve("write", data)
+        assert post.call_args_list[0].kwargs["headers"] is None
+        assert post.call_args_list[0].kwargs["data"] == b"[]"
+        assert post.call_args_list[1].kwargs["headers"] == {"Content-Encoding": "gzip"}
+        assert gzip.decompress(post.call_args_list[1].kwargs["data"]) == data
+
+    def test_compression_unsupported(self) -> None:
+        self.engine.compression_threshold = 1
+        session = self.engine.get_session("reader")
+        unsupported = MagicMock(content=b"", status_code=415)
+        error = MagicMock(content=b"", status_code=500)
+        response = MagicMock(content=b"{}", status_code=200)
+        with patch.object(
+            session, "post", side_effect=[unsupported, error, response]
+        ) as post:
+            # Compression stays disabled even if the uncompressed request fails.
+            assert self.engine.retrieve("get", b"{}") == (b"", 500)
+            assert self.engine.retrieve("get", b"{}") == (b"{}", 200)
+        assert [call.kwargs["headers"] for call in post.call_args_list] == [
+            {"Content-Encoding": "gzip"},
+            None,
+            None,
+        ]
+        unsupported.close.assert_called_once()
+        assert "http://reader" in self.engine.uncompressed_urls
+        assert self.engine.outstanding_requests["http://reader"] == 0
+
+    def test_compression_bad_request(self) -> None:
+        self.engine.compression_threshold = 1
+        session = self.engine.get_session("writer")
+        # The writer rejects the write, e.g. because of a locked model.
+        locked = MagicMock(content=b'{"error": {}}', status_code=400)
+        with patch.object(session, "post", return_value=locked) as post:
+            assert self.engine.retrieve("write", b"{}") == (b'{"error": {}}', 400)
+        post.assert_called_once()
+        assert post.call_args.kwargs["headers"] == {"Content-Encoding": "gzip"}
+        assert "http://writer" not in self.engine.uncompressed_urls
+
+    def test_retrieve_timeout(self) -> None:
+        session = self.engine.get_session("writer")
+        with patch.object(session, "post", side_effect=requests.exceptions.ReadTimeout):
+            with self.assertRaises(DatastoreConnectionException):
+                self.engine.retrieve("write", b"[]")
+
+    def test_retrieve_error_releases_reader(self) -> None:
+        session = self.engine.get_session("reader")
+        with patch.object(session, "post", side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.engine.retrieve("get", b"{}")
+        assert self.engine.outstanding_requests["http://reader"] == 0
+        assert self.engine.ejected_until["http://reader"] == 0.0
+
+    def test_retrieve_unknown_endpoint(self) -> None:
+        with self.assertRaises(DatastoreConnectionException):
+            self.engine.retrieve("unknown", None)
+
+    def test_stream(self) -> None:
+        session = self.engine.get_session("reader")
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = iter([b'{"a"', b": 1}"])
+        with patch.object(session, "post", return_value=response) as post:
+            chunks, status_code = self.engine.stream("get_all", b"{}")
+            assert self.engine.outstanding_requests["http://reader"] == 1
+            assert (b"".join(chunks), status_code) == (b'{"a": 1}', 200)
+        assert post.call_args.kwargs["stream"] is True
+        response.close.assert_called_once()
+        assert self.engine.outstanding_requests["http://reader"] == 0
+        with self.assertRaises(DatastoreConnectionException):
+            self.engine.stream("write", b"[]")
+
+
+class HTTPEngineReplicaTester(TestCase):
+    def setUp(self) -> None:
+        self.engine = HTTPEngine(
+            "http://reader-1, http://reader-2", "http://writer", MagicMock()
+        )
+        self.response = MagicMock(content=b"{}", status_code=200)
+
+    def get_urls(self, post: MagicMock) -> List[str]:
+        return [call.kwargs["url"] for call in post.call_args_list]
+
+    def test_round_robin(self) -> None:
+        self.engine.reader_balancing = ROUND_ROBIN
+        session = self.engine.get_session("reader")
+        with patch.object(session, "post", return_value=self.response) as post:
+            for _ in range(4):
+                self.engine.retrieve("get", b"{}")
+        assert self.get_urls(post) == [
+            "http://reader-1/get",
+            "http://reader-2/get",
+            "http://reader-1/get",
+            "http://reader-2/get",
+        ]
+
+    def test_least_outstanding(self) -> None:
+        busy_reader = self.engine.acquire_reader(set())
+        session = self.engine.get_session("reader")
+        with patch.object(session, "post", return_value=self.response) as post:
+            for _ in range(2):
+                self.engine.retrieve("get", b"{}")
+        assert busy_reader not in self.get_urls(post)[0]
+        assert busy_reader not in self.get_urls(post)[1]
+
+    def test_writer(self) -> None:
+        session = self.engine.get_session("writer")
+        with patch.object(session, "post", return_value=self.response) as post:
+            self.engine.retrieve("write", b"[]")
+        assert self.get_urls(post) == ["http://writer/write"]
+        # Only the connection to the writer has a timeout.
+        assert post.call_args.kwargs["timeout"] == (
+            self.engine.timeouts["reader"][0],
+            None,
+        )
+
+    def test_ejection(self) -> None:
+        session = self.engine.get_session("reader")
+
+        def post(url: str, **kwargs: Any) -> MagicMock:
+            if url.startswith("http://reader-1"):
+                raise requests.exceptions.ConnectionError()
+            return self.response
+
+        with patch.object(session, "post", side_effect=post) as mock:
+            for _ in range(3):
+                assert self.engine.retrieve("get", b"{}") == (b"{}", 200)
+        assert self.get_urls(mock).count("http://reader-1/get") == 1
+
+    def test_no_retry_after_read_timeout(self) -> None:
+        session = self.engine.get_session("reader")
+        with patch.object(
+            session, "post", side_effect=requests.exceptions.ReadTimeout
+        ) as post:
+            with self.assertRaises(DatastoreConnectionException):
+                self.engine.retrieve("get", b"{}")
+        assert post.call_count == 1
+
+    def test_all_readers_unreachable(self) -> None:
+        session = self.engine.get_session("reader")
+        with patch.object(
+            session, "post", side_effect=requests.exceptions.ConnectionError
+        ) as post:
+            with self.assertRaises(DatastoreConnectionException):
+                self.engine.retrieve("get", b"{}")
+        assert post.call_count == 2
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Iterator, List
+from unittest import TestCase
+
+import simplejson as json
+from simplejson.errors import JSONDecodeError
+
+from openslides_backend.services.datastore.json_stream import iter_json_items
+
+
+def split(content: bytes, size: int) -> Iterator[bytes]:
+    for start in range(0, len(content), size):
+        yield content[start : start + size]
+
+
+class JSONStreamTester(TestCase):
+    data: Dict[str, Any] = {
+        "position": 1234,
+        "data": {
+            "1": {"id": 1, "title": 'Ä "title" {}', "tag_ids": [1, 2]},
+            "12": {"id": 12, "weight": -1.5e3, "empty": {}, "none": None},
+        },
+        "empty": {},
+    }
+
+    def items(self, content: bytes, size: int) -> List:
+        return list(iter_json_items(split(content, size), ("data", "empty")))
+
+    def test_iter_json_items(self) -> None:
+        expected = [
+            (("position",), 1234),
+            (("data", "1"), self.data["data"]["1"]),
+            (("data", "12"), self.data["data"]["12"]),
+        ]
+        for indent in (None, 2):
+            content = json.dumps(self.data, indent=indent).encode()
+            for size in (1, 2, 7, len(content)):
+                assert self.items(content, size) == expected
+
+    def test_not_expanded(self) -> None:
+        content = json.dumps(self.data).encode()
+        items = list(iter_json_items(split(content, 3)))
+        assert items == [((key,), value) for key, value in self.data.items()]
+
+    def test_empty_object(self) -> None:
+        assert self.items(b" { } ", 1) == []
+
+    def test_invalid(self) -> None:
+        for content in (b"", b"[1]", b'{"a": 1', b'{"a" 1}', b'{"a": 1,}', b"{1: 2}"):
+            with self.assertRaises(JSONDecodeError):
+                self.items(content, 2)
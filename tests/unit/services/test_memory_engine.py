@@ -0,0 +1,302 @@
+import gzip
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from openslides_backend.services.datastore.adapter import DatastoreAdapter
+from openslides_backend.services.datastore.commands import (
+    Batch,
+    Get,
+    GetManyRequest,
+    Max,
+    OrderBy,
+    ReserveIds,
+)
+from openslides_backend.services.datastore.deleted_models_behaviour import (
+    DeletedModelsBehaviour,
+)
+from openslides_backend.services.datastore.memory_engine import MemoryEngine
+from openslides_backend.shared.exceptions import (
+    DatastoreException,
+    DatastoreLockedException,
+)
+from openslides_backend.shared.filters import And, FilterOperator, Not, contains
+from openslides_backend.shared.interfaces.event import Event, EventType
+from openslides_backend.shared.interfaces.write_request import WriteRequest
+from openslides_backend.shared.patterns import Collection, FullQualifiedId
+
+
+class MemoryEngineTester(TestCase):
+    def setUp(self) -> None:
+        self.engine = MemoryEngine(MagicMock())
+        self.datastore = DatastoreAdapter(self.engine, MagicMock())
+        self.collection = Collection("motion")
+        self.write(
+            Event(
+                type=EventType.Create,
+                fqid=self.fqid(1),
+                fields={"id": 1, "title": "a", "meeting_id": 1, "tag_ids": [1]},
+            ),
+            Event(
+                type=EventType.Create,
+                fqid=self.fqid(2),
+                fields={"id": 2, "title": "B", "meeting_id": 1},
+            ),
+        )
+
+    def fqid(self, id_: int) -> FullQualifiedId:
+        return FullQualifiedId(self.collection, id_)
+
+    def write(self, *events: Event, locked_fields: dict = {}) -> None:
+        self.datastore.write(
+            WriteRequest(
+                events=list(events),
+                information={},
+                user_id=1,
+                locked_fields=locked_fields,
+            )
+        )
+
+    def test_get(self) -> None:
+        assert self.datastore.get(self.fqid(1)) == {
+            "id": 1,
+            "title": "a",
+            "meeting_id": 1,
+            "tag_ids": [1],
+            "meta_deleted": False,
+            "meta_position": 1,
+        }
+        assert self.datastore.get(self.fqid(1), ["title", "unknown"]) == {"title": "a"}
+        with self.assertRaises(DatastoreException):
+            self.datastore.get(self.fqid(3))
+
+    def test_get_many(self) -> None:
+        result = self.datastore.get_many(
+            [GetManyRequest(self.collection, [1, 2, 3], ["title"])]
+        )
+        assert result == {self.collection: {1: {"title": "a"}, 2: {"title": "B"}}}
+
+    def test_compressed_request(self) -> None:
+        data = gzip.compress(b'{"fqid": "motion/2", "mapped_fields": ["title"]}')
+        assert self.engine.retrieve("get", data) == (b'{"title": "B"}', 200)
+
+    def test_batch(self) -> None:
+        command = Batch(
+            [
+                Get(self.fqid(2), {"title"}),
+                Max(self.collection, FilterOperator("meeting_id", "=", 1), "id"),
+            ]
+        )
+        assert self.engine.retrieve("batch", command.data) == (
+            b'[{"title": "B"}, {"max": 2, "position": 1}]',
+            200,
+        )
+        command = Batch([ReserveIds(self.collection, 1)])
+        assert self.engine.retrieve("batch", command.data)[1] == 400
+
+    def test_update(self) -> None:
+        self.write(
+            Event(
+                type=EventType.Update,
+                fqid=self.fqid(1),
+                fields={"title": "c", "meeting_id": None},
+                list_fields={"add": {"tag_ids": [1, 2]}, "remove": {}},
+            )
+        )
+        assert self.datastore.get(self.fqid(1), ["title", "meeting_id", "tag_ids"]) == {
+            "title": "c",
+            "tag_ids": [1, 2],
+        }
+        assert self.datastore.get(self.fqid(1), ["title"], position=1) == {"title": "a"}
+
+    def test_delete(self) -> None:
+        self.write(Event(type=EventType.Delete, fqid=self.fqid(1)))
+        with self.assertRaises(DatastoreException):
+            self.datastore.get(self.fqid(1))
+        model = self.datastore.get(
+            self.fqid(1), get_deleted_models=DeletedModelsBehaviour.ONLY_DELETED
+        )
+        assert model["meta_deleted"] is True
+        assert model["meta_position"] == 2
+        with self.assertRaises(DatastoreException):
+            self.write(Event(type=EventType.Update, fqid=self.fqid(1), fields={}))
+
+    def test_create_existing(self) -> None:
+        with self.assertRaises(DatastoreException):
+            self.write(Event(type=EventType.Create, fqid=self.fqid(1), fields={}))
+
+    def test_filter(self) -> None:
+        filter = And(
+            FilterOperator("meeting_id", "=", 1),
+            Not(FilterOperator("title", "~=", "b")),
+        )
+        assert self.datastore.filter(self.collection, filter, ["title"]) == {
+            1: {"title": "a"}
+        }
+        assert self.datastore.exists(self.collection, filter)
+        assert self.datastore.count(self.collection, filter) == 1
+        self.write(Event(type=EventType.Delete, fqid=self.fqid(1)))
+        assert self.datastore.count(self.collection, filter) == 0
+
+    def test_contains(self) -> None:
+        self.write(
+            Event(
+                type=EventType.Create,
+                fqid=self.fqid(3),
+                fields={"id": 3, "title": "100% b_c"},
+            )
+        )
+        for value, ids in (("b", [2, 3]), ("% B", [3]), ("_", [3]), ("0%b", [])):
+            result = self.datastore.filter(
+                self.collection, contains("title", value), ["id"]
+            )
+            assert sorted(result) == ids
+
+    def test_query(self) -> None:
+        self.write(
+            Event(
+                type=EventType.Create,
+                fqid=self.fqid(3),
+                fields={"id": 3, "title": "a", "meeting_id": 2},
+            ),
+            Event(type=EventType.Create, fqid=self.fqid(4), fields={"id": 4}),
+        )
+        order_by = [OrderBy("title", "desc", "z"), OrderBy("id")]
+        result = self.datastore.query(self.collection, None, ["id"], order_by)
+        assert result == [{"id": 4}, {"id": 1}, {"id": 3}, {"id": 2}]
+        result = self.datastore.query(
+            self.collection,
+            FilterOperator("meeting_id", "=", 1),
+            [],
+            [OrderBy("title")],
+            limit=1,
+            offset=1,
+        )
+        assert [model["id"] for model in result] == [1]
+
+    def test_min_max(self) -> None:
+        filter = FilterOperator("meeting_id", "=", 1)
+        assert self.datastore.min(self.collection, filter, "id") == 1
+        assert self.datastore.max(self.collection, filter, "id") == 2
+        assert self.datastore.max(self.collection, filter, "unknown") is None
+
+    def test_reserve_ids(self) -> None:
+        assert self.datastore.reserve_ids(self.collection, 2) == [3, 4]
+        assert self.datastore.reserve_id(self.collection) == 5
+        assert self.datastore.reserve_id(Collection("tag")) == 1
+
+    def test_locked_fields(self) -> None:
+        update = Event(type=EventType.Update, fqid=self.fqid(1), fields={"title": "c"})
+        self.write(update, locked_fields={"motion/1": 1, "motion/2/title": 1})
+        for key in ("motion/1", "motion/1/title", "motion/title"):
+            with self.assertRaises(DatastoreLockedException):
+                self.write(update, locked_fields={key: 1})
+        self.write(update, locked_fields={"motion/2": 1, "motion/1/tag_ids": 1})
+
+    def test_filter_locks(self) -> None:
+        self.write(
+            Event(
+                type=EventType.Create,
+                fqid=self.fqid(3),
+                fields={"id": 3, "title": "c", "meeting_id": 2},
+            ),
+        )
+        self.datastore.filter_locks = True
+        filter = FilterOperator("meeting_id", "=", 1)
+        self.datastore.filter(self.collection, filter, ["id"], lock_result=True)
+        assert self.datastore.locked_fields == {
+            "motion/meeting_id": {"position": 2, "filter": filter.to_dict()}
+        }
+        locked_fields = dict(self.datastore.locked_fields)
+        # Changes of models which never matched the filter do not conflict.
+        self.write(
+            Event(type=EventType.Update, fqid=self.fqid(3), fields={"meeting_id": 3})
+        )
+        self.write(
+            Event(type=EventType.Update, fqid=self.fqid(1), fields={"title": "d"}),
+            locked_fields=locked_fields,
+        )
+        # A model leaving or entering the filter conflicts.
+        self.write(
+            Event(type=EventType.Update, fqid=self.fqid(2), fields={"meeting_id": 3})
+        )
+        with self.assertRaises(DatastoreLockedException):
+            self.write(locked_fields=locked_fields)
+        with self.assertRaises(DatastoreLockedException):
+            self.write(
+                locked_fields={
+                    "motion/meeting_id": {
+                        "position": 4,
+                        "filter": FilterOperator("meeting_id", "=", 3).to_dict(),
+                    }
+                }
+            )
+
+    def test_locked_write_is_not_applied(self) -> None:
+        with self.assertRaises(DatastoreLockedException):
+            self.datastore.write(
+                [
+                    WriteRequest(
+                        events=[
+                            Event(
+                                type=EventType.Update,
+                                fqid=self.fqid(2),
+                                fields={"title": "c"},
+                            )
+                        ],
+                        information={},
+                        user_id=1,
+                        locked_fields={},
+                    ),
+                    WriteRequest(
+                        events=[],
+                        information={},
+                        user_id=1,
+                        locked_fields={"motion/1": 0},
+                    ),
+                ]
+            )
+        assert self.datastore.get(self.fqid(2), ["title"]) == {"title": "B"}
+
+    def test_locks_see_previous_write_requests(self) -> None:
+        write_requests = [
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Create,
+                        fqid=self.fqid(3),
+                        fields={"id": 3, "title": "c"},
+                    )
+                ],
+                information={},
+                user_id=1,
+                locked_fields={},
+            ),
+            WriteRequest(
+                events=[
+                    Event(
+                        type=EventType.Update,
+                        fqid=self.fqid(1),
+                        fields={"title": "d"},
+                    )
+                ],
+                information={},
+                user_id=1,
+                locked_fields={"motion/title": 1},
+            ),
+        ]
+        with self.assertRaises(DatastoreLockedException):
+            self.datastore.write(write_requests)
+        # The first write request is reverted as well.
+        assert self.engine.position == 1
+        assert self.engine.get_model("motion/3", None, None) is None
+        assert self.engine.max_ids["motion"] == 2
+        assert self.engine.field_positions["motion/title"] == 1
+        write_requests[1].locked_fields = {"motion/title": 2}
+        self.datastore.write(write_requests)
+        assert self.engine.position == 3
+
+    def test_truncate_db(self) -> None:
+        self.datastore.truncate_db()
+        with self.assertRaises(DatastoreException):
+            self.datastore.get(self.fqid(1))
+        assert self.datastore.reserve_id(self.collection) == 1
@@ -1,8 +1,24 @@
+from typing import Any, Dict, List, Set
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
 
-from openslides_backend.action.action import merge_write_requests
-from openslides_backend.shared.interfaces.event import EventType
-from openslides_backend.shared.interfaces.write_request import WriteRequest
+from openslides_backend.action.action import (
+    compact_events,
+    compact_locked_fields,
+    merge_write_requests,
+)
+from openslides_backend.action.actions.agenda_item.create import AgendaItemCreate
+from openslides_backend.action.actions.motion.create import MotionCreate
+from openslides_backend.services.datastore.adapter import DatastoreAdapter
+from openslides_backend.services.datastore.deleted_models_behaviour import (
+    DeletedModelsBehaviour,
+)
+from openslides_backend.services.datastore.memory_engine import MemoryEngine
+from openslides_backend.shared.interfaces.event import Event, EventType
+from openslides_backend.shared.interfaces.write_request import (
+    LockedFields,
+    WriteRequest,
+)
 
 from ..util import get_fqid
 
@@ -84,3 +100,187 @@ class ActionBaseTester(TestCase):
     def test_merge_write_requests_empty(self) -> None:
         result = merge_write_requests([])
         assert result is None
+
+    def test_prefetch(self) -> None:
+        datastore = MagicMock()
+        action = MotionCreate(MagicMock(), datastore, MagicMock(), MagicMock())
+        action.prefetch(
+            [{"meeting_id": 1, "title": "test", "lead_motion_id": 2, "workflow_id": 3}]
+        )
+        datastore.get_many.assert_called_once()
+        get_many_requests = datastore.get_many.call_args[0][0]
+        requested = {
+            (str(request.collection), tuple(request.ids))
+            for request in get_many_requests
+        }
+        assert requested == {
+            ("meeting", (1,)),
+            ("motion", (2,)),
+            ("motion_workflow", (3,)),
+        }
+        meeting_fields: Set[str] = set()
+        for request in get_many_requests:
+            if str(request.collection) == "meeting":
+                meeting_fields.update(request.mapped_fields)
+        assert {
+            "agenda_item_creation",
+            "motions_default_workflow_id",
+            "motions_number_type",
+        } <= meeting_fields
+
+    def test_prefetch_without_cache(self) -> None:
+        datastore = MagicMock(use_cache=False)
+        action = MotionCreate(MagicMock(), datastore, MagicMock(), MagicMock())
+        action.prefetch([{"meeting_id": 1, "title": "test"}])
+        datastore.get_many.assert_not_called()
+
+    def test_reserve_ids_for_payload(self) -> None:
+        datastore = MagicMock()
+        datastore.reserve_ids.side_effect = [[5, 6], [9]]
+        action = MotionCreate(MagicMock(), datastore, MagicMock(), MagicMock())
+        action.reserved_ids = []
+        action.ids_to_reserve = 2
+        assert [action.get_new_id() for _ in range(3)] == [5, 6, 9]
+        assert [
+            call.kwargs["amount"] for call in datastore.reserve_ids.call_args_list
+        ] == [2, 1]
+
+    @patch("openslides_backend.action.action.Action.perform")
+    def test_reserve_ids_for_updated_instances(self, perform: MagicMock) -> None:
+        motion_create = MotionCreate(MagicMock(), MagicMock(), MagicMock(), MagicMock())
+        motion_create.perform([{}, {}], 1)
+        assert motion_create.ids_to_reserve == 2
+        # An overridden get_updated_instances may yield less instances than the
+        # payload has elements.
+        agenda_item_create = AgendaItemCreate(
+            MagicMock(), MagicMock(), MagicMock(), MagicMock()
+        )
+        agenda_item_create.perform([{}, {}], 1)
+        assert agenda_item_create.ids_to_reserve == 1
+
+    def test_compact_events(self) -> None:
+        a1 = get_fqid("a/1")
+        a2 = get_fqid("a/2")
+        a3 = get_fqid("a/3")
+        events: List[Event] = [
+            Event(type=EventType.Create, fqid=a1, fields={"id": 1, "f": 1}),
+            Event(type=EventType.Update, fqid=a1, fields={"f": None, "g": 2}),
+            Event(
+                type=EventType.Update,
+                fqid=a1,
+                list_fields={"add": {"l": [1]}, "remove": {}},
+            ),
+            Event(type=EventType.Update, fqid=a2, fields={"f": [3]}),
+            Event(
+                type=EventType.Update,
+                fqid=a2,
+                list_fields={"add": {"f": [4], "l": [5, 6]}, "remove": {"m": [7]}},
+            ),
+            # Adding a removed value changes the order, so it is not merged.
+            Event(
+                type=EventType.Update,
+                fqid=a2,
+                list_fields={"add": {"m": [7]}, "remove": {"l": [5]}},
+            ),
+            Event(type=EventType.Update, fqid=a2, fields={"g": 1}),
+            Event(type=EventType.Update, fqid=a3, fields={"f": 1}),
+            Event(type=EventType.Delete, fqid=a3),
+        ]
+        assert compact_events(events) == [
+            Event(type=EventType.Create, fqid=a1, fields={"id": 1, "g": 2, "l": [1]}),
+            Event(
+                type=EventType.Update,
+                fqid=a2,
+                fields={"f": [3, 4]},
+                list_fields={"add": {"l": [5, 6]}, "remove": {"m": [7]}},
+            ),
+            Event(
+                type=EventType.Update,
+                fqid=a2,
+                fields={"g": 1},
+                list_fields={"add": {"m": [7]}, "remove": {"l": [5]}},
+            ),
+            Event(type=EventType.Delete, fqid=a3),
+        ]
+        # The given events are not changed.
+        assert events[0]["fields"] == {"id": 1, "f": 1}
+        assert events[3]["fields"] == {"f": [3]}
+
+    def test_compact_events_equivalence(self) -> None:
+        initial = [
+            Event(
+                type=EventType.Create,
+                fqid=get_fqid(f"a/{id_}"),
+                fields={"id": id_, "f": id_, "l": [1, 2]},
+            )
+            for id_ in (1, 2, 3)
+        ]
+        events: List[Event] = [
+            Event(type=EventType.Create, fqid=get_fqid("a/4"), fields={"id": 4}),
+            Event(
+                type=EventType.Update,
+                fqid=get_fqid("a/4"),
+                list_fields={"add": {"l": [1]}, "remove": {"m": [1]}},
+            ),
+            Event(
+                type=EventType.Update,
+                fqid=get_fqid("a/1"),
+                list_fields={"add": {"l": [3]}, "remove": {"l": [1]}},
+            ),
+            Event(
+                type=EventType.Update,
+                fqid=get_fqid("a/1"),
+                list_fields={"add": {"l": [1], "m": [2]}, "remove": {"l": [3]}},
+            ),
+            Event(type=EventType.Update, fqid=get_fqid("a/1"), fields={"f": None}),
+            Event(type=EventType.Update, fqid=get_fqid("a/2"), fields={"l": None}),
+            Event(
+                type=EventType.Update,
+                fqid=get_fqid("a/2"),
+                list_fields={"add": {"l": [5]}, "remove": {}},
+            ),
+            Event(type=EventType.Update, fqid=get_fqid("a/3"), fields={"f": 5}),
+            Event(type=EventType.Delete, fqid=get_fqid("a/3")),
+        ]
+
+        def write(events: List[Event]) -> Dict[int, Dict[str, Any]]:
+            engine = MemoryEngine(MagicMock())
+            datastore = DatastoreAdapter(engine, MagicMock())
+            for write_events in (initial, events):
+                datastore.write(
+                    WriteRequest(
+                        events=write_events, information={}, user_id=1, locked_fields={}
+                    )
+                )
+            models: Dict[int, Dict[str, Any]] = {}
+            for id_ in range(1, 5):
+                model = engine.get_model(
+                    f"a/{id_}", None, DeletedModelsBehaviour.ALL_MODELS
+                )
+                assert model is not None
+                models[id_] = {"meta_deleted": True} if model["meta_deleted"] else model
+            return models
+
+        assert len(compact_events(events)) == 5
+        assert write(compact_events(events)) == write(events)
+
+    def test_compact_locked_fields(self) -> None:
+        locked_fields: LockedFields = {
+            "a/1": 3,
+            "a/1/f": 3,
+            "a/1/g": 2,
+            "a/2/f": 4,
+            "a/2/g": 5,
+            "a/f": 4,
+            "b/1/f": 1,
+            "b/f": {"position": 1, "filter": {}},
+        }
+        assert compact_locked_fields(locked_fields) == {
+            "a/1": 3,
+            "a/1/g": 2,
+            "a/2/g": 5,
+            "a/f": 4,
+            "b/1/f": 1,
+            "b/f": {"position": 1, "filter": {}},
+        }
+        assert len(locked_fields) == 8
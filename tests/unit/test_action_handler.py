@@ -0,0 +1,115 @@
+from typing import List
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from openslides_backend.action.action_handler import ActionHandler
+from openslides_backend.action.util.retry import get_backoff_delay, retry_metrics
+from openslides_backend.shared.exceptions import (
+    ActionException,
+    DatastoreLockedException,
+    RepeatedReadsException,
+)
+from openslides_backend.shared.interfaces.write_request import WriteRequest
+
+
+class StubDatastore:
+    """
+    Datastore whose first writes are rejected because of a locked model.
+    """
+
+    def __init__(self) -> None:
+        self.trace = None
+        self.conflicts = 0
+        self.writes = 0
+        self.resets = 0
+
+    def write(self, write_requests: List[WriteRequest]) -> None:
+        self.writes += 1
+        if self.writes <= self.conflicts:
+            raise DatastoreLockedException("locked", "poll/1")
+
+    def reset_cache(self) -> None:
+        self.resets += 1
+
+
+class BaseHandlerTester(TestCase):
+    def test_pin_position(self) -> None:
+        services = MagicMock()
+        services.datastore.return_value = StubDatastore()
+        assert not ActionHandler(services, MagicMock()).datastore.pin_position
+        with patch.dict("os.environ", {"OPENSLIDES_BACKEND_PIN_POSITION": "1"}):
+            assert ActionHandler(services, MagicMock()).datastore.pin_position
+
+
+class ActionHandlerRetryTester(TestCase):
+    def setUp(self) -> None:
+        self.datastore = StubDatastore()
+        services = MagicMock()
+        services.datastore.return_value = self.datastore
+        self.handler = ActionHandler(services, MagicMock())
+        retry_metrics.clear()
+        sleep_patcher = patch("openslides_backend.action.action_handler.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def get_write_requests(self, conflicts: int) -> MagicMock:
+        self.datastore.conflicts = conflicts
+        return MagicMock(return_value=([MagicMock()], "result"))
+
+    def test_retry(self) -> None:
+        get_write_requests = self.get_write_requests(2)
+        result = self.handler.execute_write_requests(["poll.vote"], get_write_requests)
+        assert result == "result"
+        assert get_write_requests.call_count == 3
+        assert self.sleep.call_count == 2
+        assert self.datastore.resets == 0
+        assert retry_metrics.get("poll.vote") == {
+            "retries": 2,
+            "retried_successes": 1,
+            "exhausted": 0,
+        }
+
+    def test_retry_exhausted(self) -> None:
+        get_write_requests = self.get_write_requests(10)
+        with self.assertRaises(ActionException):
+            self.handler.execute_write_requests(["poll.vote"], get_write_requests)
+        assert get_write_requests.call_count == 4
+        assert retry_metrics.get("poll.vote") == {
+            "retries": 3,
+            "retried_successes": 0,
+            "exhausted": 1,
+        }
+
+    @patch.dict(
+        "os.environ",
+        {"OPENSLIDES_BACKEND_RETRY_BUDGETS": "poll.vote:10, speaker.create:6"},
+    )
+    def test_retry_budget(self) -> None:
+        assert self.handler.get_max_retry(["topic.create"]) == 3
+        assert self.handler.get_max_retry(["topic.create", "speaker.create"]) == 6
+        get_write_requests = self.get_write_requests(8)
+        result = self.handler.execute_write_requests(["poll.vote"], get_write_requests)
+        assert result == "result"
+        assert get_write_requests.call_count == 9
+
+    def test_repeated_reads_checked_before_write(self) -> None:
+        get_write_requests = self.get_write_requests(0)
+        with patch.object(
+            self.handler,
+            "check_repeated_reads",
+            side_effect=RepeatedReadsException("repeated reads"),
+        ):
+            with self.assertRaises(RepeatedReadsException):
+                self.handler.execute_write_requests(
+                    ["topic.create"], get_write_requests
+                )
+        assert self.datastore.writes == 0
+        assert self.datastore.resets == 1
+
+    def test_backoff_delay(self) -> None:
+        with patch(
+            "openslides_backend.action.util.retry.random.uniform",
+            side_effect=lambda a, b: b,
+        ):
+            delays = [get_backoff_delay(retried, 0.02, 0.1) for retried in (1, 2, 3, 4)]
+        assert delays == [0.02, 0.04, 0.08, 0.1]
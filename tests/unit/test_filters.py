@@ -1,4 +1,15 @@
-from openslides_backend.shared.filters import And, FilterOperator, Not, Or
+import pytest
+
+from openslides_backend.shared.filters import (
+    And,
+    FilterOperator,
+    Not,
+    Or,
+    contains,
+    get_conjuncts,
+    get_fields,
+    matches,
+)
 
 
 # TODO: fix casing, dont mix camle and snake case...
@@ -61,3 +72,34 @@ def test_ComplexOperator() -> None:
     not_ = Not(filter2)
     or_ = Or(filter1, not_)
     assert or_.to_dict() == {"or_filter": [filter1.to_dict(), not_.to_dict()]}
+
+
+def test_matches() -> None:
+    model = {"a": 1, "b": "Text", "c": None}
+    assert matches(model, FilterOperator("a", "=", 1).to_dict())
+    assert matches(model, FilterOperator("d", "=", None).to_dict())
+    assert matches(model, FilterOperator("b", "~=", "text").to_dict())
+    assert matches(model, contains("b", "ex").to_dict())
+    assert not matches(model, FilterOperator("c", "<", 1).to_dict())
+    assert matches(
+        model,
+        And(
+            FilterOperator("a", ">=", 1),
+            Or(FilterOperator("b", "=", "x"), Not(FilterOperator("c", "!=", None))),
+        ).to_dict(),
+    )
+    with pytest.raises(ValueError):
+        matches(model, FilterOperator("a", "?", 1).to_dict())
+
+
+def test_get_conjuncts() -> None:
+    filter1 = FilterOperator("a", "=", 1)
+    filter2 = Or(FilterOperator("b", "=", 1), FilterOperator("c", "=", 1))
+    filter3 = FilterOperator("d", "=", 1)
+    assert get_conjuncts(And(And(filter1, filter2), filter3)) == [
+        filter1,
+        filter2,
+        filter3,
+    ]
+    assert get_conjuncts(filter2) == [filter2]
+    assert get_fields(And(filter1, filter2).to_dict()) == {"a", "b", "c"}